@@ -0,0 +1,90 @@
+"""Models exercised by the benchmark suite.
+
+One model is generated per cleaning style, number of fields and number of
+cleaned fields, so that each benchmark saves into a table of its own.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from django.db import models
+
+from clean_fields.decorators import cleans_field, cleans_field_with_context
+from clean_fields.managers import CleanFieldsManager
+from clean_fields.models import CleanFieldsModel
+
+
+FIELD_COUNTS = (1, 10, 50)
+STYLES = ('model', 'decorator', 'context')
+
+# Maps a (style, field count, cleaner count) triple to its model class.
+# Plain models have no cleaners and are keyed with the style 'plain'.
+BENCHMARK_MODELS = OrderedDict()
+
+
+def get_field_names(field_count):
+    return ['field_%d' % index for index in range(field_count)]
+
+
+def get_cleaner_counts(field_count):
+    return sorted({1, field_count})
+
+
+def _strip(value):
+    return value.strip()
+
+
+def _strip_with_context(value, context):
+    return value.strip()
+
+
+def _make_model_cleaner(field_name):
+    def clean_field(self):
+        return getattr(self, field_name).strip()
+    clean_field.__name__ = str('clean_%s' % field_name)
+    return clean_field
+
+
+def _make_model(style, field_count, cleaner_count):
+    name = str(
+        '%sModel%dFields%dCleaners' % (
+            style.capitalize(), field_count, cleaner_count
+        )
+    )
+    field_names = get_field_names(field_count)
+    attrs = {'__module__': __name__}
+    for field_name in field_names:
+        attrs[field_name] = models.CharField(max_length=100)
+
+    base = models.Model
+    if style != 'plain':
+        attrs['objects'] = CleanFieldsManager()
+    if style == 'model':
+        base = CleanFieldsModel
+        for field_name in field_names[:cleaner_count]:
+            cleaner = _make_model_cleaner(field_name)
+            attrs[cleaner.__name__] = cleaner
+
+    model = type(name, (base,), attrs)
+
+    for field_name in field_names[:cleaner_count]:
+        field_ref = 'benchmarks.%s.%s' % (name, field_name)
+        if style == 'decorator':
+            cleans_field(field_ref)(_strip)
+        elif style == 'context':
+            cleans_field_with_context(field_ref)(_strip_with_context)
+    return model
+
+
+for _field_count in FIELD_COUNTS:
+    BENCHMARK_MODELS['plain', _field_count, 0] = _make_model(
+        'plain', _field_count, 0
+    )
+    for _style in STYLES:
+        for _cleaner_count in get_cleaner_counts(_field_count):
+            BENCHMARK_MODELS[_style, _field_count, _cleaner_count] = (
+                _make_model(_style, _field_count, _cleaner_count)
+            )
@@ -2,3 +2,5 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
+
+from clean_fields.rows import clean_rows  # noqa: F401
@@ -0,0 +1,312 @@
+"""Support for asynchronous cleaners, used by `BaseCleanFieldsModel.asave`.
+
+This module relies on `async`/`await` syntax and on asgiref (a dependency of
+Django 3.0 and later), and is only imported when needed.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import inspect
+from timeit import default_timer
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from clean_fields.budgets import budget
+from clean_fields.cleaners import BatchFieldCleaner, ContextFieldCleaner
+from clean_fields.exc import CleanFieldsBatchError
+from clean_fields.metrics import CleanerCall, collector
+from clean_fields.registry import registry
+from clean_fields.utils import FieldContext, get_deferred_field_names
+
+
+def wait_for(awaitable):
+    """Wait for the result of an awaitable from synchronous code.
+
+    Args:
+        awaitable: the coroutine (or other awaitable) returned by a cleaner
+
+    Return:
+        The awaitable's result
+    """
+    return async_to_sync(_await)(awaitable)
+
+
+async def asave_instance(instance, *args, **kwargs):
+    """Clean a `BaseCleanFieldsModel` instance asynchronously, then save it.
+
+    Args:
+        instance (clean_fields.models.BaseCleanFieldsModel): the instance
+        *args: positional arguments to pass to `save()`
+        **kwargs: keyword arguments to pass to `save()`
+    """
+    started = budget.start_save(instance)
+    try:
+        # Preparing may load deferred fields, which must not query the
+        # database from the event loop.
+        field_names = await sync_to_async(instance._prepare_cleaning)(kwargs)
+        await clean_instance_async(
+            instance,
+            field_names=field_names,
+            update_fields=kwargs.get('update_fields')
+        )
+    finally:
+        if started:
+            budget.end_save(instance)
+    instance._clean_fields_skip_cleaning = True
+    try:
+        await sync_to_async(instance.save)(*args, **kwargs)
+    finally:
+        del instance._clean_fields_skip_cleaning
+
+
+async def clean_instance_async(instance, field_names=None, update_fields=None):
+    """Run every cleaner configured for an instance, awaiting async cleaners.
+
+    Cleaners run in waves: the cleaners of a wave run concurrently, and each
+    wave starts once the previous one has completed. A cleaner runs in a
+    later wave than the cleaners it must follow on a synchronous save: the
+    earlier cleaners of its field (model cleaners, then registered cleaners),
+    the cleaners of the fields it depends on (see `clean_field_dependencies`
+    and `depends_on`), and the earlier cleaners reading its field. Cleaners
+    registered with `cleans_field_with_context` and cleaners guarded by a
+    `when` predicate may read any field, so they run alone in their wave;
+    context cleaners run once all other cleaners have completed.
+
+    Args:
+        instance (django.db.models.Model): the model instance to clean
+        field_names (iterable of str): if given, only run the
+            `clean_{field_name}` methods of these fields
+        update_fields (iterable of str): if given, only run the registered
+            cleaners that should run when saving these fields
+    """
+    # Each step is a tuple of the cleaned field's name, the step and the
+    # names of the fields it reads (None if it may read any field).
+    steps = []
+
+    if hasattr(instance, '_get_cleaned_field_names'):
+        dependencies = instance.clean_field_dependencies
+        for field_name in instance._get_cleaned_field_names():
+            if field_names is not None and field_name not in field_names:
+                continue
+            field_cleaner = instance._get_field_cleaner(field_name)
+            if field_cleaner:
+                steps.append((
+                    field_name,
+                    _model_cleaner_step(instance, field_name, field_cleaner),
+                    None if getattr(field_cleaner, 'clean_when', None)
+                    else dependencies.get(field_name, ())
+                ))
+
+    registered_cleaners = [
+        field_cleaner for field_cleaner in registry.get_cleaners(instance)
+        if field_cleaner.should_clean(update_fields) and
+        not field_cleaner._is_unchanged(instance)
+    ]
+    if registered_cleaners and not instance._state.adding and \
+            get_deferred_field_names(instance):
+        registered_cleaners = await sync_to_async(
+            registry.prepare_deferred_fields
+        )(instance, registered_cleaners, update_fields)
+
+    context_cleaners = []
+    for field_cleaner in registered_cleaners:
+        if isinstance(field_cleaner, ContextFieldCleaner):
+            context_cleaners.append(field_cleaner)
+        else:
+            steps.append((
+                field_cleaner.field_name,
+                _registered_cleaner_step(field_cleaner),
+                None if field_cleaner.when else field_cleaner.depends_on
+            ))
+    context = FieldContext(instance)
+    for field_cleaner in context_cleaners:
+        steps.append((
+            field_cleaner.field_name,
+            _context_cleaner_step(field_cleaner, context),
+            None
+        ))
+
+    for wave in _get_waves(steps):
+        await asyncio.gather(*[
+            _run_step(instance, field_name, step)
+            for field_name, step in wave
+        ])
+
+
+def _get_waves(steps):
+    """Group cleaning steps in waves, keeping their synchronous order where
+    they share fields.
+
+    Args:
+        steps (list of tuple): the cleaned field's name, the step, and the
+            names of the fields it reads (None if it may read any field), in
+            the order of a synchronous save
+
+    Return:
+        list of list of (field_name, step) pairs
+    """
+    waves = []
+    written_waves = {}
+    read_waves = {}
+    barrier = -1
+    for field_name, step, read_names in steps:
+        if read_names is None:
+            wave = len(waves)
+        else:
+            wave = max(
+                [
+                    barrier,
+                    written_waves.get(field_name, -1),
+                    read_waves.get(field_name, -1),
+                ] +
+                [written_waves.get(name, -1) for name in read_names]
+            ) + 1
+            for name in read_names:
+                read_waves[name] = max(read_waves.get(name, -1), wave)
+        if read_names is None:
+            barrier = wave
+        written_waves[field_name] = wave
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append((field_name, step))
+    return waves
+
+
+async def _run_step(instance, field_name, step):
+    """Run a cleaning step, assigning its result to the field."""
+    field_value = getattr(instance, field_name)
+    cleaned_value = await step(instance, field_value)
+    setattr(instance, field_name, cleaned_value)
+
+
+def _model_cleaner_step(instance, field_name, field_cleaner):
+    """Wrap a `clean_{field_name}` method as a cleaning step."""
+    cache = getattr(field_cleaner, 'cleaner_cache', None)
+    identity = instance._get_identity(field_name, field_cleaner)
+
+    when = getattr(field_cleaner, 'clean_when', None)
+
+    async def _step(instance, field_value):
+        if when is not None and not when(instance) or \
+                budget.restricts_cleaners and \
+                not budget.allows(instance, identity):
+            return field_value
+        return await _call_cached(identity, cache, field_value, field_cleaner)
+    return _step
+
+
+def _registered_cleaner_step(field_cleaner):
+    """Wrap a registered FieldCleaner as a cleaning step."""
+    if isinstance(field_cleaner, BatchFieldCleaner):
+        cleaner = _clean_batch_of_one
+    else:
+        cleaner = _clean_value
+
+    async def _step(instance, field_value):
+        if not field_cleaner._passes_guard(instance) or \
+                budget.restricts_cleaners and \
+                not budget.allows(instance, field_cleaner.identity):
+            return field_value
+        return await _call_cached(
+            field_cleaner.identity,
+            field_cleaner.cache,
+            field_value,
+            cleaner,
+            field_cleaner,
+            instance,
+            field_value
+        )
+    return _step
+
+
+def _context_cleaner_step(field_cleaner, context):
+    """Wrap a registered ContextFieldCleaner as a cleaning step."""
+    async def _step(instance, field_value):
+        if not field_cleaner._passes_guard(instance) or \
+                budget.restricts_cleaners and \
+                not budget.allows(instance, field_cleaner.identity):
+            return field_value
+        return await _call_cached(
+            field_cleaner.identity,
+            None,
+            field_value,
+            field_cleaner.invoke,
+            instance,
+            [field_value, context]
+        )
+    return _step
+
+
+async def _clean_value(field_cleaner, instance, field_value):
+    return await _resolve(field_cleaner.invoke(instance, [field_value]))
+
+
+async def _clean_batch_of_one(field_cleaner, instance, field_value):
+    cleaned_values = list(await _resolve(
+        field_cleaner.invoke(instance, [[field_value]])
+    ))
+    if len(cleaned_values) != 1:
+        raise CleanFieldsBatchError(
+            field_cleaner.cleaner_name,
+            1,
+            len(cleaned_values)
+        )
+    return cleaned_values[0]
+
+
+async def _call_cached(identity, cache, field_value, cleaner, *args):
+    """Call a cleaner, using and filling its cache of pure results, if any.
+
+    Should the call exceed the cleaner's time budget, the configured action
+    is taken (see `clean_fields.budgets`). Durations are wall times, so they
+    include the time spent running other coroutines.
+    """
+    if cache is not None:
+        cached_values = cache.get_many([field_value])
+        if cached_values:
+            return cached_values[0]
+    start = default_timer()
+    cleaned_value = await _call_measured(identity, cleaner, *args)
+    if cache is not None:
+        cache.put(field_value, cleaned_value)
+    if budget.enabled:
+        budget.check_call(identity, field_value, default_timer() - start)
+    return cleaned_value
+
+
+async def _call_measured(identity, cleaner, *args):
+    """Call and await a cleaner, recording metrics if they are enabled.
+
+    Args:
+        identity (tuple): the model label, field name and cleaner name
+        cleaner (callable): the cleaner to call
+        *args: arguments to pass to cleaner
+    """
+    if not collector.enabled:
+        return await _resolve(cleaner(*args))
+    error = None
+    start = default_timer()
+    try:
+        return await _resolve(cleaner(*args))
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        duration = default_timer() - start
+        collector.record(
+            CleanerCall(*identity, duration=duration, error=error)
+        )
+
+
+async def _resolve(value):
+    """Await value if it is awaitable, or return it as is."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def _await(awaitable):
+    return await awaitable
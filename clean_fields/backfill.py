@@ -0,0 +1,183 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os
+import time
+from collections import namedtuple
+
+from django.db import router, transaction
+from django.db.models import QuerySet
+
+from clean_fields.exc import CleanFieldsCheckpointError
+from clean_fields.managers import clean_instances, expand_update_fields
+from clean_fields.utils import (
+    SNAPSHOT_ATTRIBUTE, get_concrete_field_values, get_model_label
+)
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+BackfillProgress = namedtuple(
+    'BackfillProgress', ['last_pk', 'scanned', 'updated']
+)
+
+
+def backfill(model, field_names=None, chunk_size=DEFAULT_CHUNK_SIZE,
+             checkpoint_path=None, delay=0, using=None, callback=None):
+    """Re-clean the rows of a model already stored in the database.
+
+    Rows are read in chunks of consecutive primary keys, so each query stays
+    cheap however large the table, and only one chunk is held in memory. Each
+    chunk is cleaned like a bulk update (see
+    `clean_fields.managers.clean_instances`), and only the rows whose values
+    changed are written back, in a single `bulk_update` per chunk, within a
+    short transaction.
+
+    After each chunk, the last primary key processed is written to the
+    checkpoint file, if any. A later call with the same checkpoint file
+    resumes after that key.
+
+    Args:
+        model (django.db.models.Model): the model class whose rows to clean
+        field_names (iterable of str): if given, only run the cleaners that
+            should run when saving these fields
+        chunk_size (int): number of rows read and updated at once
+        checkpoint_path (str): path of the file recording progress
+        delay (float): seconds to sleep between chunks, to throttle the load
+            put on the database
+        using (str): alias of the database to use; defaults to the one
+            routed for writes
+        callback (callable): called with a BackfillProgress after each chunk
+
+    Raise:
+        CleanFieldsCheckpointError: if the checkpoint file records the
+            progress of another backfill
+
+    Return:
+        BackfillProgress of the whole run
+    """
+    using = using or router.db_for_write(model)
+    model_label = get_model_label(model)
+    if field_names is not None:
+        field_names = sorted(field_names)
+    last_pk = None
+    if checkpoint_path is not None:
+        last_pk = read_checkpoint(checkpoint_path, model, field_names)
+
+    scanned = updated = 0
+    queryset = QuerySet(model, using=using).order_by('pk')
+    while True:
+        chunk = _get_chunk(queryset, last_pk, chunk_size)
+        if not chunk:
+            break
+        updated += _clean_chunk(model, chunk, field_names, using)
+        scanned += len(chunk)
+        last_pk = chunk[-1].pk
+        if checkpoint_path is not None:
+            write_checkpoint(
+                checkpoint_path, model_label, field_names, last_pk
+            )
+        if callback is not None:
+            callback(BackfillProgress(last_pk, scanned, updated))
+        if len(chunk) < chunk_size:
+            break
+        if delay:
+            time.sleep(delay)
+    return BackfillProgress(last_pk, scanned, updated)
+
+
+def read_checkpoint(path, model, field_names):
+    """Return the last primary key recorded in a checkpoint file.
+
+    Args:
+        path (str): path of the checkpoint file
+        model (django.db.models.Model): the model class being backfilled
+        field_names (list of str): the sorted names of the backfilled
+            fields, or None if all fields are
+
+    Raise:
+        CleanFieldsCheckpointError: if the file records the progress of a
+            backfill of another model or of other fields
+
+    Return:
+        the primary key, or None if there is no checkpoint file
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    model_label = get_model_label(model)
+    if checkpoint['model'].lower() != model_label.lower() or \
+            checkpoint['fields'] != field_names:
+        raise CleanFieldsCheckpointError(path)
+    return model._meta.pk.to_python(checkpoint['last_pk'])
+
+
+def write_checkpoint(path, model_label, field_names, last_pk):
+    """Record the progress of a backfill in a checkpoint file.
+
+    The file is replaced atomically, so an interrupted write never leaves a
+    corrupt checkpoint behind.
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as checkpoint_file:
+        json.dump(
+            {'model': model_label, 'fields': field_names, 'last_pk': last_pk},
+            checkpoint_file,
+            default=str
+        )
+    os.replace(temporary_path, path)
+
+
+def _get_chunk(queryset, last_pk, chunk_size):
+    """Fetch the rows following last_pk."""
+    if last_pk is not None:
+        queryset = queryset.filter(pk__gt=last_pk)
+    return list(queryset[:chunk_size])
+
+
+def _clean_chunk(model, chunk, field_names, using):
+    """Clean a chunk of rows and write back those that changed.
+
+    Return:
+        int, the number of updated rows
+    """
+    original_values = [get_concrete_field_values(obj) for obj in chunk]
+    # Rows were just loaded, so their snapshots would make every field look
+    # unchanged: drop them so that `changed_only` cleaners run too.
+    for obj in chunk:
+        obj.__dict__.pop(SNAPSHOT_ATTRIBUTE, None)
+    if field_names is not None:
+        clean_instances(
+            model, chunk, field_names=expand_update_fields(model, field_names)
+        )
+    else:
+        clean_instances(model, chunk)
+
+    fields_by_attname = dict(
+        (field.attname, field) for field in model._meta.concrete_fields
+        if not field.primary_key
+    )
+    changed_objs = []
+    changed_fields = []
+    for obj, values in zip(chunk, original_values):
+        changed_names = [
+            fields_by_attname[attname].name
+            for attname, value in get_concrete_field_values(obj).items()
+            if attname in fields_by_attname and value != values.get(attname)
+        ]
+        if changed_names:
+            changed_objs.append(obj)
+            for name in changed_names:
+                if name not in changed_fields:
+                    changed_fields.append(name)
+
+    if changed_objs:
+        with transaction.atomic(using=using):
+            QuerySet(model, using=using).bulk_update(
+                changed_objs, changed_fields
+            )
+    return len(changed_objs)
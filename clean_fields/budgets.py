@@ -0,0 +1,290 @@
+"""Time budgets bounding the time spent in cleaners.
+
+Example:
+
+    from clean_fields.budgets import SKIP, set_time_budgets
+
+    set_time_budgets(
+        cleaner=0.05, save=0.2, slow_threshold=0.01, action=SKIP,
+        skip_cooldown=60
+    )
+
+Python cannot interrupt a running cleaner, so budgets are checked once a
+cleaner returns, and before each cleaner of a save runs:
+    - a cleaner that ran longer than the `cleaner` budget is logged, or
+      raised as an error (with SKIP, its result is kept, since it was already
+      computed, and it is skipped on the calls of the next `skip_cooldown`
+      seconds, if given)
+    - once a save spent longer than the `save` budget cleaning, each of its
+      remaining cleaners is logged, raised as an error, or skipped
+Independently of budgets, cleaners running longer than `slow_threshold` are
+logged as slow. Every log record names the model, field and cleaner, and the
+size of the cleaned value.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+from timeit import default_timer
+
+from clean_fields.exc import CleanFieldsBudgetError
+
+
+logger = logging.getLogger('clean_fields')
+
+# Actions taken when a budget is exceeded.
+LOG = 'log'
+RAISE = 'raise'
+SKIP = 'skip'
+
+# Instance attribute storing the clock of the save in progress.
+SAVE_CLOCK_ATTRIBUTE = '_clean_fields_save_clock'
+
+
+class TimeBudget(object):
+    """Bounds the time spent in each cleaner call and in each save.
+
+    Budgets are disabled by default; while disabled, cleaners are called
+    directly, without being timed.
+
+    Args:
+        cleaner (float): seconds a single cleaner call may take
+        save (float): seconds all the cleaners of a save may take together
+        slow_threshold (float): seconds after which a cleaner call is logged
+            as slow
+        action (str): what to do when a budget is exceeded: LOG, RAISE or
+            SKIP
+        skip_cooldown (float): with SKIP, seconds during which a cleaner
+            exceeding the cleaner budget is skipped. By default, such a
+            cleaner is only logged, and keeps running.
+
+    Attributes:
+        skipped_cleaners (dict): maps the identities of the cleaners which
+            exceeded the cleaner budget to the time (of `default_timer`)
+            until which they are skipped
+    """
+
+    def __init__(self, cleaner=None, save=None, slow_threshold=None,
+                 action=LOG, skip_cooldown=None):
+        self.configure(cleaner, save, slow_threshold, action, skip_cooldown)
+
+    def configure(self, cleaner=None, save=None, slow_threshold=None,
+                  action=LOG, skip_cooldown=None):
+        """Replace all budgets; see the class' arguments. Skipped cleaners
+        run again.
+
+        Raise:
+            ValueError: if action is unknown
+        """
+        if action not in (LOG, RAISE, SKIP):
+            raise ValueError('Unknown budget action "%s"' % action)
+        self.cleaner = cleaner
+        self.save = save
+        self.slow_threshold = slow_threshold
+        self.action = action
+        self.skip_cooldown = skip_cooldown
+        self.skipped_cleaners = {}
+
+    @property
+    def enabled(self):
+        return (
+            self.cleaner is not None or
+            self.save is not None or
+            self.slow_threshold is not None
+        )
+
+    @property
+    def restricts_cleaners(self):
+        """Whether `allows` may skip a cleaner: a save budget is set, or a
+        cleaner is cooling down. Callers check it first, so that disabled
+        budgets cost nothing."""
+        return self.save is not None or bool(self.skipped_cleaners)
+
+    def call(self, identity, field_value, cleaner, *args):
+        """Call cleaner with args, unless it is skipped, then check its
+        duration.
+
+        Args:
+            identity (tuple): the model label, field name and cleaner name
+            field_value: the value being cleaned
+            cleaner (callable): the callable to invoke
+            *args: arguments to pass to cleaner
+
+        Raise:
+            CleanFieldsBudgetError: if the call exceeds the cleaner budget and
+                the action is RAISE
+
+        Return:
+            The return value of cleaner, or field_value if the cleaner is
+            skipped
+        """
+        if not self.enabled:
+            return cleaner(*args)
+        if self.is_skipped(identity):
+            return field_value
+        start = default_timer()
+        cleaned_value = cleaner(*args)
+        self.check_call(identity, field_value, default_timer() - start)
+        return cleaned_value
+
+    def check_call(self, identity, field_value, duration):
+        """Log slow cleaner calls and apply the cleaner budget.
+
+        With the SKIP action and a `skip_cooldown`, a cleaner exceeding the
+        budget is skipped on the calls of the next `skip_cooldown` seconds.
+
+        Args:
+            identity (tuple): the model label, field name and cleaner name
+            field_value: the value being cleaned
+            duration (float): seconds the call took
+
+        Raise:
+            CleanFieldsBudgetError: if the call exceeds the cleaner budget and
+                the action is RAISE
+        """
+        if self.cleaner is not None and duration > self.cleaner:
+            self._exceed_call(identity, field_value, duration)
+            return
+        if self.slow_threshold is not None and duration > self.slow_threshold:
+            logger.warning(
+                'Slow cleaner "%s" cleaning "%s" of "%s" took %.3fs '
+                '(value size: %s)',
+                identity[2], identity[1], identity[0], duration,
+                get_value_size(field_value)
+            )
+
+    def is_skipped(self, identity):
+        """Determine whether a cleaner is skipped after exceeding the cleaner
+        budget, logging each skipped call.
+
+        Args:
+            identity (tuple): the model label, field name and cleaner name
+
+        Return:
+            bool
+        """
+        skipped_until = self.skipped_cleaners.get(identity)
+        if skipped_until is None:
+            return False
+        remaining = skipped_until - default_timer()
+        if remaining <= 0:
+            del self.skipped_cleaners[identity]
+            return False
+        logger.warning(
+            'Cleaner "%s" cleaning "%s" of "%s" skipped for another %.3fs, '
+            'since it exceeded the cleaner time budget',
+            identity[2], identity[1], identity[0], remaining
+        )
+        return True
+
+    def start_save(self, instance):
+        """Start the clock of a save, unless it is already started.
+
+        Args:
+            instance (django.db.models.Model): the model instance being saved
+
+        Return:
+            bool, True if the clock was started, in which case the caller
+            must call `end_save` once the save is cleaned
+        """
+        if self.save is None or SAVE_CLOCK_ATTRIBUTE in instance.__dict__:
+            return False
+        instance.__dict__[SAVE_CLOCK_ATTRIBUTE] = _SaveClock()
+        return True
+
+    def end_save(self, instance):
+        """Stop the clock of a save started with `start_save`."""
+        instance.__dict__.pop(SAVE_CLOCK_ATTRIBUTE, None)
+
+    def allows(self, instance, identity):
+        """Apply the save budget before running a cleaner, and skip the
+        cleaners cooling down after exceeding the cleaner budget.
+
+        Args:
+            instance (django.db.models.Model): the model instance being saved
+            identity (tuple): the model label, field name and cleaner name
+
+        Raise:
+            CleanFieldsBudgetError: if the save exceeds its budget and the
+                action is RAISE
+
+        Return:
+            bool, False if the cleaner should be skipped
+        """
+        if self.skipped_cleaners and self.is_skipped(identity):
+            return False
+        clock = instance.__dict__.get(SAVE_CLOCK_ATTRIBUTE)
+        if clock is None or self.save is None:
+            return True
+        elapsed = default_timer() - clock.start
+        if elapsed <= self.save:
+            return True
+        if self.action == RAISE:
+            raise CleanFieldsBudgetError(
+                *identity + ('save', self.save, elapsed)
+            )
+        if self.action == LOG and clock.reported:
+            return True
+        clock.reported = True
+        logger.warning(
+            'Saving "%s" exceeded the save time budget of %.3fs (%.3fs) '
+            'before cleaner "%s" cleaning "%s"%s',
+            identity[0], self.save, elapsed, identity[2], identity[1],
+            '; skipped' if self.action == SKIP else ''
+        )
+        return self.action != SKIP
+
+    def _exceed_call(self, identity, field_value, duration):
+        """Take the configured action for a call exceeding the cleaner budget.
+        """
+        if self.action == RAISE:
+            raise CleanFieldsBudgetError(
+                *identity + ('cleaner', self.cleaner, duration)
+            )
+        skipped = self.action == SKIP and self.skip_cooldown is not None
+        logger.warning(
+            'Cleaner "%s" cleaning "%s" of "%s" exceeded the cleaner time '
+            'budget of %.3fs (%.3fs, value size: %s)%s',
+            identity[2], identity[1], identity[0], self.cleaner, duration,
+            get_value_size(field_value),
+            '; skipped for %.3fs' % self.skip_cooldown if skipped else ''
+        )
+        if skipped:
+            self.skipped_cleaners[identity] = (
+                default_timer() + self.skip_cooldown
+            )
+
+
+class _SaveClock(object):
+    """The start time of a save, and whether its overrun was reported."""
+
+    def __init__(self):
+        self.start = default_timer()
+        self.reported = False
+
+
+def get_value_size(value):
+    """Return the length of value, or None if it has none."""
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+budget = TimeBudget()
+
+
+def set_time_budgets(cleaner=None, save=None, slow_threshold=None,
+                     action=LOG, skip_cooldown=None):
+    """Configure the time budgets applied to every cleaner.
+
+    See `TimeBudget`.
+    """
+    budget.configure(cleaner, save, slow_threshold, action, skip_cooldown)
+
+
+def clear_time_budgets():
+    """Disable all time budgets; cleaners are then called without overhead."""
+    set_time_budgets()
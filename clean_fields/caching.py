@@ -0,0 +1,262 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import pickle
+from collections import namedtuple, OrderedDict
+from threading import Lock
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+
+DEFAULT_CACHE_SIZE = 128
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):
+    """A bounded cache of cleaned values, keyed by the uncleaned value.
+
+    Once the cache holds `maxsize` entries, the least recently used entry is
+    evicted to make room for a new one. Values that cannot be hashed are never
+    cached. The cache may be shared among threads.
+
+    Args:
+        maxsize (int): the maximum number of cleaned values to keep
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def call(self, value, cleaner, *args):
+        """Return the cached result for value, calling cleaner if there is
+        none.
+
+        Args:
+            value: the uncleaned value, used as the cache key
+            cleaner (callable): the callable computing the cleaned value
+            *args: arguments to pass to cleaner
+
+        Return:
+            The cleaned value
+        """
+        key = self._make_key(value)
+        if key is None:
+            return cleaner(*args)
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                cleaned_value = self._data.pop(key)
+                self._data[key] = cleaned_value
+                return cleaned_value
+            self.misses += 1
+        cleaned_value = cleaner(*args)
+        self.put(value, cleaned_value)
+        return cleaned_value
+
+    def get_many(self, values):
+        """Look up the cached results for many values at once.
+
+        Args:
+            values (list): the uncleaned values
+
+        Return:
+            dict mapping the positions of cached values to their results
+        """
+        found = {}
+        with self._lock:
+            for position, value in enumerate(values):
+                key = self._make_key(value)
+                if key is not None and key in self._data:
+                    self.hits += 1
+                    found[position] = self._data.pop(key)
+                    self._data[key] = found[position]
+                else:
+                    self.misses += 1
+        return found
+
+    def put(self, value, cleaned_value):
+        """Store the cleaned result of a value, evicting the least recently
+        used entry if the cache is full.
+        """
+        key = self._make_key(value)
+        if key is None or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = cleaned_value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def put_many(self, values, cleaned_values):
+        """Store the cleaned results of many values at once."""
+        for value, cleaned_value in zip(values, cleaned_values):
+            self.put(value, cleaned_value)
+
+    def info(self):
+        """Return the hit and miss counts, the maximum and the current size.
+
+        Return:
+            CacheInfo
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self):
+        """Remove all cached values and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def _make_key(value):
+        return get_value_key(value)
+
+
+def get_value_key(value):
+    """Return a key identifying value in a dictionary of cleaned values.
+
+    The key includes the type, so that equal values of different types (such
+    as 1, 1.0 and True) are cleaned separately.
+
+    Return:
+        tuple, or None if value cannot be hashed
+    """
+    key = (type(value), value)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class SharedCache(object):
+    """A cache of cleaned values stored in one of Django's caches.
+
+    Unlike LRUCache, results are shared by every process using the same cache
+    backend (memcached, Redis, the database or the file system, for instance),
+    and survive restarts. Keys are derived from the cleaner's identity and a
+    hash of the pickled uncleaned value; values that cannot be pickled are
+    never cached. Changing the version discards the results of previous
+    versions, for instance once the cleaner's logic changes.
+
+    Args:
+        alias (str): the name of the cache in the CACHES setting
+        identity (str): uniquely identifies the cleaner among all cleaners
+            sharing the cache
+        version (int): the version of the cleaner's results
+        timeout (int): seconds before a result expires. Defaults to the
+            cache's own default timeout; None means results never expire.
+    """
+
+    def __init__(self, alias, identity, version=1, timeout=DEFAULT_TIMEOUT):
+        self.alias = alias
+        self.identity = identity
+        self.version = version
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._prefix = 'clean_fields:{}:'.format(
+            hashlib.sha1(identity.encode('utf-8')).hexdigest()
+        )
+        self._lock = Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def call(self, value, cleaner, *args):
+        """Return the cached result for value, calling cleaner if there is
+        none.
+
+        Args:
+            value: the uncleaned value, used as the cache key
+            cleaner (callable): the callable computing the cleaned value
+            *args: arguments to pass to cleaner
+
+        Return:
+            The cleaned value
+        """
+        found = self.get_many([value])
+        if found:
+            return found[0]
+        cleaned_value = cleaner(*args)
+        self.put(value, cleaned_value)
+        return cleaned_value
+
+    def get_many(self, values):
+        """Look up the cached results for many values, in a single request.
+
+        Args:
+            values (list): the uncleaned values
+
+        Return:
+            dict mapping the positions of cached values to their results
+        """
+        keys = [self._make_key(value) for value in values]
+        cached = self.cache.get_many(
+            set(key for key in keys if key is not None),
+            version=self.version
+        )
+        found = dict(
+            (position, cached[key]) for position, key in enumerate(keys)
+            if key in cached
+        )
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(values) - len(found)
+        return found
+
+    def put(self, value, cleaned_value):
+        """Store the cleaned result of a value."""
+        self.put_many([value], [cleaned_value])
+
+    def put_many(self, values, cleaned_values):
+        """Store the cleaned results of many values, in a single request."""
+        data = {}
+        for value, cleaned_value in zip(values, cleaned_values):
+            key = self._make_key(value)
+            if key is not None:
+                data[key] = cleaned_value
+        if data:
+            self.cache.set_many(
+                data, timeout=self.timeout, version=self.version
+            )
+
+    def info(self):
+        """Return this process' hit and miss counts.
+
+        The size of a shared cache is unknown, so `maxsize` and `currsize`
+        are None.
+
+        Return:
+            CacheInfo
+        """
+        return CacheInfo(self.hits, self.misses, None, None)
+
+    def clear(self):
+        """Reset this process' counters.
+
+        Shared results are left in place, since other processes may use them;
+        change the version to discard them.
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _make_key(self, value):
+        try:
+            pickled_value = pickle.dumps(value, protocol=2)
+        except Exception:
+            return None
+        return self._prefix + hashlib.sha256(pickled_value).hexdigest()
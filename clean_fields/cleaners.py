@@ -0,0 +1,547 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import inspect
+import re
+
+from clean_fields.budgets import budget
+from clean_fields.caching import get_value_key
+from clean_fields.exc import (
+    CleanFieldsBatchError, CleanFieldsConfigurationError
+)
+from clean_fields.metrics import collector
+from clean_fields.utils import (
+    FieldContext, get_changed_field_names, get_model_field_value
+)
+
+
+class FieldCleaner(object):
+    """Binds a cleaner callable to the model field it cleans.
+
+    Args:
+        model_label (str): label of the model to clean, following the
+            convention `app_name.ModelName`
+        field_name (str): name of the field to clean
+        cleaner_function (callable): the callable that accepts the current
+            field value and returns the cleaned value
+        depends_on (iterable of str): names of other fields that the cleaner
+            reads. The registry runs the cleaner after those of these fields.
+            When saving with `update_fields`, the cleaner also runs if any of
+            these fields is saved.
+        changed_only (bool): if True, skip instances for which neither the
+            field nor its dependencies changed since the instance was loaded.
+            This requires a field snapshot (see
+            `clean_fields.models.FieldSnapshotMixin`); instances without one
+            are always cleaned.
+        order (int): position of the cleaner among those registered for the
+            same model. Cleaners with lower values run first; cleaners with
+            equal values run in registration order.
+        cache (clean_fields.caching.LRUCache): if given, the cleaner is
+            assumed to be a pure function of the field value, and its results
+            are cached by value
+        io_bound (bool): if True, the cleaner spends most of its time waiting
+            (on a network service, for instance) and reads no other field, so
+            it may run concurrently with other I/O-bound cleaners
+        when (callable): if given, a cheap predicate accepting the model
+            instance. The cleaner is skipped for instances for which it
+            returns a falsy value, without marshalling the cleaner's
+            arguments.
+    """
+
+    def __init__(self, model_label, field_name, cleaner_function,
+                 depends_on=None, changed_only=False, order=0, cache=None,
+                 io_bound=False, when=None):
+        self.model_label = model_label
+        self.field_name = field_name
+        self.cleaner_function = cleaner_function
+        self.depends_on = frozenset(depends_on or ())
+        self.changed_only = changed_only
+        self.order = order
+        self.cache = cache
+        self.io_bound = io_bound
+        self.when = when
+        self._invokers = {}
+
+    def __repr__(self):
+        return '<{cls}: {model}.{field} cleaned by {cleaner}>'.format(
+            cls=self.__class__.__name__,
+            model=self.model_label,
+            field=self.field_name,
+            cleaner=self.cleaner_name,
+        )
+
+    def __reduce__(self):
+        # Registered cleaners are pickled by reference, and looked up in the
+        # registry when unpickled (in a worker process, for instance).
+        from clean_fields.registry import get_registered_cleaner
+        return (get_registered_cleaner, (self.field_ref, self.cleaner_name))
+
+    @property
+    def field_ref(self):
+        """The reference of the cleaned field, following the convention
+        `app_name.ModelName.field_name`
+        """
+        return '.'.join([self.model_label, self.field_name])
+
+    @property
+    def identity(self):
+        """The model label, field name and cleaner name, identifying the
+        cleaner in metrics and logs
+        """
+        return (self.model_label, self.field_name, self.cleaner_name)
+
+    @property
+    def cleaner_name(self):
+        return getattr(
+            self.cleaner_function,
+            '__name__',
+            repr(self.cleaner_function)
+        )
+
+    def invoke(self, instance, args):
+        """Call the cleaner_function with the given arguments.
+
+        The calling convention of the cleaner_function is determined the
+        first time it is invoked for a model class (see
+        `resolve_calling_convention`) and reused afterwards.
+
+        Args:
+            instance (django.db.models.Model): the model instance being cleaned
+            args (list): arguments to pass to the cleaner_function
+
+        Return:
+            The return value of cleaner_function
+        """
+        model = type(instance)
+        try:
+            invoker = self._invokers[model]
+        except KeyError:
+            invoker = resolve_calling_convention(self.cleaner_function, model)
+            self._invokers[model] = invoker
+        return invoker(instance, args)
+
+    def call(self, instance, args):
+        """Call the cleaner_function, waiting for the result of asynchronous
+        cleaners.
+
+        Args:
+            instance (django.db.models.Model): the model instance being cleaned
+            args (list): arguments to pass to the cleaner_function
+
+        Return:
+            The cleaned value
+        """
+        if collector.enabled:
+            return collector.call(
+                self.model_label,
+                self.field_name,
+                self.cleaner_name,
+                self._invoke_and_resolve,
+                instance,
+                args
+            )
+        return resolve_awaitable(self.invoke(instance, args))
+
+    def _invoke_and_resolve(self, instance, args):
+        return resolve_awaitable(self.invoke(instance, args))
+
+    def should_clean(self, update_fields=None):
+        """Determine whether the cleaner must run when saving update_fields.
+
+        Args:
+            update_fields (iterable of str): names of the fields being saved,
+                or None if all fields are saved
+
+        Return:
+            bool
+        """
+        if update_fields is None:
+            return True
+        return (
+            self.field_name in update_fields or
+            not self.depends_on.isdisjoint(update_fields)
+        )
+
+    def clean(self, instance, context=None):
+        """Run the cleaner_function on instance's field
+
+        Args:
+            instance (django.db.models.Model): the model instance to clean
+            context (clean_fields.utils.FieldContext): unused; accepted so all
+                cleaners can be invoked alike
+        """
+        if self._is_skipped(instance):
+            return
+        field_value = self._get_field_value(instance)
+        setattr(
+            instance,
+            self.field_name,
+            self.clean_value(instance, field_value)
+        )
+
+    def clean_value(self, instance, field_value):
+        """Return the cleaned version of field_value, without assigning it.
+
+        Args:
+            instance (django.db.models.Model): the model instance being cleaned
+            field_value: the value to clean
+
+        Return:
+            The cleaned value, or field_value if the cleaner exceeded its
+            time budget before and is skipped (see `clean_fields.budgets`)
+        """
+        if budget.enabled:
+            return budget.call(
+                self.identity,
+                field_value,
+                self._clean_value,
+                instance,
+                field_value
+            )
+        return self._clean_value(instance, field_value)
+
+    def _clean_value(self, instance, field_value):
+        if self.cache is None:
+            return self.call(instance, [field_value])
+        return self.cache.call(field_value, self.call, instance, [field_value])
+
+    def clean_batch(self, instances):
+        """Run the cleaner_function on the field of each of the instances
+
+        The cached results of pure cleaners are looked up for the whole batch
+        at once, and new results are stored at once: a cache shared through
+        Django's cache framework takes a request for each, rather than two
+        per instance. Repeated values are only cleaned once.
+        """
+        if self.cache is None:
+            for instance in instances:
+                self.clean(instance)
+            return
+
+        instances = [obj for obj in instances if not self._is_skipped(obj)]
+        if not instances:
+            return
+        field_values = [self._get_field_value(obj) for obj in instances]
+        cached_values = self.cache.get_many(field_values)
+        new_values = {}
+        uncached_values = []
+        for position, instance in enumerate(instances):
+            if budget.enabled and budget.is_skipped(self.identity):
+                # The cleaner exceeded its time budget (see
+                # `clean_fields.budgets`): leave the remaining values as they
+                # are.
+                break
+            field_value = field_values[position]
+            key = get_value_key(field_value)
+            if position in cached_values:
+                cleaned_value = cached_values[position]
+            elif key is not None and key in new_values:
+                cleaned_value = new_values[key]
+            else:
+                cleaned_value = self._clean_uncached_value(
+                    instance, field_value
+                )
+                if key is not None:
+                    new_values[key] = cleaned_value
+                uncached_values.append((field_value, cleaned_value))
+            setattr(instance, self.field_name, cleaned_value)
+        if uncached_values:
+            self.cache.put_many(*zip(*uncached_values))
+
+    def _clean_uncached_value(self, instance, field_value):
+        """Call the cleaner_function within its time budget, bypassing its
+        cache.
+        """
+        if budget.enabled:
+            return budget.call(
+                self.identity,
+                field_value,
+                self.call,
+                instance,
+                [field_value]
+            )
+        return self.call(instance, [field_value])
+
+    def _is_skipped(self, instance):
+        """Determine whether cleaning instance can be skipped, as its guard
+        predicate fails or its field and dependencies are unchanged.
+        """
+        return not self._passes_guard(instance) or \
+            self._is_unchanged(instance)
+
+    def _passes_guard(self, instance):
+        """Evaluate the `when` predicate, if any, for instance."""
+        return self.when is None or bool(self.when(instance))
+
+    def _is_unchanged(self, instance):
+        """Determine whether cleaning instance can be skipped, as neither the
+        field nor its dependencies changed since the last field snapshot.
+        """
+        if not self.changed_only:
+            return False
+        changed_names = get_changed_field_names(instance)
+        return changed_names is not None and not self.should_clean(
+            changed_names
+        )
+
+    def _get_field_value(self, instance):
+        """Retrieve the cleaned field's value from instance.
+
+        Raise:
+            CleanFieldsConfigurationError: if the field does not exist
+        """
+        try:
+            return get_model_field_value(instance, self.field_name)
+        except AttributeError:
+            raise CleanFieldsConfigurationError(
+                self.model_label,
+                self.field_name,
+                self.cleaner_name
+            )
+
+
+class BatchFieldCleaner(FieldCleaner):
+    """Binds a cleaner callable that cleans the field values of many model
+    instances at once.
+
+    The cleaner_function accepts a list of field values and returns a
+    sequence of cleaned values in the same order. On a single save, it
+    receives a batch of one.
+    """
+
+    def clean(self, instance, context=None):
+        """Run the cleaner_function on instance's field"""
+        self.clean_batch([instance])
+
+    def clean_value(self, instance, field_value):
+        """Return the cleaned version of field_value, cleaned as a batch of
+        one, without assigning it.
+        """
+        return self._clean_values_within_budget(instance, [field_value])[0]
+
+    def clean_batch(self, instances):
+        """Run the cleaner_function once over the field values of instances"""
+        instances = [obj for obj in instances if not self._is_skipped(obj)]
+        if not instances:
+            return
+        field_values = [self._get_field_value(obj) for obj in instances]
+        cleaned_values = self._clean_values_within_budget(
+            instances[0], field_values
+        )
+        for instance, cleaned_value in zip(instances, cleaned_values):
+            setattr(instance, self.field_name, cleaned_value)
+
+    def _clean_values_within_budget(self, instance, field_values):
+        """Clean a list of field values, leaving them as they are if the
+        cleaner exceeded its time budget before and is skipped.
+        """
+        if budget.enabled:
+            return budget.call(
+                self.identity,
+                field_values,
+                self._clean_values,
+                instance,
+                field_values
+            )
+        return self._clean_values(instance, field_values)
+
+    def _clean_values(self, instance, field_values):
+        """Clean a list of field values, only passing those without a cached
+        result to the cleaner_function.
+
+        Raise:
+            CleanFieldsBatchError: if the cleaner_function returns the wrong
+                number of values
+        """
+        cached_values = {}
+        if self.cache is not None:
+            cached_values = self.cache.get_many(field_values)
+        uncached_values = [
+            value for position, value in enumerate(field_values)
+            if position not in cached_values
+        ]
+        if uncached_values:
+            new_values = list(self.call(instance, [uncached_values]))
+        else:
+            new_values = []
+        if len(new_values) != len(uncached_values):
+            raise CleanFieldsBatchError(
+                self.cleaner_name,
+                len(uncached_values),
+                len(new_values)
+            )
+
+        if self.cache is not None and uncached_values:
+            self.cache.put_many(uncached_values, new_values)
+
+        new_values = iter(new_values)
+        cleaned_values = []
+        for position, value in enumerate(field_values):
+            if position in cached_values:
+                cleaned_values.append(cached_values[position])
+            else:
+                cleaned_values.append(next(new_values))
+        return cleaned_values
+
+
+class ContextFieldCleaner(FieldCleaner):
+    """Binds a cleaner callable that also requires the values of all other
+    fields on the model instance.
+    """
+
+    def clean(self, instance, context=None):
+        """Run the cleaner_function on instance's field, passing along a
+        read-only mapping of the instance's field values.
+
+        Args:
+            instance (django.db.models.Model): the model instance to clean
+            context (clean_fields.utils.FieldContext): the mapping of the
+                instance's field values, if it is shared among cleaners
+        """
+        if self._is_skipped(instance):
+            return
+        if context is None:
+            context = FieldContext(instance)
+        try:
+            field_value = context[self.field_name]
+        except KeyError:
+            raise CleanFieldsConfigurationError(
+                self.model_label,
+                self.field_name,
+                self.cleaner_name
+            )
+
+        if budget.enabled:
+            cleaned_value = budget.call(
+                self.identity,
+                field_value,
+                self.call,
+                instance,
+                [field_value, context]
+            )
+        else:
+            cleaned_value = self.call(instance, [field_value, context])
+        setattr(instance, self.field_name, cleaned_value)
+
+
+def resolve_awaitable(value):
+    """Return the result of value if it is awaitable, or value otherwise.
+
+    Coroutine functions may be used as cleaners. When they are invoked from
+    synchronous code (such as `Model.save()`), their result is awaited in an
+    event loop through `asgiref.sync.async_to_sync`.
+
+    Args:
+        value: the value returned by a cleaner
+
+    Return:
+        The cleaned value
+    """
+    isawaitable = getattr(inspect, 'isawaitable', None)
+    if isawaitable is None or not isawaitable(value):
+        return value
+    from clean_fields.aio import wait_for
+    return wait_for(value)
+
+
+def call_and_resolve(cleaner_callable, *args):
+    """Call cleaner_callable and resolve its result if it is awaitable."""
+    return resolve_awaitable(cleaner_callable(*args))
+
+
+def resolve_calling_convention(cleaner_callable, model):
+    """Determine how to invoke cleaner_callable for instances of model.
+
+    The cleaner_callable is looked up by name on the model class (and its
+    parents). If the attribute found there wraps cleaner_callable, its type
+    determines the calling convention:
+        - a staticmethod is called with the arguments only
+        - a classmethod is called with the instance's class first
+        - any other function is called with the instance first
+    If the attribute does not wrap cleaner_callable (for instance, because an
+    outer decorator did not use `functools.wraps`), the attribute is looked
+    up on the instance and called with the arguments, as a bound method.
+    Without such an attribute, cleaner_callable is an independent function,
+    called with the arguments only.
+
+    Args:
+        cleaner_callable (callable): the method/function to invoke
+        model (django.db.models.Model): the model class whose instances are
+            cleaned
+
+    Return:
+        callable accepting the model instance and the list of arguments
+    """
+    name = getattr(cleaner_callable, '__name__', None)
+    attribute = None
+    for klass in model.__mro__:
+        if name in vars(klass):
+            attribute = vars(klass)[name]
+            break
+
+    if attribute is None:
+        return lambda instance, args: cleaner_callable(*args)
+    if not _wraps_callable(attribute, cleaner_callable):
+        return lambda instance, args: getattr(instance, name)(*args)
+    if isinstance(attribute, staticmethod):
+        return lambda instance, args: cleaner_callable(*args)
+    if isinstance(attribute, classmethod):
+        return lambda instance, args: cleaner_callable(type(instance), *args)
+    return lambda instance, args: cleaner_callable(instance, *args)
+
+
+def _wraps_callable(attribute, cleaner_callable):
+    """Determine whether a class attribute is, or wraps, cleaner_callable."""
+    function = getattr(attribute, '__func__', attribute)
+    while function is not None:
+        if function is cleaner_callable:
+            return True
+        function = getattr(function, '__wrapped__', None)
+    return False
+
+
+def call_cleaner(cleaner_callable, args, instance):
+    """Invokes the cleaner_callable with given arguments.
+
+    Unlike `FieldCleaner.invoke`, this function determines the calling
+    convention anew on each call, relying on the message of any TypeError.
+
+    The cleaner_callable could be of many types: an instance method, a static
+    method, a class method, or a function. This function tries to address these
+    in the following order:
+        - callable is an method bound to instance
+        - callable is bound to instance with an already-run inner decorator
+        - callable is an independent function
+
+    Args:
+        cleaner_callable (callable): method/function to invoke
+        args (list): list of arguments to be passed to cleaner_callable
+        instance (model instance): model instance for which this cleaner should
+            be called
+
+    Return:
+        The return value of cleaner_callable
+    """
+    # First, try to invoke a method on instance with the same name as
+    # cleaner_callable. This will handle the case in which cleaner_callable is
+    # an instance method.
+    field_cleaner = getattr(instance, cleaner_callable.__name__, None)
+    if field_cleaner is not None:
+        cleaned_value = field_cleaner(*args)
+    else:
+        # In case cleaner_callable is a wrapper to a callable bound to
+        # instance, invoke it with instance as the first argument
+        try:
+            cleaned_value = cleaner_callable(instance, *args)
+        except TypeError as e:
+            # Except in the case of legitimate TypeErrors raised from within
+            # cleaner_callable, invoke the callable as an independent function
+            if not re.search(
+                r'takes( exactly)? \d( positional)? arguments?',
+                str(e)
+            ):
+                raise e
+            cleaned_value = cleaner_callable(*args)
+    return cleaned_value
@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from functools import partial
+from threading import Lock
+
+from django.conf import settings
+
+
+DEFAULT_MAX_WORKERS = 8
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    """Return the thread pool shared by all I/O-bound cleaners.
+
+    The pool is created on first use. Its size is read from the
+    `CLEAN_FIELDS_MAX_WORKERS` setting, if defined.
+
+    Return:
+        concurrent.futures.Executor
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(
+                        settings,
+                        'CLEAN_FIELDS_MAX_WORKERS',
+                        DEFAULT_MAX_WORKERS
+                    )
+                )
+    return _executor
+
+
+def set_executor(executor):
+    """Replace the executor shared by all I/O-bound cleaners.
+
+    The previous executor, if any, is not shut down.
+
+    Args:
+        executor (concurrent.futures.Executor): the new executor, or None to
+            create a default thread pool on next use
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def run_concurrently(tasks):
+    """Run callables on the shared executor and wait for all their results.
+
+    Should any callable raise an exception, the first one (in the order of
+    tasks) is raised once all callables have completed.
+
+    Args:
+        tasks (list of callable): callables accepting no arguments
+
+    Return:
+        list of the callables' return values, in the same order
+    """
+    if len(tasks) == 1:
+        return [tasks[0]()]
+    executor = get_executor()
+    futures = [executor.submit(task) for task in tasks]
+    for future in futures:
+        future.exception()
+    return [future.result() for future in futures]
+
+
+def clean_fields_concurrently(instance, field_steps):
+    """Clean several fields of an instance concurrently on the shared executor.
+
+    Each field's cleaning steps run in turn, in the same task. Results are
+    assigned to the instance once all fields are cleaned.
+
+    Args:
+        instance (django.db.models.Model): the model instance to clean
+        field_steps (list of tuple): pairs of a field name and a callable
+            accepting the field's current value and returning the cleaned one
+    """
+    steps_by_field = OrderedDict()
+    for field_name, step in field_steps:
+        steps_by_field.setdefault(field_name, []).append(step)
+    tasks = [
+        partial(_run_steps, getattr(instance, field_name), steps)
+        for field_name, steps in steps_by_field.items()
+    ]
+    cleaned_values = run_concurrently(tasks)
+    for field_name, cleaned_value in zip(steps_by_field, cleaned_values):
+        setattr(instance, field_name, cleaned_value)
+
+
+def _run_steps(field_value, steps):
+    for step in steps:
+        field_value = step(field_value)
+    return field_value
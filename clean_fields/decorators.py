@@ -3,95 +3,213 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import re
+from functools import wraps
 
-from django.db.models.signals import pre_save
-from django.dispatch import receiver
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 
-from clean_fields.exc import CleanFieldsConfigurationError
-from clean_fields.utils import (
-    get_model_field_names, get_model_field_value, parse_field_ref
+from clean_fields.caching import DEFAULT_CACHE_SIZE, LRUCache, SharedCache
+from clean_fields.cleaners import (  # noqa: F401
+    BatchFieldCleaner, ContextFieldCleaner, FieldCleaner, call_cleaner
 )
+from clean_fields.registry import registry
+from clean_fields.utils import parse_field_ref
 
 
-def cleans_field(field_ref):
+def cleans_field(field_ref, depends_on=None, changed_only=False, order=0,
+                 pure=False, cache_size=None, io_bound=False,
+                 cache_alias=None, cache_version=1,
+                 cache_timeout=DEFAULT_TIMEOUT, when=None):
     """Decorator to registers a field cleaning methods on the pre_save signal.
 
     Args:
         field_ref (str): a label for the model field to clean, following the
             convention `app_name.ModelName.field_name`
+        depends_on (iterable of str): names of other fields the cleaner reads.
+            The cleaner runs after the cleaners of these fields. When saving
+            with `update_fields`, it runs only if its own field or one of
+            these fields is saved.
+        changed_only (bool): if True, only run the cleaner when its field or
+            one of its dependencies changed since the instance was loaded.
+            The model must inherit `clean_fields.models.FieldSnapshotMixin`.
+        order (int): position of the cleaner among all cleaners registered
+            for the model; lower values run first
+        pure (bool): if True, the cleaner's result depends only on the field
+            value, so results are cached by value
+        cache_size (int): the maximum number of cached results, evicting the
+            least recently used ones first. Setting it implies `pure=True`.
+        io_bound (bool): if True, the cleaner mostly waits on external
+            resources and reads no other field. Such cleaners run
+            concurrently on a shared thread pool (see
+            `clean_fields.concurrency`) before the model's other cleaners.
+        cache_alias (str): the name of a cache in the CACHES setting. If
+            given, results are cached there and shared by all processes,
+            instead of in a cache local to this process (see
+            `clean_fields.caching.SharedCache`). Setting it implies
+            `pure=True`.
+        cache_version (int): the version of the shared results; increment it
+            when the cleaner's output changes
+        cache_timeout (int): seconds before a shared result expires,
+            defaulting to the cache's own default timeout
+        when (callable): if given, a predicate accepting the model instance.
+            The cleaner only runs for instances for which it returns a truthy
+            value, so skipped cleaners cost a single cheap check.
     """
     model_label, field_name = parse_field_ref(field_ref)
 
     def _clean_wrapper(cleaner_function):
-        # Register a pre-save signal handler that calls the cleaner_function
-        # on a model instance, and assigns the result to the instance's field.
-        @receiver(pre_save, sender=model_label, weak=False)
-        def signal_handler(sender, instance, **kwargs):
-            """Run the cleaner_function on instance's field"""
-            try:
-                field_value = get_model_field_value(instance, field_name)
-            except AttributeError:
-                raise CleanFieldsConfigurationError(
-                    model_label,
-                    field_name,
-                    cleaner_function.__name__
-                )
-
-            cleaned_value = call_cleaner(
-                cleaner_function,
-                [field_value],
-                instance
-            )
-            setattr(instance, field_name, cleaned_value)
+        cache = _make_cache(
+            pure, cache_size, cache_alias, cache_version, cache_timeout,
+            field_ref, cleaner_function
+        )
+
+        # Register the cleaner_function with the model's pre_save receiver,
+        # which assigns its result to the instance's field.
+        registry.register(FieldCleaner(
+            model_label,
+            field_name,
+            cleaner_function,
+            depends_on=depends_on,
+            changed_only=changed_only,
+            order=order,
+            cache=cache,
+            io_bound=io_bound,
+            when=when
+        ))
 
         # To ensure the wrapped method can still be invoked, define an
         # additional function that executes the method with the given arguments
         # and returns the result. This function is what the decorator returns.
+        @wraps(cleaner_function)
         def _run_cleaner(*args, **kwargs):
             return cleaner_function(*args, **kwargs)
 
+        if cache is not None:
+            _run_cleaner.cache_info = cache.info
+            _run_cleaner.cache_clear = cache.clear
         return _run_cleaner
     return _clean_wrapper
 
 
-def cleans_field_with_context(field_ref):
+def cleans_field_batch(field_ref, depends_on=None, changed_only=False,
+                       order=0, pure=False, cache_size=None, io_bound=False,
+                       cache_alias=None, cache_version=1,
+                       cache_timeout=DEFAULT_TIMEOUT, when=None):
+    """Decorator to register field cleaning callables that clean many values
+    at once.
+
+    The decorated callable must accept a list of field values and return a
+    sequence of cleaned values in the same order. Bulk operations (see
+    `clean_fields.managers`) pass it the values of a whole batch; a single
+    save passes it a batch of one. Since a batch spans many instances, such
+    callables are best defined as functions, staticmethods or classmethods.
+
+    Args:
+        field_ref (str): a label for the model field to clean, following the
+            convention `app_name.ModelName.field_name`
+        depends_on (iterable of str): names of other fields the cleaner reads.
+            The cleaner runs after the cleaners of these fields. When saving
+            with `update_fields`, it runs only if its own field or one of
+            these fields is saved.
+        changed_only (bool): if True, only run the cleaner when its field or
+            one of its dependencies changed since the instance was loaded.
+            The model must inherit `clean_fields.models.FieldSnapshotMixin`.
+        order (int): position of the cleaner among all cleaners registered
+            for the model; lower values run first
+        pure (bool): if True, the cleaner's result depends only on the field
+            value, so results are cached by value
+        cache_size (int): the maximum number of cached results, evicting the
+            least recently used ones first. Setting it implies `pure=True`.
+        io_bound (bool): if True, the cleaner mostly waits on external
+            resources and reads no other field. Such cleaners run
+            concurrently on a shared thread pool (see
+            `clean_fields.concurrency`) before the model's other cleaners.
+        cache_alias (str): the name of a cache in the CACHES setting. If
+            given, results are cached there and shared by all processes,
+            instead of in a cache local to this process (see
+            `clean_fields.caching.SharedCache`). Setting it implies
+            `pure=True`.
+        cache_version (int): the version of the shared results; increment it
+            when the cleaner's output changes
+        cache_timeout (int): seconds before a shared result expires,
+            defaulting to the cache's own default timeout
+        when (callable): if given, a predicate accepting the model instance.
+            The cleaner only runs for instances for which it returns a truthy
+            value, so skipped cleaners cost a single cheap check.
+    """
+    model_label, field_name = parse_field_ref(field_ref)
+
+    def _clean_batch_wrapper(cleaner_function):
+        cache = _make_cache(
+            pure, cache_size, cache_alias, cache_version, cache_timeout,
+            field_ref, cleaner_function
+        )
+
+        # Register the cleaner_function with the model's pre_save receiver,
+        # which passes it a batch containing only the saved instance's value.
+        registry.register(BatchFieldCleaner(
+            model_label,
+            field_name,
+            cleaner_function,
+            depends_on=depends_on,
+            changed_only=changed_only,
+            order=order,
+            cache=cache,
+            io_bound=io_bound,
+            when=when
+        ))
+
+        # Define an additional wrapper to execute cleaner_function with
+        # given arguments. This ensures the wrapped method can still be called.
+        @wraps(cleaner_function)
+        def _run_batch_cleaner(*args, **kwargs):
+            return cleaner_function(*args, **kwargs)
+
+        if cache is not None:
+            _run_batch_cleaner.cache_info = cache.info
+            _run_batch_cleaner.cache_clear = cache.clear
+        return _run_batch_cleaner
+    return _clean_batch_wrapper
+
+
+def cleans_field_with_context(field_ref, depends_on=None,
+                              changed_only=False, order=0, when=None):
     """Decorator to register field cleaning methods that require additional
     field values as parameters on the pre_save signal.
 
     Args:
         field_ref (str): a label for the model field to clean, following the
             convention `app_name.ModelName.field_name`
+        depends_on (iterable of str): names of other fields the cleaner reads.
+            The cleaner runs after the cleaners of these fields. When saving
+            with `update_fields`, it runs only if its own field or one of
+            these fields is saved.
+        changed_only (bool): if True, only run the cleaner when its field or
+            one of its dependencies changed since the instance was loaded.
+            The model must inherit `clean_fields.models.FieldSnapshotMixin`.
+        order (int): position of the cleaner among all cleaners registered
+            for the model; lower values run first
+        when (callable): if given, a predicate accepting the model instance.
+            The cleaner only runs for instances for which it returns a truthy
+            value, so skipped cleaners cost a single cheap check.
     """
     model_label, field_name = parse_field_ref(field_ref)
 
     def _clean_with_context_wrapper(cleaner_function):
-        # Register a pre-save signal handler that calls the cleaner_function
-        # on a model instance, and assigns the result to the instance's field.
-        @receiver(pre_save, sender=model_label, weak=False)
-        def signal_handler(sender, instance, **kwargs):
-            # Collect all the model instance's field values in a dictionary
-            context = {}
-            for name in get_model_field_names(instance):
-                context[name] = get_model_field_value(instance, name)
-            try:
-                field_value = context[field_name]
-            except KeyError:
-                raise CleanFieldsConfigurationError(
-                    model_label,
-                    field_name,
-                    cleaner_function.__name__
-                )
-
-            cleaned_value = call_cleaner(
-                cleaner_function,
-                [field_value, context],
-                instance
-            )
-            setattr(instance, field_name, cleaned_value)
+        # Register the cleaner_function with the model's pre_save receiver,
+        # which assigns its result to the instance's field.
+        registry.register(ContextFieldCleaner(
+            model_label,
+            field_name,
+            cleaner_function,
+            depends_on=depends_on,
+            changed_only=changed_only,
+            order=order,
+            when=when
+        ))
 
         # Define an additional wrapper to execute cleaner_function with
         # given arguments. This ensures the wrapped method can still be called.
+        @wraps(cleaner_function)
         def _run_cleaner_with_context(*args, **kwargs):
             return cleaner_function(*args, **kwargs)
 
@@ -99,43 +217,75 @@ def cleans_field_with_context(field_ref):
     return _clean_with_context_wrapper
 
 
-def call_cleaner(cleaner_callable, args, instance):
-    """Invokes the cleaner_callable with given arguments.
+def pure_cleaner(cache_size=DEFAULT_CACHE_SIZE):
+    """Decorator to mark a `clean_{field_name}` method as a pure function of
+    its field's value.
 
-    The cleaner_callable could be of many types: an instance method, a static
-    method, a class method, or a function. This function tries to address these
-    in the following order:
-        - callable is an method bound to instance
-        - callable is bound to instance with an already-run inner decorator
-        - callable is an independent function
+    `CleanFieldsModel` caches the results of such methods by field value, so
+    repeated values are cleaned once. The decorated method gains
+    `cache_info()` and `cache_clear()` attributes, like those of
+    `functools.lru_cache`.
 
     Args:
-        cleaner_callable (callable): method/function to invoke
-        args (list): list of arguments to be passed to cleaner_callable
-        instance (model instance): model instance for which this cleaner should
-            be called
+        cache_size (int): the maximum number of cached results, evicting the
+            least recently used ones first
+    """
+    def _pure_cleaner_wrapper(cleaner_method):
+        cache = LRUCache(cache_size)
+        cleaner_method.cleaner_cache = cache
+        cleaner_method.cache_info = cache.info
+        cleaner_method.cache_clear = cache.clear
+        return cleaner_method
+    return _pure_cleaner_wrapper
 
-    Return:
-        The return value of cleaner_callable
+
+def io_bound_cleaner(cleaner_method):
+    """Decorator to mark a `clean_{field_name}` method as I/O-bound.
+
+    Such methods mostly wait on external resources and read no other field.
+    When several are found on a `CleanFieldsModel`, they run concurrently on a
+    shared thread pool (see `clean_fields.concurrency`) before the model's
+    other cleaners.
     """
-    # First, try to invoke a method on instance with the same name as
-    # cleaner_callable. This will handle the case in which cleaner_callable is
-    # an instance method.
-    field_cleaner = getattr(instance, cleaner_callable.__name__, None)
-    if field_cleaner is not None:
-        cleaned_value = field_cleaner(*args)
-    else:
-        # In case cleaner_callable is a wrapper to a callable bound to
-        # instance, invoke it with instance as the first argument
-        try:
-            cleaned_value = cleaner_callable(instance, *args)
-        except TypeError as e:
-            # Except in the case of legitimate TypeErrors raised from within
-            # cleaner_callable, invoke the callable as an independent function
-            if not re.search(
-                r'takes( exactly)? \d( positional)? arguments?',
-                str(e)
-            ):
-                raise e
-            cleaned_value = cleaner_callable(*args)
-    return cleaned_value
+    cleaner_method.io_bound = True
+    return cleaner_method
+
+
+def conditional_cleaner(when):
+    """Decorator to guard a `clean_{field_name}` method with a predicate.
+
+    The predicate accepts the model instance. The method only runs for
+    instances for which it returns a truthy value; it is the equivalent of
+    the `when` argument of `cleans_field`.
+
+    Args:
+        when (callable): the predicate
+    """
+    def _conditional_cleaner_wrapper(cleaner_method):
+        cleaner_method.clean_when = when
+        return cleaner_method
+    return _conditional_cleaner_wrapper
+
+
+def _make_cache(pure, cache_size, cache_alias=None, cache_version=1,
+                cache_timeout=DEFAULT_TIMEOUT, field_ref=None,
+                cleaner_function=None):
+    """Return a cache for a pure cleaner, or None if it is not pure."""
+    if cache_alias is not None:
+        identity = '{}:{}.{}'.format(
+            field_ref,
+            cleaner_function.__module__,
+            getattr(
+                cleaner_function,
+                '__qualname__',
+                getattr(cleaner_function, '__name__', repr(cleaner_function))
+            )
+        )
+        return SharedCache(
+            cache_alias, identity, version=cache_version, timeout=cache_timeout
+        )
+    if cache_size is not None:
+        return LRUCache(cache_size)
+    if pure:
+        return LRUCache(DEFAULT_CACHE_SIZE)
+    return None
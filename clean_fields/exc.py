@@ -21,3 +21,84 @@ class CleanFieldsConfigurationError(CleanFieldsError):
             )
         )
         return super(CleanFieldsConfigurationError, self).__init__(message)
+
+
+class CleanFieldsBatchError(CleanFieldsError):
+    """Raised when a batch cleaner returns the wrong number of values"""
+    def __init__(self, cleaner_name, expected_count, actual_count):
+        message = (
+            'Batch cleaner "{cleaner}" received {expected} values, but '
+            'returned {actual}'.format(
+                cleaner=cleaner_name,
+                expected=expected_count,
+                actual=actual_count
+            )
+        )
+        return super(CleanFieldsBatchError, self).__init__(message)
+
+
+class CleanFieldsRegistryError(CleanFieldsError):
+    """Raised when looking up a cleaner that was never registered"""
+    def __init__(self, field_ref, cleaner_name):
+        message = 'No cleaner "{cleaner}" is registered for "{field}"'.format(
+            cleaner=cleaner_name,
+            field=field_ref
+        )
+        return super(CleanFieldsRegistryError, self).__init__(message)
+
+
+class CleanFieldsDependencyError(CleanFieldsError):
+    """Raised when field cleaners depend on each other's fields in a cycle"""
+    def __init__(self, model_label, field_names):
+        message = (
+            'Cleaners of "{model}" have circular dependencies between the '
+            'fields {fields}'.format(
+                model=model_label,
+                fields=', '.join('"%s"' % name for name in field_names)
+            )
+        )
+        return super(CleanFieldsDependencyError, self).__init__(message)
+
+
+class CleanFieldsUpdateError(CleanFieldsError):
+    """Raised when a cleaner needs per-row values to clean a bulk update"""
+    def __init__(self, model_label, field_name, cleaner_name):
+        message = (
+            'Callable "{cleaner}" cleaning "{field}" of "{model}" reads other '
+            'fields of each row, so it cannot clean the values passed to '
+            'QuerySet.update()'.format(
+                cleaner=cleaner_name,
+                field=field_name,
+                model=model_label
+            )
+        )
+        return super(CleanFieldsUpdateError, self).__init__(message)
+
+
+class CleanFieldsCheckpointError(CleanFieldsError):
+    """Raised when resuming a backfill from another backfill's checkpoint"""
+    def __init__(self, path):
+        message = (
+            'Checkpoint "{path}" records the progress of another '
+            'backfill'.format(path=path)
+        )
+        return super(CleanFieldsCheckpointError, self).__init__(message)
+
+
+class CleanFieldsBudgetError(CleanFieldsError):
+    """Raised when a cleaner or a save exceeds its time budget"""
+    def __init__(self, model_label, field_name, cleaner_name, scope, budget,
+                 duration):
+        message = (
+            'Callable "{cleaner}" cleaning "{field}" of "{model}" exceeded '
+            'the {scope} time budget of {budget:.3f}s '
+            '({duration:.3f}s)'.format(
+                cleaner=cleaner_name,
+                field=field_name,
+                model=model_label,
+                scope=scope,
+                budget=budget,
+                duration=duration
+            )
+        )
+        return super(CleanFieldsBudgetError, self).__init__(message)
@@ -0,0 +1,95 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+
+from clean_fields.backfill import DEFAULT_CHUNK_SIZE, backfill
+from clean_fields.exc import CleanFieldsCheckpointError
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-clean the stored rows of a model, in chunks of primary keys, '
+        'writing back the rows whose values changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target',
+            help='app_name.ModelName, or app_name.ModelName.field_name to '
+                 'only run the cleaners of a field'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='number of rows read and updated at once'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='file recording progress; an existing file is resumed from'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='seconds to wait between chunks'
+        )
+        parser.add_argument('--database', help='database alias to use')
+
+    def handle(self, *args, **options):
+        model, field_names = self._parse_target(options['target'])
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+
+        verbosity = options['verbosity']
+
+        def report(progress):
+            if verbosity > 1:
+                self.stdout.write(
+                    'Scanned {p.scanned} rows, updated {p.updated} '
+                    '(last primary key: {p.last_pk})'.format(p=progress)
+                )
+
+        try:
+            progress = backfill(
+                model,
+                field_names=field_names,
+                chunk_size=options['chunk_size'],
+                checkpoint_path=options['checkpoint'],
+                delay=options['sleep'],
+                using=options['database'],
+                callback=report
+            )
+        except CleanFieldsCheckpointError as e:
+            raise CommandError(str(e))
+        if verbosity > 0:
+            self.stdout.write(
+                'Scanned {p.scanned} rows, updated {p.updated}.'.format(
+                    p=progress
+                )
+            )
+
+    @staticmethod
+    def _parse_target(target):
+        """Split the target into a model class and a list of field names.
+
+        Raise:
+            CommandError: if the model or field does not exist
+        """
+        parts = target.split('.')
+        if len(parts) not in (2, 3):
+            raise CommandError(
+                'Expected app_name.ModelName[.field_name], got "%s"' % target
+            )
+        try:
+            model = apps.get_model(parts[0], parts[1])
+        except LookupError as e:
+            raise CommandError(str(e))
+        if len(parts) == 2:
+            return model, None
+        try:
+            model._meta.get_field(parts[2])
+        except FieldDoesNotExist as e:
+            raise CommandError(str(e))
+        return model, [parts[2]]
@@ -0,0 +1,215 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from django.db.models import Manager, Model, QuerySet
+
+from clean_fields.cleaners import ContextFieldCleaner
+from clean_fields.exc import CleanFieldsUpdateError
+from clean_fields.registry import registry
+from clean_fields.utils import get_model_label, load_deferred_fields
+
+
+def clean_instances(model, instances, field_names=None):
+    """Run every cleaner configured for a model over the given instances.
+
+    Model cleaners (those located by `BaseCleanFieldsModel` subclasses) run
+    first, followed by the cleaners registered via the decorators. This
+    matches the order in which they are invoked by a regular `save()`.
+    When cleaning given fields only, the deferred fields which the cleaners
+    read are loaded for all instances at once, rather than one query per
+    instance and field.
+
+    Args:
+        model (django.db.models.Model): the model class of the instances
+        instances (list): model instances to clean
+        field_names (iterable of str): if given, only run the cleaners that
+            should run when saving these fields
+    """
+    if field_names is not None:
+        load_deferred_fields(
+            instances, get_read_field_names(model, field_names)
+        )
+    for instance in instances:
+        clean_single_fields = getattr(instance, 'clean_single_fields', None)
+        if clean_single_fields is not None:
+            clean_single_fields(field_names=field_names)
+    registry.clean_instances(model, instances, field_names=field_names)
+
+
+def get_read_field_names(model, field_names):
+    """Return names of the fields read by the cleaners of the given fields.
+
+    Args:
+        model (django.db.models.Model): the model class being cleaned
+        field_names (iterable of str): names of the fields being saved
+
+    Return:
+        set of str
+    """
+    read_names = set(field_names)
+    dependencies = getattr(model, 'clean_field_dependencies', {})
+    for field_name in field_names:
+        read_names.update(dependencies.get(field_name, ()))
+    return read_names | registry.get_read_field_names(model, field_names)
+
+
+def expand_update_fields(model, field_names):
+    """Add the names of fields whose cleaners depend on the given fields.
+
+    Args:
+        model (django.db.models.Model): the model class being saved
+        field_names (iterable of str): names of the fields being saved
+
+    Return:
+        list of str
+    """
+    if hasattr(model, '_expand_update_fields'):
+        return model._expand_update_fields(field_names)
+    field_names = list(field_names)
+    return field_names + registry.get_dependent_field_names(model, field_names)
+
+
+def clean_update_values(model, values):
+    """Run the cleaners of the given fields over their update values.
+
+    The literal values are set on a transient instance of the model, which
+    is cleaned as if saving these fields only. Values that are expressions
+    (such as `F()` objects) are evaluated by the database, row by row, so
+    they are left as they are. No instance is built if no cleaner should
+    run.
+
+    A cleaner can only clean update values if every field it reads is
+    updated to a literal value too. Context cleaners and cleaners guarded by
+    a `when` predicate may read any field, so they never can.
+
+    Args:
+        model (django.db.models.Model): the model class being updated
+        values (dict): maps field names to their update values
+
+    Raise:
+        CleanFieldsUpdateError: if a cleaner that must run reads fields
+            missing from values, or is a context or guarded cleaner
+
+    Return:
+        dict of the cleaned values
+    """
+    field_names = set(
+        name for name, value in values.items()
+        if not hasattr(value, 'resolve_expression')
+    )
+    _check_update_dependencies(model, field_names)
+    if not _has_update_cleaners(model, field_names):
+        return dict(values)
+
+    # Like QuerySet.update(), accept related objects' primary keys for
+    # relations: set those on the attribute name (such as `author_id`).
+    attnames = dict((name, name) for name in field_names)
+    for field in model._meta.concrete_fields:
+        if field.is_relation and field.name in field_names and \
+                not isinstance(values[field.name], Model):
+            attnames[field.name] = field.attname
+    instance = model(**dict(
+        (attnames[name], values[name]) for name in field_names
+    ))
+    clean_instances(model, [instance], field_names=field_names)
+    cleaned_values = dict(values)
+    for name in field_names:
+        cleaned_values[name] = getattr(instance, attnames[name])
+    return cleaned_values
+
+
+def _has_update_cleaners(model, field_names):
+    """Return whether any cleaner should run when updating the fields."""
+    if not field_names:
+        return False
+    if hasattr(model, '_get_cleaned_field_names') and \
+            not field_names.isdisjoint(model._get_cleaned_field_names()):
+        return True
+    return any(
+        field_cleaner.should_clean(field_names)
+        for field_cleaner in registry.get_cleaners(model)
+    )
+
+
+def _check_update_dependencies(model, field_names):
+    """Ensure the cleaners of the updated fields read no other fields.
+
+    Raise:
+        CleanFieldsUpdateError
+    """
+    model_label = get_model_label(model)
+    for field_name in field_names:
+        cleaner_method = getattr(model, 'clean_%s' % field_name, None)
+        if getattr(cleaner_method, 'clean_when', None) is not None:
+            raise CleanFieldsUpdateError(
+                model_label, field_name, 'clean_%s' % field_name
+            )
+
+    dependencies = getattr(model, 'clean_field_dependencies', {})
+    for field_name, read_names in dependencies.items():
+        read_names = set(read_names)
+        if (field_name in field_names or read_names & field_names) and (
+                field_name not in field_names or
+                not read_names <= field_names):
+            raise CleanFieldsUpdateError(
+                model_label, field_name, 'clean_%s' % field_name
+            )
+
+    for field_cleaner in registry.get_cleaners(model):
+        if not field_cleaner.should_clean(field_names):
+            continue
+        if isinstance(field_cleaner, ContextFieldCleaner) or \
+                field_cleaner.when is not None or \
+                field_cleaner.field_name not in field_names or \
+                not field_cleaner.depends_on <= field_names:
+            raise CleanFieldsUpdateError(
+                model_label,
+                field_cleaner.field_name,
+                field_cleaner.cleaner_name
+            )
+
+
+class CleanFieldsQuerySet(QuerySet):
+    """A QuerySet whose bulk operations run field cleaners.
+
+    `bulk_create`, `bulk_update` and `update` bypass `Model.save()` and the
+    `pre_save` signal. This QuerySet runs the registered field cleaners over
+    the whole batch, or over the update values, before issuing the query.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Clean all objects, then insert them in bulk."""
+        objs = list(objs)
+        clean_instances(self.model, objs)
+        return super(CleanFieldsQuerySet, self).bulk_create(
+            objs, *args, **kwargs
+        )
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Clean the given fields of all objects, then update them in bulk.
+
+        Fields whose cleaners depend on the given fields are cleaned and
+        updated as well.
+        """
+        objs = list(objs)
+        fields = expand_update_fields(self.model, fields)
+        clean_instances(self.model, objs, field_names=fields)
+        return super(CleanFieldsQuerySet, self).bulk_update(
+            objs, fields, *args, **kwargs
+        )
+
+    def update(self, **kwargs):
+        """Clean the update values, then update all rows in a single query.
+
+        See `clean_update_values` for the cleaners that can run.
+        """
+        return super(CleanFieldsQuerySet, self).update(
+            **clean_update_values(self.model, kwargs)
+        )
+
+
+class CleanFieldsManager(Manager.from_queryset(CleanFieldsQuerySet)):
+    """A manager whose bulk operations run field cleaners."""
+    pass
@@ -0,0 +1,199 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import deque, namedtuple
+from threading import Lock
+from timeit import default_timer
+
+from django.dispatch import Signal
+
+
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Sent after each instrumented cleaner call, with the model label as sender
+# and the CleanerCall attributes as keyword arguments.
+cleaner_called = Signal()
+
+CleanerCall = namedtuple(
+    'CleanerCall',
+    ['model_label', 'field_name', 'cleaner_name', 'duration', 'error']
+)
+
+CleanerStats = namedtuple(
+    'CleanerStats',
+    [
+        'model_label', 'field_name', 'cleaner_name', 'calls', 'errors',
+        'total_time', 'mean_time', 'p50_time', 'p95_time', 'p99_time',
+    ]
+)
+
+
+class MetricsCollector(object):
+    """Records the calls, latency and errors of each cleaner.
+
+    Metrics are kept per (model label, field name, cleaner name). Latency
+    percentiles are computed over the most recent `sample_size` calls.
+    Collection is disabled by default; while disabled, cleaners are called
+    directly, without being timed.
+
+    Args:
+        sample_size (int): the number of recent durations kept per cleaner
+    """
+
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE):
+        self.enabled = False
+        self.sample_size = sample_size
+        self._sinks = []
+        self._stats = {}
+        self._lock = Lock()
+
+    def add_sink(self, sink):
+        """Register a callable to receive a CleanerCall for each cleaner call.
+
+        Args:
+            sink (callable): accepts a single CleanerCall argument
+        """
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        """Unregister a callable added with `add_sink`."""
+        self._sinks.remove(sink)
+
+    def call(self, model_label, field_name, cleaner_name, cleaner, *args):
+        """Call cleaner with args, recording the call if collection is enabled.
+
+        Args:
+            model_label (str): label of the cleaned model
+            field_name (str): name of the cleaned field
+            cleaner_name (str): name of the cleaner
+            cleaner (callable): the callable to invoke
+            *args: arguments to pass to cleaner
+
+        Return:
+            The return value of cleaner
+        """
+        if not self.enabled:
+            return cleaner(*args)
+        error = None
+        start = default_timer()
+        try:
+            return cleaner(*args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.record(CleanerCall(
+                model_label,
+                field_name,
+                cleaner_name,
+                default_timer() - start,
+                error
+            ))
+
+    def record(self, cleaner_call):
+        """Record a cleaner call and pass it along to the sinks.
+
+        Args:
+            cleaner_call (CleanerCall): the call to record
+        """
+        key = cleaner_call[:3]
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _Stats(self.sample_size)
+            stats.add(cleaner_call.duration, cleaner_call.error)
+        for sink in self._sinks:
+            sink(cleaner_call)
+        if cleaner_called.has_listeners():
+            cleaner_called.send(
+                sender=cleaner_call.model_label,
+                **cleaner_call._asdict()
+            )
+
+    def get_stats(self, model_label=None):
+        """Return the metrics recorded for each cleaner.
+
+        Args:
+            model_label (str): if given, only return the metrics of cleaners
+                of this model, following the convention `app_name.ModelName`
+
+        Return:
+            list of CleanerStats, sorted by model, field and cleaner
+        """
+        with self._lock:
+            items = sorted(self._stats.items())
+            return [
+                stats.summarize(*key) for key, stats in items
+                if model_label is None or key[0].lower() == model_label.lower()
+            ]
+
+    def reset(self):
+        """Discard all recorded metrics."""
+        with self._lock:
+            self._stats.clear()
+
+
+class _Stats(object):
+    """Running totals and recent durations of a single cleaner's calls."""
+
+    def __init__(self, sample_size):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.durations = deque(maxlen=sample_size)
+
+    def add(self, duration, error):
+        self.calls += 1
+        self.total_time += duration
+        self.durations.append(duration)
+        if error is not None:
+            self.errors += 1
+
+    def summarize(self, model_label, field_name, cleaner_name):
+        durations = sorted(self.durations)
+        return CleanerStats(
+            model_label,
+            field_name,
+            cleaner_name,
+            self.calls,
+            self.errors,
+            self.total_time,
+            self.total_time / self.calls,
+            _percentile(durations, 50),
+            _percentile(durations, 95),
+            _percentile(durations, 99),
+        )
+
+
+def _percentile(sorted_values, percent):
+    """Return the nearest-rank percentile of a sorted, non-empty list."""
+    rank = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+collector = MetricsCollector()
+
+
+def enable_metrics():
+    """Start recording metrics for every cleaner call."""
+    collector.enabled = True
+
+
+def disable_metrics():
+    """Stop recording metrics; cleaners are then called without overhead."""
+    collector.enabled = False
+
+
+def get_metrics(model_label=None):
+    """Return the metrics recorded by the default collector.
+
+    See `MetricsCollector.get_stats`.
+    """
+    return collector.get_stats(model_label)
+
+
+def reset_metrics():
+    """Discard all metrics recorded by the default collector."""
+    collector.reset()
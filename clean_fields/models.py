@@ -3,12 +3,84 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from functools import partial
+
 from django.db.models import Model
 
-from clean_fields.utils import get_model_field_names
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:
+    # asgiref is older than 3.6, or missing (before Django 3.0).
+    def markcoroutinefunction(func):
+        return func
+
+from clean_fields.budgets import budget
+from clean_fields.cleaners import call_and_resolve
+from clean_fields.concurrency import clean_fields_concurrently
+from clean_fields.metrics import collector
+from clean_fields.registry import registry
+from clean_fields.utils import (
+    get_changed_field_names, get_deferred_field_names, get_model_field_names,
+    get_model_label, load_deferred_fields, order_by_dependencies,
+    refresh_field_snapshot, take_field_snapshot
+)
+
+
+# Instance attribute storing the field values cleaned during validation.
+VALIDATED_ATTRIBUTE = '_clean_fields_validated'
+
+
+class FieldSnapshotMixin(object):
+    """Mixin class to record field values when loading a model instance.
+
+    The recorded snapshot allows determining which fields changed since the
+    instance was loaded or last saved, so that cleaners registered with
+    `changed_only=True` can skip unchanged fields. Any class inheriting this
+    mixin must also inherit `django.db.models.Model`.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Record the loaded field values of the new instance."""
+        instance = super(FieldSnapshotMixin, cls).from_db(
+            db, field_names, values
+        )
+        if cls._takes_field_snapshots():
+            take_field_snapshot(instance)
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Record the saved field values once the instance is saved.
+
+        When saving with `update_fields`, only the values of those fields
+        are recorded: the other fields were not written, so any change to
+        them is still pending.
+        """
+        result = super(FieldSnapshotMixin, self).save(*args, **kwargs)
+        if self._takes_field_snapshots():
+            update_fields = kwargs.get(
+                'update_fields', args[3] if len(args) > 3 else None
+            )
+            if update_fields is None:
+                take_field_snapshot(self)
+            else:
+                refresh_field_snapshot(self, update_fields)
+        return result
 
+    def get_changed_field_names(self):
+        """Return names of the fields changed since the instance was loaded.
 
-class BaseCleanFieldsModel(Model):
+        Return:
+            list of str, or None if the instance was never loaded or saved
+        """
+        return get_changed_field_names(self)
+
+    @classmethod
+    def _takes_field_snapshots(cls):
+        return True
+
+
+class BaseCleanFieldsModel(FieldSnapshotMixin, Model):
     """Represents a base model that calls registered field cleaners on save.
 
     This abstract base model provides the ability to invoke methods that clean
@@ -16,25 +88,360 @@ class BaseCleanFieldsModel(Model):
     field and return a finalized value to commit to the database (or raise an
     error).
 
+    When saving with `update_fields`, only the cleaners for those fields are
+    invoked. A cleaner whose output depends on other fields may declare them
+    in `clean_field_dependencies`, a dictionary mapping the cleaned field's
+    name to the names of the fields it reads. Such a cleaner also runs when
+    any of its dependencies is saved, and its field is added to
+    `update_fields` so the cleaned value is written. Fields are also cleaned
+    after the fields they depend on, so cleaners read cleaned values.
+
+    Setting `clean_changed_fields_only` to True restricts cleaning to fields
+    whose values changed since the instance was loaded or last saved. Setting
+    `save_changed_fields_only` to True narrows the saved columns of existing
+    instances to those whose values changed, after cleaning. Both rely on a
+    snapshot of field values taken when the instance is loaded.
+
     This class should not be inherited directly. It does not provide a
     strategy to locate the cleaner methods; this feature is provided by
     child classes that implement the `_get_field_cleaner` method.
     """
+    clean_field_dependencies = {}
+    clean_changed_fields_only = False
+    save_changed_fields_only = False
+
     class Meta:
         abstract = True
 
     def save(self, *args, **kwargs):
-        """Call cleaners for each field before saving."""
-        self.clean_single_fields()
-        return super(BaseCleanFieldsModel, self).save(*args, **kwargs)
-
-    def clean_single_fields(self):
-        """Locate and invoke cleaner methods for each individial field."""
-        field_names = get_model_field_names(self)
-        for field_name in field_names:
+        """Call cleaners for each field before saving.
+
+        The save time budget (see `clean_fields.budgets`) covers both these
+        cleaners and those registered via the decorators.
+        """
+        if self.__dict__.get('_clean_fields_skip_cleaning'):
+            self._narrow_update_fields(kwargs)
+            return super(BaseCleanFieldsModel, self).save(*args, **kwargs)
+
+        started = budget.start_save(self)
+        try:
+            field_names = self._prepare_cleaning(kwargs)
+            if field_names is None:
+                self.clean_single_fields()
+            else:
+                self.clean_single_fields(field_names=field_names)
+            self._narrow_update_fields(kwargs)
+            return super(BaseCleanFieldsModel, self).save(*args, **kwargs)
+        finally:
+            if started:
+                budget.end_save(self)
+
+    @markcoroutinefunction
+    def asave(self, *args, **kwargs):
+        """Await cleaners for each field before saving asynchronously.
+
+        Cleaners may be coroutine functions. Cleaners of different fields run
+        concurrently, then the instance is saved without cleaning it again.
+        See `clean_fields.aio.clean_instance_async` for details.
+
+        This module supports Python versions without `async def`, so the
+        method returns a coroutine, and is marked as a coroutine function.
+        """
+        from clean_fields.aio import asave_instance
+        return asave_instance(self, *args, **kwargs)
+
+    def _prepare_cleaning(self, save_kwargs):
+        """Determine which fields to clean before saving.
+
+        Any `update_fields` found in save_kwargs is replaced by its expansion
+        to the fields whose cleaners depend on the saved fields. If the
+        instance was cleaned during validation (see `ValidationMixin`), only
+        the fields changed since, and those depending on them, are cleaned
+        again.
+
+        Args:
+            save_kwargs (dict): the keyword arguments passed to `save()`
+
+        Return:
+            list of str, or None if all fields should be cleaned
+        """
+        update_fields = save_kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = self._expand_update_fields(update_fields)
+            save_kwargs['update_fields'] = update_fields
+
+        field_names = update_fields
+        changed_names = None
+        if self.clean_changed_fields_only:
+            changed_names = self.get_changed_field_names()
+        if changed_names is not None:
+            field_names = self._restrict_to_changed(field_names, changed_names)
+
+        # Fields cleaned during validation need not be cleaned again, unless
+        # they or their dependencies changed since.
+        changed_names = get_changed_field_names(self, VALIDATED_ATTRIBUTE)
+        if changed_names is not None:
+            del self.__dict__[VALIDATED_ATTRIBUTE]
+            field_names = self._restrict_to_changed(field_names, changed_names)
+
+        if not self._state.adding:
+            field_names = self._prepare_deferred_fields(
+                field_names, update_fields
+            )
+        return field_names
+
+    def _prepare_deferred_fields(self, field_names, update_fields):
+        """Avoid a query per deferred field read by the cleaners.
+
+        When saving an instance loaded with `.only()` or `.defer()` without
+        `update_fields`, Django only saves the loaded fields, so deferred
+        fields are not cleaned. The deferred fields which the remaining
+        cleaners read are then loaded, all in a single query.
+
+        Args:
+            field_names (list of str): names of the fields to clean, or None
+                for all fields
+            update_fields (list of str): the fields to save, if given
+
+        Return:
+            list of str, or None if all fields should be cleaned
+        """
+        deferred_names = get_deferred_field_names(self)
+        if not deferred_names:
+            return field_names
+        if update_fields is None:
+            if field_names is None:
+                field_names = self._get_cleaned_field_names()
+            field_names = [
+                name for name in field_names if name not in deferred_names
+            ]
+
+        if field_names is None:
+            cleaned_names = self._get_cleaned_field_names()
+        else:
+            cleaned_names = field_names
+        read_names = set()
+        for field_name in cleaned_names:
+            read_names.add(field_name)
+            read_names.update(
+                self.clean_field_dependencies.get(field_name, ())
+            )
+        load_deferred_fields([self], read_names.intersection(deferred_names))
+        return field_names
+
+    def _restrict_to_changed(self, field_names, changed_names):
+        """Restrict the fields to clean to those whose cleaners read changed
+        fields.
+
+        Args:
+            field_names (list of str): names of the fields to clean, or None
+                for all fields
+            changed_names (list of str): names of the changed fields
+
+        Return:
+            list of str
+        """
+        changed_names = self._expand_update_fields(changed_names)
+        if field_names is None:
+            return changed_names
+        return [name for name in field_names if name in changed_names]
+
+    def _narrow_update_fields(self, save_kwargs):
+        """Restrict the saved columns to those which changed, if enabled.
+
+        Args:
+            save_kwargs (dict): the keyword arguments passed to `save()`
+        """
+        if self.save_changed_fields_only and \
+                save_kwargs.get('update_fields') is None and \
+                not self._state.adding and not save_kwargs.get('force_insert'):
+            changed_names = self.get_changed_field_names()
+            if changed_names is not None:
+                save_kwargs['update_fields'] = self._expand_update_fields(
+                    changed_names
+                )
+
+    def clean_single_fields(self, field_names=None):
+        """Locate and invoke cleaner methods for each individial field.
+
+        If several cleaners without dependencies (see
+        `clean_field_dependencies`) are marked as I/O-bound (see
+        `clean_fields.decorators.io_bound_cleaner`), they first run
+        concurrently on the shared executor. The remaining cleaners then run
+        in turn.
+
+        A cleaner guarded by a predicate (see
+        `clean_fields.decorators.conditional_cleaner`) is skipped when its
+        predicate fails for this instance. The predicate is evaluated just
+        before the cleaner would run, so it reads previously cleaned values.
+
+        Args:
+            field_names (iterable of str): if given, only clean the fields
+                with these names
+        """
+        field_cleaners = []
+        for field_name in self._get_cleaned_field_names():
+            if field_names is not None and field_name not in field_names:
+                continue
             field_cleaner = self._get_field_cleaner(field_name)
             if field_cleaner:
-                setattr(self, field_name, field_cleaner())
+                field_cleaners.append((field_name, field_cleaner))
+
+        io_bound_cleaners = [
+            (field_name, field_cleaner)
+            for field_name, field_cleaner in field_cleaners
+            if getattr(field_cleaner, 'io_bound', False) and
+            not self.clean_field_dependencies.get(field_name) and
+            self._passes_guard(field_cleaner)
+        ]
+        if len(io_bound_cleaners) > 1:
+            field_cleaners = [
+                pair for pair in field_cleaners
+                if pair not in io_bound_cleaners
+            ]
+            clean_fields_concurrently(self, [
+                (field_name, partial(
+                    self._call_field_cleaner,
+                    field_name,
+                    field_cleaner
+                ))
+                for field_name, field_cleaner in io_bound_cleaners
+                if self._allowed_by_budget(field_name, field_cleaner)
+            ])
+
+        for field_name, field_cleaner in field_cleaners:
+            if not self._passes_guard(field_cleaner) or \
+                    not self._allowed_by_budget(field_name, field_cleaner):
+                continue
+            setattr(
+                self,
+                field_name,
+                self._call_field_cleaner(field_name, field_cleaner)
+            )
+
+    def _allowed_by_budget(self, field_name, field_cleaner):
+        """Apply the save time budget, if any, before running a cleaner."""
+        if not budget.restricts_cleaners:
+            return True
+        return budget.allows(
+            self, self._get_identity(field_name, field_cleaner)
+        )
+
+    def _get_identity(self, field_name, field_cleaner):
+        """Return the model label, field name and cleaner name, identifying
+        a field cleaner in metrics and logs.
+        """
+        return (
+            get_model_label(self),
+            field_name,
+            getattr(field_cleaner, '__name__', repr(field_cleaner))
+        )
+
+    def _passes_guard(self, field_cleaner):
+        """Evaluate the `when` predicate of a field cleaner, if any."""
+        when = getattr(field_cleaner, 'clean_when', None)
+        return when is None or bool(when(self))
+
+    def _call_field_cleaner(self, field_name, field_cleaner, field_value=None):
+        """Invoke a field cleaner, using its cache of pure results, if any,
+        within its time budget (see `clean_fields.budgets`).
+
+        Args:
+            field_name (str): name of the cleaned field
+            field_cleaner (callable): the cleaner, accepting no arguments
+            field_value: unused; accepted so the cleaner may be run as a step
+                of `clean_fields.concurrency.clean_fields_concurrently`
+
+        Return:
+            The cleaned value
+        """
+        cache = getattr(field_cleaner, 'cleaner_cache', None)
+        if collector.enabled:
+            cleaner_args = (
+                self._get_identity(field_name, field_cleaner) +
+                (call_and_resolve, field_cleaner)
+            )
+            cleaner = collector.call
+        else:
+            cleaner_args = (field_cleaner,)
+            cleaner = call_and_resolve
+        if cache is not None:
+            cleaner_args = (getattr(self, field_name), cleaner) + cleaner_args
+            cleaner = cache.call
+        if budget.enabled:
+            cleaner_args = (
+                self._get_identity(field_name, field_cleaner),
+                getattr(self, field_name),
+                cleaner
+            ) + cleaner_args
+            cleaner = budget.call
+        return cleaner(*cleaner_args)
+
+    @classmethod
+    def _get_cleaned_field_names(cls):
+        """Return the names of fields on this model that may have cleaners.
+
+        The names are ordered so that each field is cleaned after the fields
+        its cleaner depends on (see `clean_field_dependencies`). They are
+        computed once per concrete model class and stored on the class itself.
+        Since the lookup is keyed on the class' own `__dict__`, subclasses
+        never reuse the names computed for their parents.
+
+        Raise:
+            CleanFieldsDependencyError: if `clean_field_dependencies` is
+                circular
+
+        Return:
+            tuple of str
+        """
+        field_names = cls.__dict__.get('_cleaned_field_names')
+        if field_names is None:
+            field_names = tuple(order_by_dependencies(get_model_label(cls), [
+                (name, cls.clean_field_dependencies.get(name, ()), name)
+                for name in cls._find_cleaned_field_names()
+            ]))
+            setattr(cls, '_cleaned_field_names', field_names)
+        return field_names
+
+    @classmethod
+    def _takes_field_snapshots(cls):
+        return cls.clean_changed_fields_only or cls.save_changed_fields_only
+
+    @classmethod
+    def _expand_update_fields(cls, update_fields):
+        """Add the fields whose cleaners depend on the fields being saved.
+
+        Both the dependencies declared in `clean_field_dependencies` and those
+        declared by decorator-registered cleaners are considered.
+
+        Args:
+            update_fields (iterable of str): names of the fields being saved
+
+        Return:
+            list of str
+        """
+        field_names = list(update_fields)
+        saved_names = set(field_names)
+        for field_name, dependencies in cls.clean_field_dependencies.items():
+            if field_name not in saved_names and \
+                    saved_names.intersection(dependencies):
+                field_names.append(field_name)
+        for field_name in registry.get_dependent_field_names(cls, saved_names):
+            if field_name not in field_names:
+                field_names.append(field_name)
+        return field_names
+
+    @classmethod
+    def _find_cleaned_field_names(cls):
+        """Determine which fields on this model may have cleaners.
+
+        By default, every field is considered. Child classes that can locate
+        their cleaners without a model instance should narrow this down.
+
+        Return:
+            list of str
+        """
+        return get_model_field_names(cls)
 
     def _get_field_cleaner(self, field_name):
         """Locate field cleaner callables for field with the given name.
@@ -53,7 +460,9 @@ class ValidationMixin(object):
     """Mixin class to optionally enable field cleaning within `Model.clean()`
 
     When class attribute `clean_on_validate` is set to True, invoke all field
-    cleaners in Django model's built-in `clean()` method. Note that any class
+    cleaners in Django model's built-in `clean()` method. The cleaned values
+    are recorded, so that the next `save()` only runs the cleaners of fields
+    which (or whose dependencies) changed since. Note that any class
     inheriting this mixin must also inherit BaseCleanFieldsModel.
     """
     clean_on_validate = False
@@ -62,6 +471,7 @@ class ValidationMixin(object):
         """Run field cleaners for this model instance"""
         if self.clean_on_validate:
             self.clean_single_fields()
+            take_field_snapshot(self, VALIDATED_ATTRIBUTE)
         super(ValidationMixin, self).clean()
 
 
@@ -88,3 +498,15 @@ class CleanFieldsModel(ValidationMixin, BaseCleanFieldsModel):
         if field_cleaner and not callable(field_cleaner):
             field_cleaner = None
         return field_cleaner
+
+    @classmethod
+    def _find_cleaned_field_names(cls):
+        """Return names of fields with a callable `clean_{field_name}` method.
+
+        Return:
+            list of str
+        """
+        return [
+            field_name for field_name in get_model_field_names(cls)
+            if callable(getattr(cls, 'clean_{}'.format(field_name), None))
+        ]
@@ -0,0 +1,133 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from django.apps import apps
+
+from clean_fields.managers import clean_instances, get_read_field_names
+from clean_fields.registry import registry
+from clean_fields.utils import (
+    get_concrete_field_values, get_model_label, load_deferred_fields
+)
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def clean_instances_in_processes(model, instances, field_names=None,
+                                 chunk_size=DEFAULT_CHUNK_SIZE,
+                                 executor=None, max_workers=None,
+                                 mp_context=None):
+    """Clean many model instances in parallel, using a pool of processes.
+
+    CPU-heavy cleaners are bound to a single core by the GIL. This function
+    splits the instances in chunks and ships each chunk, as the model's label
+    and the instances' concrete field values, to a worker process. The worker
+    looks the model up by its label, rebuilds the instances, runs every
+    configured cleaner (see `clean_fields.managers.clean_instances`) and
+    returns the values that changed, which are then assigned to the original
+    instances.
+
+    Deferred fields (of instances loaded with `.only()` or `.defer()`) which
+    the cleaners read are loaded beforehand, in a single query. Other
+    deferred fields are left deferred: the worker never sends them back.
+
+    Worker processes must be able to import the project's models: they either
+    inherit the parent's state (with the "fork" start method) or set Django up
+    from the `DJANGO_SETTINGS_MODULE` environment variable.
+
+    Args:
+        model (django.db.models.Model): the model class of the instances
+        instances (list): model instances to clean
+        field_names (iterable of str): if given, only run the cleaners that
+            should run when saving these fields
+        chunk_size (int): number of instances sent to a worker at once
+        executor (concurrent.futures.Executor): the process pool to use. If
+            not given, a pool is created and shut down once cleaning is done.
+        max_workers (int): size of the pool to create, defaulting to the
+            number of processors
+        mp_context (multiprocessing.context.BaseContext): the context used to
+            start the processes of the pool to create
+    """
+    instances = list(instances)
+    model_label = get_model_label(model)
+    if field_names is not None:
+        field_names = list(field_names)
+    load_deferred_fields(instances, _get_read_field_names(model, field_names))
+    chunks = [
+        [get_concrete_field_values(obj) for obj in instances[i:i + chunk_size]]
+        for i in range(0, len(instances), chunk_size)
+    ]
+    if not chunks:
+        return
+
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_setup_django
+        ) as pool:
+            results = list(_map_chunks(pool, model_label, chunks, field_names))
+    else:
+        results = list(_map_chunks(executor, model_label, chunks, field_names))
+
+    changed_values = (values for chunk in results for values in chunk)
+    for instance, values in zip(instances, changed_values):
+        for attname, value in values.items():
+            setattr(instance, attname, value)
+
+
+def _get_read_field_names(model, field_names):
+    """Return names of the fields read by the cleaners that should run."""
+    if field_names is None:
+        field_names = registry.get_read_field_names(model)
+        if hasattr(model, '_get_cleaned_field_names'):
+            field_names.update(model._get_cleaned_field_names())
+    return get_read_field_names(model, field_names)
+
+
+def _map_chunks(executor, model_label, chunks, field_names):
+    return executor.map(
+        _clean_chunk,
+        [model_label] * len(chunks),
+        chunks,
+        [field_names] * len(chunks)
+    )
+
+
+def _clean_chunk(model_label, chunk, field_names):
+    """Rebuild and clean a chunk of instances in a worker process.
+
+    Args:
+        model_label (str): label of the model, following the convention
+            `app_name.ModelName`
+        chunk (list of dict): the concrete field values of each instance,
+            keyed by attribute name
+        field_names (list of str): if given, only run the cleaners that should
+            run when saving these fields
+
+    Return:
+        list of dict of the changed values of each instance. Fields missing
+        from the chunk take their default values in the worker, and are left
+        out.
+    """
+    model = apps.get_model(model_label)
+    instances = [model(**values) for values in chunk]
+    clean_instances(model, instances, field_names=field_names)
+    return [
+        dict(
+            (attname, value)
+            for attname, value in get_concrete_field_values(instance).items()
+            if attname in values and values[attname] != value
+        )
+        for instance, values in zip(instances, chunk)
+    ]
+
+
+def _setup_django():
+    """Set Django up in a worker process that did not inherit its state."""
+    if not apps.ready:
+        import django
+        django.setup()
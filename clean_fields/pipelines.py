@@ -0,0 +1,223 @@
+r"""Built-in string cleaners, composed into single-pass pipelines.
+
+Example:
+
+    from clean_fields.pipelines import (
+        collapse_whitespace, lower, normalize_unicode, pipeline, replace
+    )
+
+    class Article(CleanFieldsModel):
+        title = models.CharField(max_length=100)
+
+        clean_title = pipeline(normalize_unicode(), collapse_whitespace())
+
+    cleans_field('your_app.Article.tag', pure=True)(
+        pipeline(replace(r'[^\w\s]', ''), collapse_whitespace(), lower())
+    )
+
+Each step is a declaration. When the pipeline is created, adjacent steps are
+merged where that never changes the result (e.g. collapsing whitespace and
+stripping becomes a single split and join) and the remaining steps are
+compiled into a single function, with any regular expression compiled once.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+import unicodedata
+from collections import namedtuple
+
+
+# A declared step: an operation name and its arguments, hashable so that
+# identical pipelines can be compared.
+Step = namedtuple('Step', ['operation', 'args'])
+
+
+def strip(chars=None):
+    """Remove leading and trailing characters (whitespace by default)."""
+    return Step('strip', (chars,))
+
+
+def lower():
+    """Convert to lower case."""
+    return Step('lower', ())
+
+
+def upper():
+    """Convert to upper case."""
+    return Step('upper', ())
+
+
+def collapse_whitespace():
+    """Replace each run of whitespace with a single space."""
+    return Step('collapse_whitespace', ())
+
+
+def normalize_unicode(form='NFC'):
+    """Apply a unicode normalization form (NFC, NFKC, NFD or NFKD)."""
+    if form not in ('NFC', 'NFKC', 'NFD', 'NFKD'):
+        raise ValueError('Unknown normalization form "%s"' % form)
+    return Step('normalize_unicode', (form,))
+
+
+def replace(pattern, replacement, flags=0):
+    """Replace the matches of a regular expression, as `re.sub` does."""
+    return Step('replace', (pattern, replacement, flags))
+
+
+class Pipeline(object):
+    """A composition of built-in string cleaners, compiled into one function.
+
+    Calling the pipeline with a value returns the cleaned value; None is
+    returned unchanged, for nullable fields. A pipeline can thus be registered
+    with `cleans_field`. Assigned on a `CleanFieldsModel` as
+    `clean_<field_name>`, it instead cleans that field of the instance.
+
+    Args:
+        *steps (Step): the built-in cleaners to apply, in order
+    """
+
+    def __init__(self, *steps):
+        self.steps = tuple(steps)
+        self.source, self._function = _compile(_fuse(self.steps))
+        self._field_name = None
+
+    def __call__(self, value):
+        return self._function(value)
+
+    def __set_name__(self, owner, name):
+        if name.startswith('clean_'):
+            self._field_name = name[len('clean_'):]
+
+    def __get__(self, instance, owner=None):
+        if instance is None or self._field_name is None:
+            return self
+        function = self._function
+        field_name = self._field_name
+
+        def clean_field():
+            return function(getattr(instance, field_name))
+        clean_field.__name__ = str('clean_' + field_name)
+        return clean_field
+
+    def __eq__(self, other):
+        return isinstance(other, Pipeline) and self.steps == other.steps
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.steps)
+
+    def __repr__(self):
+        return 'pipeline({})'.format(', '.join(
+            '{}({})'.format(
+                step.operation, ', '.join(repr(arg) for arg in step.args)
+            )
+            for step in self.steps
+        ))
+
+
+def pipeline(*steps):
+    """Compose built-in cleaners into a single-pass Pipeline.
+
+    Args:
+        *steps (Step): the built-in cleaners to apply, in order
+
+    Return:
+        Pipeline
+    """
+    return Pipeline(*steps)
+
+
+def _fuse(steps):
+    """Merge adjacent steps whose combined effect takes a single operation.
+
+    Return:
+        list of Step, including the fused 'split_join' operation
+    """
+    fused = []
+    for step in steps:
+        previous = fused[-1] if fused else None
+        if previous is None:
+            fused.append(step)
+        elif step == previous and step.operation in (
+                'strip', 'collapse_whitespace', 'normalize_unicode'):
+            # These steps are idempotent.
+            continue
+        elif _is_whitespace_strip(step) and \
+                previous.operation in ('collapse_whitespace', 'split_join'):
+            fused[-1] = Step('split_join', ())
+        elif step.operation == 'collapse_whitespace' and \
+                _is_whitespace_strip(previous):
+            fused[-1] = Step('split_join', ())
+        elif step.operation == 'collapse_whitespace' and \
+                previous.operation == 'split_join':
+            continue
+        else:
+            fused.append(step)
+    return fused
+
+
+def _is_whitespace_strip(step):
+    return step.operation == 'strip' and step.args == (None,)
+
+
+def _compile(steps):
+    """Generate a single function applying every step in turn.
+
+    Return:
+        2-tuple of the function's source code and the function
+    """
+    namespace = {'_normalize': unicodedata.normalize}
+    lines = [
+        'def _pipeline(value):',
+        '    if value is None:',
+        '        return value',
+    ]
+    for index, step in enumerate(steps):
+        if step.operation == 'strip':
+            chars_name = '_chars_%d' % index
+            namespace[chars_name] = step.args[0]
+            lines.append('    value = value.strip(%s)' % chars_name)
+        elif step.operation in ('lower', 'upper'):
+            lines.append('    value = value.%s()' % step.operation)
+        elif step.operation == 'collapse_whitespace':
+            namespace['_whitespace'] = re.compile(r'\s+', re.UNICODE)
+            lines.append("    value = _whitespace.sub(' ', value)")
+        elif step.operation == 'split_join':
+            lines.append("    value = ' '.join(value.split())")
+        elif step.operation == 'normalize_unicode':
+            form_name = '_form_%d' % index
+            namespace[form_name] = step.args[0]
+            # Normalization leaves ASCII strings unchanged.
+            lines.append('    if not _is_ascii(value):')
+            lines.append(
+                '        value = _normalize(%s, value)' % form_name
+            )
+            namespace['_is_ascii'] = _is_ascii
+        elif step.operation == 'replace':
+            pattern, replacement, flags = step.args
+            regex_name = '_regex_%d' % index
+            replacement_name = '_replacement_%d' % index
+            namespace[regex_name] = re.compile(pattern, flags)
+            namespace[replacement_name] = replacement
+            lines.append('    value = %s.sub(%s, value)' % (
+                regex_name, replacement_name
+            ))
+        else:
+            raise ValueError('Unknown cleaner "%s"' % step.operation)
+    lines.append('    return value')
+
+    source = '\n'.join(lines) + '\n'
+    exec(compile(source, '<clean_fields pipeline>', 'exec'), namespace)
+    return source, namespace['_pipeline']
+
+
+def _is_ascii(value):
+    try:
+        return value.isascii()
+    except AttributeError:
+        return all(ord(char) < 128 for char in value)
@@ -0,0 +1,286 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import defaultdict
+from functools import partial
+
+from django.db.models.signals import pre_save
+
+from clean_fields.budgets import budget
+from clean_fields.concurrency import clean_fields_concurrently
+from clean_fields.exc import CleanFieldsRegistryError
+from clean_fields.utils import (
+    FieldContext, get_deferred_field_names, get_model_label,
+    load_deferred_fields, order_by_dependencies, parse_field_ref
+)
+
+
+class CleanerRegistry(object):
+    """Keeps track of the field cleaners registered for each model.
+
+    Cleaners are stored by model label, following the convention
+    `app_name.ModelName`. Labels are compared case-insensitively, as Django
+    does when resolving lazy model references.
+
+    A single pre_save receiver is connected for each model with registered
+    cleaners. It runs the model's cleaners from a list computed on each
+    registration: cleaners are sorted by `order`, then by registration order,
+    and each cleaner is then moved after the cleaners of the fields it
+    declares in `depends_on`. A cleaner thus reads the cleaned values of
+    those fields.
+    """
+
+    def __init__(self):
+        self._cleaners = defaultdict(list)
+
+    def register(self, field_cleaner):
+        """Add a field cleaner to the registry.
+
+        The first cleaner registered for a model connects the model's pre_save
+        receiver.
+
+        Args:
+            field_cleaner (clean_fields.cleaners.FieldCleaner): the cleaner to
+                register for its model
+
+        Raise:
+            CleanFieldsDependencyError: if the cleaner's dependencies form a
+                cycle with those of the model's other cleaners
+        """
+        key = self._get_key(field_cleaner.model_label)
+        cleaners = sorted(
+            self._cleaners.get(key, []) + [field_cleaner],
+            key=lambda cleaner: cleaner.order
+        )
+        cleaners = order_by_dependencies(field_cleaner.model_label, [
+            (cleaner.field_name, cleaner.depends_on, cleaner)
+            for cleaner in cleaners
+        ])
+        if key not in self._cleaners:
+            pre_save.connect(
+                self._pre_save_receiver,
+                sender=field_cleaner.model_label,
+                weak=False
+            )
+        self._cleaners[key] = cleaners
+
+    def get_field_cleaner(self, field_ref, cleaner_name):
+        """Look up a registered cleaner by field reference and name.
+
+        Args:
+            field_ref (str): a label for the cleaned model field, following
+                the convention `app_name.ModelName.field_name`
+            cleaner_name (str): the name of the cleaner callable
+
+        Raise:
+            CleanFieldsRegistryError: if no such cleaner is registered
+
+        Return:
+            clean_fields.cleaners.FieldCleaner
+        """
+        model_label, field_name = parse_field_ref(field_ref)
+        for field_cleaner in self.get_cleaners(model_label):
+            if field_cleaner.field_name == field_name and \
+                    field_cleaner.cleaner_name == cleaner_name:
+                return field_cleaner
+        raise CleanFieldsRegistryError(field_ref, cleaner_name)
+
+    def get_model_labels(self):
+        """Return the (lowercased) labels of models with registered cleaners.
+
+        Return:
+            list of str
+        """
+        return sorted(self._cleaners)
+
+    def get_cleaners(self, model):
+        """Return the field cleaners registered for the given model.
+
+        Args:
+            model: a model class, a model instance, or a model label following
+                the convention `app_name.ModelName`
+
+        Return:
+            list of clean_fields.cleaners.FieldCleaner
+        """
+        return list(self._cleaners.get(self._get_key(model), []))
+
+    def get_dependent_field_names(self, model, field_names):
+        """Return names of other fields whose cleaners depend on the given
+        fields.
+
+        Args:
+            model: a model class, a model instance, or a model label following
+                the convention `app_name.ModelName`
+            field_names (iterable of str): names of the fields being saved
+
+        Return:
+            list of str
+        """
+        field_names = set(field_names)
+        dependent_names = []
+        for field_cleaner in self._cleaners.get(self._get_key(model), []):
+            name = field_cleaner.field_name
+            if name not in field_names and name not in dependent_names and \
+                    field_cleaner.depends_on.intersection(field_names):
+                dependent_names.append(name)
+        return dependent_names
+
+    def clean_instance(self, instance, update_fields=None):
+        """Run all cleaners registered for the instance's model, in order.
+
+        Context cleaners share a single, live mapping of the instance's
+        fields, so they read the values cleaned by the cleaners that ran
+        before them. If several I/O-bound cleaners without dependencies should
+        run, they first run concurrently on the shared executor (see
+        `clean_fields.concurrency`), starting from the instance's current
+        field values.
+
+        Should the save time budget be exhausted (see
+        `clean_fields.budgets`), the remaining cleaners may be skipped.
+
+        Args:
+            instance (django.db.models.Model): the model instance to clean
+            update_fields (iterable of str): if given, only run the cleaners
+                that should run when saving these fields
+        """
+        cleaners = [
+            field_cleaner
+            for field_cleaner in self.get_cleaners(instance)
+            if field_cleaner.should_clean(update_fields)
+        ]
+        if not cleaners:
+            return
+        if not instance._state.adding:
+            cleaners = self.prepare_deferred_fields(
+                instance, cleaners, update_fields
+            )
+
+        io_bound_cleaners = [
+            field_cleaner for field_cleaner in cleaners
+            if field_cleaner.io_bound and not field_cleaner.depends_on and
+            not field_cleaner._is_skipped(instance)
+        ]
+        if len(io_bound_cleaners) > 1:
+            cleaners = [
+                field_cleaner for field_cleaner in cleaners
+                if field_cleaner not in io_bound_cleaners
+            ]
+            clean_fields_concurrently(instance, [
+                (
+                    field_cleaner.field_name,
+                    partial(field_cleaner.clean_value, instance)
+                )
+                for field_cleaner in io_bound_cleaners
+                if not budget.restricts_cleaners or
+                budget.allows(instance, field_cleaner.identity)
+            ])
+
+        context = FieldContext(instance)
+        for field_cleaner in cleaners:
+            if not budget.restricts_cleaners or \
+                    budget.allows(instance, field_cleaner.identity):
+                field_cleaner.clean(instance, context=context)
+
+    def get_read_field_names(self, model, field_names=None):
+        """Return names of the fields read by cleaners that run when saving
+        the given fields: the cleaned fields and their declared dependencies.
+
+        Args:
+            model: a model class, a model instance, or a model label following
+                the convention `app_name.ModelName`
+            field_names (iterable of str): names of the fields being saved, or
+                None if all fields are
+
+        Return:
+            set of str
+        """
+        read_names = set()
+        for field_cleaner in self._cleaners.get(self._get_key(model), []):
+            if field_cleaner.should_clean(field_names):
+                read_names.add(field_cleaner.field_name)
+                read_names.update(field_cleaner.depends_on)
+        return read_names
+
+    @staticmethod
+    def prepare_deferred_fields(instance, cleaners, update_fields):
+        """Skip the cleaners of deferred fields that are not saved, and load
+        the deferred fields read by the other cleaners in a single query.
+
+        An instance loaded with `.only()` or `.defer()` would otherwise issue
+        a query per deferred field read by its cleaners.
+
+        Args:
+            instance (django.db.models.Model): the model instance to clean
+            cleaners (list of clean_fields.cleaners.FieldCleaner): the
+                cleaners that should run
+            update_fields (iterable of str): names of the fields being saved,
+                or None if all fields are
+
+        Return:
+            list of clean_fields.cleaners.FieldCleaner
+        """
+        deferred_names = set(get_deferred_field_names(instance))
+        if not deferred_names:
+            return cleaners
+        cleaners = [
+            field_cleaner for field_cleaner in cleaners
+            if field_cleaner.field_name not in deferred_names or (
+                update_fields is not None and
+                field_cleaner.field_name in update_fields
+            )
+        ]
+        read_names = set()
+        for field_cleaner in cleaners:
+            read_names.add(field_cleaner.field_name)
+            read_names.update(field_cleaner.depends_on)
+        load_deferred_fields([instance], read_names & deferred_names)
+        return cleaners
+
+    def clean_instances(self, model, instances, field_names=None):
+        """Run all cleaners registered for a model over the given instances.
+
+        Args:
+            model: a model class, a model instance, or a model label following
+                the convention `app_name.ModelName`
+            instances (list): instances of the model to clean
+            field_names (iterable of str): if given, only run the cleaners
+                that should run when saving these fields
+        """
+        for field_cleaner in self._cleaners.get(self._get_key(model), []):
+            if field_cleaner.should_clean(field_names):
+                field_cleaner.clean_batch(instances)
+
+    def _pre_save_receiver(self, sender, instance, update_fields=None,
+                           **kwargs):
+        """Clean the saved instance's fields, unless they were already cleaned
+        asynchronously (see `clean_fields.aio`).
+        """
+        if instance.__dict__.get('_clean_fields_skip_cleaning'):
+            return
+        started = budget.start_save(instance)
+        try:
+            self.clean_instance(instance, update_fields=update_fields)
+        finally:
+            if started:
+                budget.end_save(instance)
+
+    @staticmethod
+    def _get_key(model):
+        """Normalize a model, model instance or model label to a lookup key."""
+        if hasattr(model, '_meta'):
+            model = get_model_label(model)
+        return model.lower()
+
+
+registry = CleanerRegistry()
+
+
+def get_registered_cleaner(field_ref, cleaner_name):
+    """Look up a cleaner in the default registry; used to unpickle cleaners.
+
+    See `CleanerRegistry.get_field_cleaner`.
+    """
+    return registry.get_field_cleaner(field_ref, cleaner_name)
@@ -0,0 +1,184 @@
+"""Cleaning of raw rows of field values, without instantiating models.
+
+Example:
+
+    import csv
+    from itertools import islice
+
+    from clean_fields import clean_rows
+
+    rows = clean_rows(Article, csv.DictReader(open('articles.csv')))
+    while True:
+        batch = [Article(**row) for row in islice(rows, 1000)]
+        if not batch:
+            break
+        Article.objects.bulk_create(batch)
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from django.db.models.base import ModelState
+
+from clean_fields.registry import registry
+
+
+_stand_in_classes = {}
+
+
+def clean_rows(model, rows, field_names=None):
+    """Clean rows of field values as if saving new instances of model.
+
+    Every cleaner configured for the model runs over each row: model cleaners
+    (such as `clean_{field_name}` methods) first, followed by the cleaners
+    registered via the decorators, as on a regular `save()`. Rows are
+    cleaned one at a time, as they are consumed, so an iterable of any size
+    can be streamed through in constant memory.
+
+    Rather than the model itself, cleaners receive a lightweight stand-in
+    for each row (see `RowStandIn`), which is much cheaper to create than a
+    model instance. Any field missing from a row which a cleaner reads takes
+    its default value, as it would on a new instance, and is included in the
+    cleaned row.
+
+    Args:
+        model (django.db.models.Model): the model class whose cleaners to run
+        rows (iterable of dict): the field values of each row, keyed by field
+            name (or attribute name, such as `author_id` for a foreign key
+            named `author`)
+        field_names (iterable of str): if given, only run the cleaners that
+            should run when saving these fields
+
+    Return:
+        generator of dict, the cleaned values of each row
+    """
+    stand_in_class = get_stand_in_class(model)
+    cleans_single_fields = hasattr(stand_in_class, 'clean_single_fields')
+    if field_names is not None:
+        field_names = list(field_names)
+    for row in rows:
+        stand_in = stand_in_class.from_row(row)
+        if cleans_single_fields:
+            stand_in.clean_single_fields(field_names=field_names)
+        registry.clean_instance(stand_in, update_fields=field_names)
+        yield stand_in.to_row()
+
+
+class RowStandIn(object):
+    """Stands in for a model instance while cleaning a row of field values.
+
+    Subclasses are built for each model by `get_stand_in_class`, and inherit
+    from the model itself, so that cleaners may read fields, call other
+    methods (including overridden ones, with `super()`) and check
+    `isinstance` as they would on a model instance. The row's values are the
+    stand-in's attributes.
+
+    Related objects are only available if given in the row: reading a
+    foreign key whose row only holds the related object's id raises
+    AttributeError rather than querying the database.
+    """
+    # Names and attribute names of the model's fields, set by
+    # `get_stand_in_class`.
+    _row_field_names = frozenset()
+
+    @classmethod
+    def from_row(cls, row):
+        """Create a stand-in holding a copy of the row's values."""
+        stand_in = object.__new__(cls)
+        stand_in.__dict__.update(row)
+        stand_in._state = ModelState()
+        return stand_in
+
+    def to_row(self):
+        """Return the stand-in's field values, leaving out any other
+        attribute (such as values memoized by cleaners).
+
+        Return:
+            dict
+        """
+        row_field_names = self._row_field_names
+        return dict(
+            (name, value) for name, value in self.__dict__.items()
+            if name in row_field_names
+        )
+
+    def __repr__(self):
+        return '<{}: {}>'.format(type(self).__name__, self.to_row())
+
+
+class _RowFieldAttribute(object):
+    """Replaces the model's descriptor of a field attribute on stand-ins.
+
+    Values given in the row are read directly from the stand-in's
+    `__dict__`; this descriptor is only reached for missing attributes,
+    which never query the database.
+
+    Args:
+        name (str): the attribute's name
+        field (django.db.models.Field): the concrete field stored in the
+            attribute, or None for other relations
+    """
+
+    def __init__(self, name, field):
+        self.name = name
+        self.field = field
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        field = self.field
+        if field is None or (field.is_relation and self.name == field.name):
+            raise AttributeError(
+                'Row of "{}" has no related object "{}"'.format(
+                    instance._meta.object_name, self.name
+                )
+            )
+        if field.is_relation and field.name in instance.__dict__:
+            related_object = instance.__dict__[field.name]
+            return None if related_object is None else related_object.pk
+        value = instance.__dict__[self.name] = field.get_default()
+        return value
+
+
+def get_stand_in_class(model):
+    """Return the RowStandIn subclass for a model, built once per model.
+
+    The subclass inherits from the model, but is created without the model
+    metaclass' machinery, so it is neither registered as a model nor
+    contributes fields. Attributes giving access to fields are replaced, so
+    that missing fields take their defaults instead of being queried.
+
+    Args:
+        model (django.db.models.Model): a registered model class
+
+    Return:
+        type
+    """
+    stand_in_class = _stand_in_classes.get(model)
+    if stand_in_class is None:
+        namespace = {'__module__': model.__module__}
+        row_field_names = set()
+        for field in model._meta.get_fields():
+            if field.concrete:
+                row_field_names.update([field.name, field.attname])
+                namespace[field.name] = _RowFieldAttribute(field.name, field)
+                namespace[field.attname] = _RowFieldAttribute(
+                    field.attname, field
+                )
+            else:
+                namespace[field.name] = _RowFieldAttribute(field.name, None)
+            if hasattr(field, 'get_accessor_name'):
+                accessor_name = field.get_accessor_name()
+                if accessor_name:
+                    namespace[accessor_name] = _RowFieldAttribute(
+                        accessor_name, None
+                    )
+        namespace['_row_field_names'] = frozenset(row_field_names)
+        stand_in_class = _stand_in_classes[model] = type.__new__(
+            type(model),
+            str('{}Row'.format(model.__name__)),
+            (RowStandIn, model),
+            namespace
+        )
+    return stand_in_class
@@ -3,6 +3,20 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from django.db.models import QuerySet
+
+from clean_fields.exc import CleanFieldsDependencyError
+
+
+SNAPSHOT_ATTRIBUTE = '_clean_fields_snapshot'
+
 
 class NoValue(object):
     """Empty class for disambiguating calls to getattr"""
@@ -35,7 +49,8 @@ def get_model_field_names(instance):
     rely on `_meta`'s `get_all_field_names` method.
 
     Args:
-        instance (django.db.models.Model): an instance of a registered model
+        instance (django.db.models.Model): a registered model class, or an
+            instance of one
 
     Return:
         list of str
@@ -47,6 +62,228 @@ def get_model_field_names(instance):
     return field_names
 
 
+class FieldContext(Mapping):
+    """A read-only mapping of a model instance's columns to their values.
+
+    Values are read from the instance only when accessed, and always reflect
+    the instance's current state. This allows passing the context to several
+    cleaners without copying every field value beforehand, even as earlier
+    cleaners modify the instance.
+
+    The mapping's keys are the attribute names of the model's concrete
+    fields, so a foreign key `author` appears as `author_id`, and iterating
+    over the context never fetches related objects. Forward relations (such
+    as `author`, or a many-to-many field) may still be looked up explicitly
+    by name, which fetches them as the instance's attribute would. Reverse
+    relations are left out entirely.
+
+    Args:
+        instance (django.db.models.Model): an instance of a registered model
+    """
+    _field_names = {}
+
+    def __init__(self, instance):
+        self._instance = instance
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return get_model_field_value(self._instance, key)
+
+    def __iter__(self):
+        return iter(self._get_field_names()[0])
+
+    def __len__(self):
+        return len(self._get_field_names()[0])
+
+    def __contains__(self, key):
+        column_names, relation_names = self._get_field_names()
+        return key in column_names or key in relation_names
+
+    def _get_field_names(self):
+        """Return the model's column names and forward relation names,
+        computed once per model class.
+
+        Return:
+            2-tuple of an OrderedDict, whose keys are the column names, and a
+            frozenset of relation names
+        """
+        model = type(self._instance)
+        field_names = self._field_names.get(model)
+        if field_names is None:
+            meta = model._meta
+            column_names = OrderedDict.fromkeys(
+                field.attname for field in meta.concrete_fields
+            )
+            relation_names = frozenset(
+                field.name for field in meta.get_fields()
+                if field.is_relation and not field.auto_created and
+                field.name not in column_names
+            )
+            field_names = self._field_names[model] = (
+                column_names, relation_names
+            )
+        return field_names
+
+
+def take_field_snapshot(instance, name=SNAPSHOT_ATTRIBUTE):
+    """Record the current values of the instance's loaded concrete fields.
+
+    The snapshot is stored on the instance and later compared by
+    `get_changed_field_names`.
+
+    Args:
+        instance (django.db.models.Model): an instance of a registered model
+        name (str): the instance attribute storing the snapshot, so that
+            snapshots taken for different purposes do not overwrite each
+            other
+    """
+    setattr(instance, name, get_concrete_field_values(instance))
+
+
+def refresh_field_snapshot(instance, field_names, name=SNAPSHOT_ATTRIBUTE):
+    """Record the current values of the named fields in the snapshot,
+    keeping the recorded values of the other fields.
+
+    Fields missing from the snapshot count as changed, so without a previous
+    snapshot, the other fields are still cleaned and saved.
+
+    Args:
+        instance (django.db.models.Model): an instance of a registered model
+        field_names (iterable of str): names (or attribute names, such as
+            `author_id` for a foreign key named `author`) of the fields to
+            record, such as the `update_fields` of a save
+        name (str): the instance attribute storing the snapshot
+    """
+    field_names = set(field_names)
+    instance_values = instance.__dict__
+    snapshot = dict(instance_values.get(name) or {})
+    for field in instance._meta.concrete_fields:
+        if (field.name in field_names or field.attname in field_names) and \
+                field.attname in instance_values:
+            snapshot[field.attname] = instance_values[field.attname]
+    setattr(instance, name, snapshot)
+
+
+def get_concrete_field_values(instance):
+    """Return the values of the instance's loaded concrete fields.
+
+    Values are read from the instance's `__dict__`, so deferred fields are
+    never loaded and related objects are never fetched.
+
+    Args:
+        instance (django.db.models.Model): an instance of a registered model
+
+    Return:
+        dict mapping attribute names (such as `author_id` for a foreign key
+        named `author`) to values
+    """
+    instance_values = instance.__dict__
+    return dict(
+        (field.attname, instance_values[field.attname])
+        for field in instance._meta.concrete_fields
+        if field.attname in instance_values
+    )
+
+
+def get_deferred_field_names(instance):
+    """Return names of the concrete fields deferred when loading instance.
+
+    Reading such a field (with `.only()` or `.defer()`) makes Django issue a
+    query for it.
+
+    Args:
+        instance (django.db.models.Model): an instance of a registered model
+
+    Return:
+        list of str
+    """
+    instance_values = instance.__dict__
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if field.attname not in instance_values
+    ]
+
+
+def load_deferred_fields(instances, field_names):
+    """Load the deferred values of the named fields, in a single query.
+
+    Instances are expected to share a model and a database. Fields that are
+    already loaded, and names of non-concrete fields, are ignored.
+
+    Args:
+        instances (list): model instances, possibly loaded with `.only()` or
+            `.defer()`
+        field_names (iterable of str): names of the fields to load
+    """
+    instances = [obj for obj in instances if obj.pk is not None]
+    if not instances:
+        return
+    meta = instances[0]._meta
+    field_names = set(field_names)
+    attnames = [
+        field.attname for field in meta.concrete_fields
+        if field.name in field_names and any(
+            field.attname not in obj.__dict__ for obj in instances
+        )
+    ]
+    if not attnames:
+        return
+
+    queryset = QuerySet(meta.model, using=instances[0]._state.db)
+    rows = dict(
+        (row[0], row[1:]) for row in queryset.filter(
+            pk__in=[obj.pk for obj in instances]
+        ).values_list('pk', *attnames)
+    )
+    for obj in instances:
+        values = rows.get(obj.pk)
+        if values is None:
+            continue
+        for attname, value in zip(attnames, values):
+            obj.__dict__.setdefault(attname, value)
+
+
+def get_changed_field_names(instance, name=SNAPSHOT_ATTRIBUTE):
+    """Return names of the fields whose values changed since the last snapshot.
+
+    Note that in-place modifications of mutable values (such as a dictionary
+    stored in a JSON field) cannot be detected.
+
+    Args:
+        instance (django.db.models.Model): an instance of a registered model
+        name (str): the instance attribute storing the snapshot
+
+    Return:
+        list of str, or None if no snapshot was taken
+    """
+    snapshot = instance.__dict__.get(name)
+    if snapshot is None:
+        return None
+    instance_values = instance.__dict__
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if field.attname in instance_values and (
+            field.attname not in snapshot or
+            snapshot[field.attname] != instance_values[field.attname]
+        )
+    ]
+
+
+def get_model_label(model):
+    """Return the label of a model, following the convention
+    `app_name.ModelName`.
+
+    Args:
+        model (django.db.models.Model): a registered model class, or an
+            instance of one
+
+    Return:
+        str
+    """
+    return '.'.join([model._meta.app_label, model._meta.object_name])
+
+
 def parse_field_ref(field_ref):
     """Split a field reference into a model label and a field name.
 
@@ -60,3 +297,35 @@ def parse_field_ref(field_ref):
     app_name, model_name, field_name = field_ref.split('.')
     model_label = '.'.join([app_name, model_name])
     return model_label, field_name
+
+
+def order_by_dependencies(model_label, items):
+    """Order cleaners so that each runs after the cleaners of fields it reads.
+
+    The given order is otherwise preserved: of the items whose dependencies
+    are all cleaned, the earliest one comes next.
+
+    Args:
+        model_label (str): label of the cleaned model, for error messages
+        items (list): 3-tuples of the cleaned field's name, the names of the
+            fields its cleaner reads, and any value to order
+
+    Raise:
+        CleanFieldsDependencyError: if the dependencies are circular
+
+    Return:
+        list of the ordered values
+    """
+    pending = list(items)
+    ordered = []
+    while pending:
+        pending_names = set(field_name for field_name, _, _ in pending)
+        for index, (field_name, dependencies, _) in enumerate(pending):
+            if pending_names.isdisjoint(set(dependencies) - {field_name}):
+                ordered.append(pending.pop(index)[2])
+                break
+        else:
+            raise CleanFieldsDependencyError(
+                model_label, sorted(pending_names)
+            )
+    return ordered
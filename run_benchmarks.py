@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""Measure the overhead clean_fields adds to saving models.
+
+Each benchmark saves into an in-memory SQLite database, and its duration is
+reported along with its ratio to the same operation on a plain model with as
+many fields. Ratios, unlike durations, are comparable across machines: they
+are stored as baselines with --save-baseline, and checked against the stored
+baselines with --compare.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import django
+from django.conf import settings
+
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json'
+)
+BULK_SIZES = (10, 100, 1000)
+DEFAULT_TOLERANCE = 0.25
+
+
+def setup_database():
+    settings.configure(
+        INSTALLED_APPS=['benchmarks'],
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            },
+        },
+    )
+    django.setup()
+
+    from django.db import connection
+    from benchmarks.models import BENCHMARK_MODELS
+    with connection.schema_editor() as schema_editor:
+        for model in BENCHMARK_MODELS.values():
+            schema_editor.create_model(model)
+
+
+def make_instance(model, field_count):
+    from benchmarks.models import get_field_names
+    return model(**{
+        field_name: '  value  ' for field_name in get_field_names(field_count)
+    })
+
+
+def make_save(model, field_count):
+    instance = make_instance(model, field_count)
+    instance.save()
+    return instance.save
+
+
+def make_bulk_create(model, field_count, bulk_size):
+    def bulk_create():
+        model.objects.bulk_create([
+            make_instance(model, field_count) for _ in range(bulk_size)
+        ])
+    return bulk_create
+
+
+def get_operations(model, field_count):
+    """Return the name, callable and batch size of each operation."""
+    operations = [('save', make_save(model, field_count), 1)]
+    for bulk_size in BULK_SIZES:
+        operations.append((
+            'bulk_create[%d]' % bulk_size,
+            make_bulk_create(model, field_count, bulk_size),
+            bulk_size
+        ))
+    return operations
+
+
+def run_benchmarks(number, repeat):
+    """Time every benchmark against the plain model with as many fields.
+
+    Timings of a benchmark and of its plain counterpart are interleaved, so
+    that both are equally affected by the load of the machine.
+
+    Return:
+        list of (name, seconds per operation, ratio to the plain model)
+    """
+    from benchmarks.models import BENCHMARK_MODELS
+
+    results = []
+    for (style, field_count, cleaner_count), model in BENCHMARK_MODELS.items():
+        if style == 'plain':
+            continue
+        plain_model = BENCHMARK_MODELS['plain', field_count, 0]
+        operations = zip(
+            get_operations(plain_model, field_count),
+            get_operations(model, field_count)
+        )
+        for (name, plain_operation, size), (_, operation, _) in operations:
+            runs = max(1, number // size)
+            plain_timings, timings = [], []
+            for _ in range(repeat):
+                plain_timings.append(
+                    timeit.timeit(plain_operation, number=runs)
+                )
+                timings.append(timeit.timeit(operation, number=runs))
+            seconds = min(timings) / runs
+            results.append((
+                '%s/%s/%d-fields/%d-cleaners' % (
+                    name, style, field_count, cleaner_count
+                ),
+                seconds,
+                min(timings) / min(plain_timings)
+            ))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the names of benchmarks slower than their baseline ratio."""
+    regressions = []
+    for name, _, ratio in results:
+        expected = baseline.get(name)
+        if expected is not None and ratio > expected * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--number', type=int, default=200,
+        help='operations per timing (divided by the size of bulk operations)'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='timings per benchmark; the fastest one is kept'
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='store the measured ratios as the new baselines'
+    )
+    parser.add_argument(
+        '--compare', action='store_true',
+        help='exit with an error if a ratio exceeds its baseline'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='allowed relative increase over a baseline ratio'
+    )
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    setup_database()
+    results = run_benchmarks(args.number, args.repeat)
+    for name, seconds, ratio in results:
+        print('%-50s %10.1f us %7.2fx' % (name, seconds * 1e6, ratio))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(
+                dict((name, round(ratio, 2)) for name, _, ratio in results),
+                baseline_file, indent=2, sort_keys=True
+            )
+            baseline_file.write('\n')
+
+    if args.compare:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.tolerance)
+        for name in regressions:
+            print('Regression: %s (baseline %.2fx)' % (name, baseline[name]))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
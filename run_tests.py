@@ -9,7 +9,15 @@ from django.test.utils import get_runner
 
 def run_tests(test_labels=None):
     test_labels = test_labels or ['tests']
-    settings.configure(INSTALLED_APPS=['tests'])
+    settings.configure(
+        INSTALLED_APPS=['tests'],
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            },
+        },
+    )
     django.setup()
     TestRunner = get_runner(settings)
     test_runner = TestRunner()
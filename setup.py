@@ -18,7 +18,7 @@ setup(
     license='MIT',
     description='A Django utility to clean model field values on save.',
     long_description=long_description,
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['benchmarks', 'tests']),
     install_requires=['Django>=1.7'],
     test_suite='run_tests.run_tests',
     tests_require=['mock==2.0.0'],
@@ -0,0 +1,211 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+from unittest import TestCase
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import models
+from django.db.models.signals import pre_save
+from mock import patch
+
+from clean_fields.aio import clean_instance_async
+from clean_fields.decorators import (
+    cleans_field, cleans_field_with_context, conditional_cleaner
+)
+from clean_fields.models import CleanFieldsModel
+
+
+class CleanInstanceAsyncTestCase(TestCase):
+    def test_awaits_model_and_registered_cleaners(self):
+        class AsyncCleanersModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            async def clean_some_field(self):
+                return self.some_field + 1
+
+            @cleans_field('tests.AsyncCleanersModel.some_field')
+            async def double(self, some_field):
+                return some_field * 2
+
+            @cleans_field('tests.AsyncCleanersModel.other_field')
+            def negate(self, other_field):
+                return -other_field
+
+        dummy = AsyncCleanersModel(some_field=5, other_field=6)
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(dummy.some_field, 12)
+        self.assertEqual(dummy.other_field, -6)
+
+    def test_fields_cleaned_concurrently(self):
+        events = []
+
+        class ConcurrentAsyncModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        @cleans_field('tests.ConcurrentAsyncModel.some_field')
+        async def clean_some_field(some_field):
+            events.append('some_field started')
+            await asyncio.sleep(0)
+            events.append('some_field finished')
+            return some_field
+
+        @cleans_field('tests.ConcurrentAsyncModel.other_field')
+        async def clean_other_field(other_field):
+            events.append('other_field started')
+            await asyncio.sleep(0)
+            events.append('other_field finished')
+            return other_field
+
+        dummy = ConcurrentAsyncModel(some_field=5, other_field=6)
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(
+            events[:2],
+            ['some_field started', 'other_field started']
+        )
+
+    def test_context_cleaners_run_last(self):
+        class ContextAsyncModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        @cleans_field_with_context('tests.ContextAsyncModel.other_field')
+        async def clean_other_field(other_field, data):
+            return other_field + data['some_field']
+
+        @cleans_field('tests.ContextAsyncModel.some_field')
+        async def clean_some_field(some_field):
+            return some_field * 10
+
+        dummy = ContextAsyncModel(some_field=5, other_field=6)
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(dummy.other_field, 56)
+
+    def test_dependencies_cleaned_first(self):
+        class DependentAsyncModel(CleanFieldsModel):
+            title = models.CharField(max_length=20)
+            slug = models.CharField(max_length=20)
+            clean_field_dependencies = {'slug': ['title']}
+
+            async def clean_title(self):
+                await asyncio.sleep(0)
+                return self.title.strip('-')
+
+            async def clean_slug(self):
+                return self.title
+
+        dummy = DependentAsyncModel(title='--Hi-there-', slug='')
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(dummy.slug, 'Hi-there')
+
+        class DependentRegisteredAsyncModel(models.Model):
+            title = models.CharField(max_length=20)
+            slug = models.CharField(max_length=20)
+
+            @cleans_field(
+                'tests.DependentRegisteredAsyncModel.slug',
+                depends_on=['title']
+            )
+            async def slugify(self, slug):
+                return self.title
+
+        @cleans_field('tests.DependentRegisteredAsyncModel.title')
+        async def strip(title):
+            await asyncio.sleep(0)
+            return title.strip('-')
+
+        dummy = DependentRegisteredAsyncModel(title='--Hi-there-', slug='')
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(dummy.slug, 'Hi-there')
+
+    def test_guarded_cleaners_skipped(self):
+        class GuardedAsyncModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            third_field = models.IntegerField()
+
+            @conditional_cleaner(when=lambda obj: obj.some_field > 10)
+            async def clean_some_field(self):
+                return self.some_field + 1
+
+            @cleans_field(
+                'tests.GuardedAsyncModel.other_field',
+                when=lambda obj: obj.other_field > 10
+            )
+            async def negate(self, other_field):
+                return -other_field
+
+            @cleans_field_with_context(
+                'tests.GuardedAsyncModel.third_field',
+                when=lambda obj: obj.third_field > 10
+            )
+            async def add_some_field(self, third_field, data):
+                return third_field + data['some_field']
+
+        dummy = GuardedAsyncModel(some_field=5, other_field=6, third_field=7)
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(
+            (dummy.some_field, dummy.other_field, dummy.third_field),
+            (5, 6, 7)
+        )
+
+        dummy = GuardedAsyncModel(
+            some_field=15, other_field=16, third_field=17
+        )
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(
+            (dummy.some_field, dummy.other_field, dummy.third_field),
+            (16, -16, 33)
+        )
+
+
+class AsaveTestCase(TestCase):
+    def test_asave_is_coroutine_function(self):
+        class CoroutineAsaveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+        self.assertTrue(iscoroutinefunction(CoroutineAsaveModel.asave))
+        self.assertTrue(iscoroutinefunction(CoroutineAsaveModel().asave))
+
+    @patch('django.db.models.Model.save')
+    def test_asave_cleans_once(self, mock_save):
+        calls = []
+
+        class AsaveNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            async def clean_some_field(self):
+                calls.append(self.some_field)
+                return self.some_field + 1
+
+            @cleans_field('tests.AsaveNaiveModel.some_field')
+            def double(self, some_field):
+                calls.append(some_field)
+                return some_field * 2
+
+        def send_pre_save(*args, **kwargs):
+            pre_save.send(AsaveNaiveModel, instance=dummy)
+        mock_save.side_effect = send_pre_save
+
+        dummy = AsaveNaiveModel(some_field=5)
+        async_to_sync(dummy.asave)(update_fields=['some_field'])
+        self.assertEqual(dummy.some_field, 12)
+        self.assertEqual(calls, [5, 6])
+        mock_save.assert_called_once_with(update_fields=['some_field'])
+        self.assertNotIn('_clean_fields_skip_cleaning', dummy.__dict__)
+
+    def test_save_resolves_async_cleaners(self):
+        class SyncSaveAsyncModel(models.Model):
+            some_field = models.IntegerField()
+
+            @cleans_field('tests.SyncSaveAsyncModel.some_field')
+            async def clean_some_field(self, some_field):
+                return some_field + 1
+
+        dummy = SyncSaveAsyncModel(some_field=5)
+        pre_save.send(SyncSaveAsyncModel, instance=dummy)
+        self.assertEqual(dummy.some_field, 6)
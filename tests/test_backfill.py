@@ -0,0 +1,207 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import models
+from mock import MagicMock, Mock, patch
+
+from clean_fields.backfill import (
+    BackfillProgress, backfill, read_checkpoint, write_checkpoint
+)
+from clean_fields.decorators import cleans_field
+from clean_fields.exc import CleanFieldsCheckpointError
+from clean_fields.models import FieldSnapshotMixin
+from clean_fields.management.commands.clean_fields_backfill import Command
+
+
+class BackfillModel(models.Model):
+    some_field = models.CharField(max_length=10)
+    other_field = models.CharField(max_length=10)
+
+
+@cleans_field('tests.BackfillModel.some_field')
+def strip_some_field(some_field):
+    return some_field.strip()
+
+
+@cleans_field('tests.BackfillModel.other_field')
+def strip_other_field(other_field):
+    return other_field.strip()
+
+
+def make_rows(*values):
+    return [
+        BackfillModel(pk=pk, some_field=value, other_field=value)
+        for pk, value in enumerate(values, 1)
+    ]
+
+
+@patch('clean_fields.backfill.transaction', MagicMock())
+@patch('django.db.models.QuerySet.bulk_update')
+@patch('clean_fields.backfill._get_chunk')
+class BackfillTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint_path = os.path.join(self.directory, 'checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_updates_changed_rows_only(self, mock_get_chunk, mock_update):
+        rows = make_rows(' a ', 'b', ' c')
+        mock_get_chunk.side_effect = [rows[:2], rows[2:]]
+        progress = backfill(BackfillModel, chunk_size=2)
+        self.assertEqual(progress, BackfillProgress(3, 3, 2))
+        self.assertEqual(
+            [call[0] for call in mock_update.call_args_list],
+            [
+                ([rows[0]], ['some_field', 'other_field']),
+                ([rows[2]], ['some_field', 'other_field']),
+            ]
+        )
+        self.assertEqual(
+            [call[0][1:] for call in mock_get_chunk.call_args_list],
+            [(None, 2), (2, 2)]
+        )
+
+    def test_field_names(self, mock_get_chunk, mock_update):
+        rows = make_rows(' a ')
+        mock_get_chunk.side_effect = [rows]
+        backfill(BackfillModel, field_names=['some_field'])
+        mock_update.assert_called_once_with(rows, ['some_field'])
+        self.assertEqual(rows[0].other_field, ' a ')
+
+    def test_runs_changed_only_cleaners(self, mock_get_chunk, mock_update):
+        class ChangedOnlyBackfillModel(FieldSnapshotMixin, models.Model):
+            some_field = models.CharField(max_length=10)
+
+        @cleans_field(
+            'tests.ChangedOnlyBackfillModel.some_field', changed_only=True
+        )
+        def strip(some_field):
+            return some_field.strip()
+
+        row = ChangedOnlyBackfillModel.from_db(
+            'default', ['id', 'some_field'], [1, ' a ']
+        )
+        mock_get_chunk.side_effect = [[row]]
+        progress = backfill(ChangedOnlyBackfillModel)
+        self.assertEqual(progress, BackfillProgress(1, 1, 1))
+        mock_update.assert_called_once_with([row], ['some_field'])
+        self.assertEqual(row.some_field, 'a')
+
+    def test_stops_on_empty_chunk(self, mock_get_chunk, mock_update):
+        mock_get_chunk.side_effect = [make_rows('a', 'b'), []]
+        progress = backfill(BackfillModel, chunk_size=2)
+        self.assertEqual(progress, BackfillProgress(2, 2, 0))
+        self.assertFalse(mock_update.called)
+
+    def test_callback_and_delay(self, mock_get_chunk, mock_update):
+        rows = make_rows(' a ', 'b', 'c')
+        mock_get_chunk.side_effect = [rows[:2], rows[2:]]
+        callback = Mock()
+        with patch('clean_fields.backfill.time.sleep') as mock_sleep:
+            backfill(BackfillModel, chunk_size=2, delay=0.5, callback=callback)
+        mock_sleep.assert_called_once_with(0.5)
+        self.assertEqual(
+            [call[0][0] for call in callback.call_args_list],
+            [BackfillProgress(2, 2, 1), BackfillProgress(3, 3, 1)]
+        )
+
+    def test_resumes_from_checkpoint(self, mock_get_chunk, mock_update):
+        mock_get_chunk.side_effect = [make_rows('a', 'b')[:1], []]
+        backfill(
+            BackfillModel, chunk_size=1, checkpoint_path=self.checkpoint_path
+        )
+        self.assertEqual(
+            read_checkpoint(self.checkpoint_path, BackfillModel, None), 1
+        )
+
+        mock_get_chunk.reset_mock()
+        mock_get_chunk.side_effect = [[]]
+        backfill(
+            BackfillModel, chunk_size=1, checkpoint_path=self.checkpoint_path
+        )
+        self.assertEqual(mock_get_chunk.call_args[0][1:], (1, 1))
+
+
+class CheckpointTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint_path = os.path.join(self.directory, 'checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missing_checkpoint(self):
+        self.assertIsNone(
+            read_checkpoint(self.checkpoint_path, BackfillModel, None)
+        )
+
+    def test_write_checkpoint(self):
+        write_checkpoint(
+            self.checkpoint_path, 'tests.BackfillModel', ['some_field'], 42
+        )
+        with open(self.checkpoint_path) as checkpoint_file:
+            self.assertEqual(json.load(checkpoint_file), {
+                'model': 'tests.BackfillModel',
+                'fields': ['some_field'],
+                'last_pk': 42,
+            })
+        self.assertEqual(os.listdir(self.directory), ['checkpoint'])
+
+    def test_read_checkpoint_of_other_backfill(self):
+        write_checkpoint(
+            self.checkpoint_path, 'tests.BackfillModel', ['some_field'], 42
+        )
+        with self.assertRaises(CleanFieldsCheckpointError):
+            read_checkpoint(self.checkpoint_path, BackfillModel, None)
+
+
+class BackfillCommandTestCase(TestCase):
+    @patch('clean_fields.management.commands.clean_fields_backfill.backfill')
+    def test_backfill_field(self, mock_backfill):
+        mock_backfill.return_value = BackfillProgress(10, 10, 4)
+        call_command(
+            Command(),
+            'tests.BackfillModel.some_field',
+            chunk_size=5,
+            checkpoint='progress.json',
+            sleep=0.1,
+            stdout=Mock()
+        )
+        mock_backfill.assert_called_once_with(
+            BackfillModel,
+            field_names=['some_field'],
+            chunk_size=5,
+            checkpoint_path='progress.json',
+            delay=0.1,
+            using=None,
+            callback=mock_backfill.call_args[1]['callback']
+        )
+
+    @patch('clean_fields.management.commands.clean_fields_backfill.backfill')
+    def test_backfill_model(self, mock_backfill):
+        mock_backfill.return_value = BackfillProgress(None, 0, 0)
+        call_command(Command(), 'tests.BackfillModel', stdout=Mock())
+        self.assertIsNone(mock_backfill.call_args[1]['field_names'])
+
+    def test_invalid_targets(self):
+        for target in ('tests', 'tests.Missing', 'tests.BackfillModel.nope'):
+            with self.assertRaises(CommandError):
+                call_command(Command(), target, stdout=Mock())
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                Command(), 'tests.BackfillModel', chunk_size=0, stdout=Mock()
+            )
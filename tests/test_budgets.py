@@ -0,0 +1,346 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+
+from asgiref.sync import async_to_sync
+from django.db import models
+from django.db.models.signals import pre_save
+from mock import Mock, patch
+
+from clean_fields.aio import clean_instance_async
+from clean_fields.budgets import (
+    LOG, RAISE, SAVE_CLOCK_ATTRIBUTE, SKIP, TimeBudget, budget,
+    clear_time_budgets, set_time_budgets
+)
+from clean_fields.decorators import (
+    cleans_field, cleans_field_batch, cleans_field_with_context, pure_cleaner
+)
+from clean_fields.exc import CleanFieldsBudgetError
+from clean_fields.models import CleanFieldsModel
+
+
+IDENTITY = ('tests.Dummy', 'some_field', 'clean_some_field')
+
+
+class FakeClock(object):
+    """Stands in for `default_timer`; cleaners advance it explicitly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class BudgetTestMixin(object):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch('clean_fields.budgets.default_timer', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clear_time_budgets)
+
+    def slow(self, seconds, result):
+        def _cleaner(*args):
+            self.clock.advance(seconds)
+            return result
+        return _cleaner
+
+
+class TimeBudgetTestCase(BudgetTestMixin, TestCase):
+    def test_disabled_by_default(self):
+        self.assertFalse(TimeBudget().enabled)
+        self.assertFalse(budget.enabled)
+        cleaner = Mock(return_value='cleaned')
+        with patch('clean_fields.budgets.default_timer') as mock_timer:
+            result = TimeBudget().call(IDENTITY, 'value', cleaner, 1)
+        self.assertEqual(result, 'cleaned')
+        cleaner.assert_called_once_with(1)
+        self.assertFalse(mock_timer.called)
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            TimeBudget(cleaner=1, action='ignore')
+
+    def test_call_within_budget(self):
+        time_budget = TimeBudget(cleaner=1, action=RAISE)
+        result = time_budget.call(
+            IDENTITY, 'value', self.slow(0.5, 'cleaned')
+        )
+        self.assertEqual(result, 'cleaned')
+
+    def test_call_over_budget_logged(self):
+        time_budget = TimeBudget(cleaner=1, action=LOG)
+        with self.assertLogs('clean_fields', 'WARNING') as logs:
+            result = time_budget.call(
+                IDENTITY, 'value', self.slow(2, 'cleaned')
+            )
+        self.assertEqual(result, 'cleaned')
+        message, = logs.output
+        self.assertIn(
+            'Cleaner "clean_some_field" cleaning "some_field" of '
+            '"tests.Dummy" exceeded the cleaner time budget of 1.000s '
+            '(2.000s, value size: 5)',
+            message
+        )
+
+    def test_call_over_budget_raises(self):
+        time_budget = TimeBudget(cleaner=1, action=RAISE)
+        with self.assertRaises(CleanFieldsBudgetError):
+            time_budget.call(IDENTITY, 'value', self.slow(2, 'cleaned'))
+
+    def test_call_over_budget_skipped_during_cooldown(self):
+        time_budget = TimeBudget(cleaner=1, action=SKIP, skip_cooldown=10)
+        cleaner = Mock(side_effect=self.slow(2, 'cleaned'))
+        with self.assertLogs('clean_fields', 'WARNING') as logs:
+            result = time_budget.call(IDENTITY, 'value', cleaner)
+        self.assertEqual(result, 'cleaned')
+        self.assertIn('skipped for 10.000s', logs.output[0])
+        self.assertEqual(time_budget.skipped_cleaners, {IDENTITY: 12})
+
+        with self.assertLogs('clean_fields', 'WARNING') as logs:
+            self.assertEqual(
+                time_budget.call(IDENTITY, 'other', cleaner), 'other'
+            )
+            self.assertFalse(time_budget.allows(Mock(), IDENTITY))
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn('skipped for another 10.000s', logs.output[0])
+        self.assertEqual(cleaner.call_count, 1)
+
+        self.clock.advance(10)
+        with patch('clean_fields.budgets.logger'):
+            self.assertEqual(
+                time_budget.call(IDENTITY, 'value', cleaner), 'cleaned'
+            )
+        self.assertEqual(cleaner.call_count, 2)
+
+    def test_call_over_budget_without_cooldown_not_skipped(self):
+        time_budget = TimeBudget(cleaner=1, action=SKIP)
+        cleaner = Mock(side_effect=self.slow(2, 'cleaned'))
+        with patch('clean_fields.budgets.logger'):
+            for _ in range(2):
+                self.assertEqual(
+                    time_budget.call(IDENTITY, 'value', cleaner), 'cleaned'
+                )
+        self.assertEqual(time_budget.skipped_cleaners, {})
+        self.assertEqual(cleaner.call_count, 2)
+
+    def test_configure_ends_cooldown(self):
+        time_budget = TimeBudget(cleaner=1, action=SKIP, skip_cooldown=10)
+        cleaner = Mock(side_effect=self.slow(2, 'cleaned'))
+        with patch('clean_fields.budgets.logger'):
+            time_budget.call(IDENTITY, 'value', cleaner)
+        time_budget.configure(cleaner=1, action=SKIP, skip_cooldown=10)
+        self.assertTrue(time_budget.allows(Mock(), IDENTITY))
+
+    def test_slow_call_logged(self):
+        time_budget = TimeBudget(slow_threshold=0.1)
+        with self.assertLogs('clean_fields', 'WARNING') as logs:
+            result = time_budget.call(IDENTITY, 42, self.slow(0.2, 43))
+        self.assertEqual(result, 43)
+        message, = logs.output
+        self.assertIn(
+            'Slow cleaner "clean_some_field" cleaning "some_field" of '
+            '"tests.Dummy" took 0.200s (value size: None)',
+            message
+        )
+
+    def test_save_clock(self):
+        time_budget = TimeBudget(save=1)
+        instance = Mock()
+        self.assertTrue(time_budget.start_save(instance))
+        self.assertFalse(time_budget.start_save(instance))
+        self.assertIn(SAVE_CLOCK_ATTRIBUTE, instance.__dict__)
+        time_budget.end_save(instance)
+        self.assertNotIn(SAVE_CLOCK_ATTRIBUTE, instance.__dict__)
+
+    def test_save_clock_not_started_without_save_budget(self):
+        instance = Mock()
+        self.assertFalse(TimeBudget(cleaner=1).start_save(instance))
+        self.assertTrue(TimeBudget(cleaner=1).allows(instance, IDENTITY))
+
+    def test_save_over_budget_logged_once(self):
+        time_budget = TimeBudget(save=1, action=LOG)
+        instance = Mock()
+        time_budget.start_save(instance)
+        self.assertTrue(time_budget.allows(instance, IDENTITY))
+        self.clock.advance(2)
+        with self.assertLogs('clean_fields', 'WARNING') as logs:
+            self.assertTrue(time_budget.allows(instance, IDENTITY))
+            self.assertTrue(time_budget.allows(instance, IDENTITY))
+        message, = logs.output
+        self.assertIn(
+            'Saving "tests.Dummy" exceeded the save time budget of 1.000s '
+            '(2.000s) before cleaner "clean_some_field" cleaning '
+            '"some_field"',
+            message
+        )
+
+    def test_save_over_budget_raises(self):
+        time_budget = TimeBudget(save=1, action=RAISE)
+        instance = Mock()
+        time_budget.start_save(instance)
+        self.clock.advance(2)
+        with self.assertRaises(CleanFieldsBudgetError):
+            time_budget.allows(instance, IDENTITY)
+
+    def test_save_over_budget_skips(self):
+        time_budget = TimeBudget(save=1, action=SKIP)
+        instance = Mock()
+        time_budget.start_save(instance)
+        self.clock.advance(2)
+        with self.assertLogs('clean_fields', 'WARNING'):
+            self.assertFalse(time_budget.allows(instance, IDENTITY))
+
+    def test_set_time_budgets_configures_shared_budget(self):
+        set_time_budgets(cleaner=1, action=SKIP)
+        self.assertTrue(budget.enabled)
+        self.assertEqual((budget.cleaner, budget.action), (1, SKIP))
+        clear_time_budgets()
+        self.assertFalse(budget.enabled)
+
+
+class RegisteredCleanerBudgetTestCase(BudgetTestMixin, TestCase):
+    def test_disabled_budgets_not_checked(self):
+        class UncheckedBudgetModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        @cleans_field('tests.UncheckedBudgetModel.some_field')
+        def clean_some_field(some_field):
+            return some_field + 1
+
+        @cleans_field_with_context('tests.UncheckedBudgetModel.other_field')
+        def clean_other_field(other_field, data):
+            return other_field + 1
+
+        dummy = UncheckedBudgetModel(some_field=1, other_field=1)
+        with patch.object(budget, 'allows') as mock_allows:
+            pre_save.send(dummy.__class__, instance=dummy)
+            async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual((dummy.some_field, dummy.other_field), (3, 3))
+        self.assertFalse(mock_allows.called)
+
+    def test_slow_cleaner_skipped_during_cooldown(self):
+        class SkippedCleanerModel(models.Model):
+            some_field = models.CharField(max_length=10)
+
+        cleaner = Mock(side_effect=self.slow(2, 'cleaned'))
+        cleaner.__name__ = str('clean_some_field')
+        cleans_field('tests.SkippedCleanerModel.some_field')(cleaner)
+        set_time_budgets(cleaner=1, action=SKIP, skip_cooldown=10)
+        for expected in ['cleaned', 'value']:
+            dummy = SkippedCleanerModel(some_field='value')
+            with patch('clean_fields.budgets.logger'):
+                pre_save.send(dummy.__class__, instance=dummy)
+            self.assertEqual(dummy.some_field, expected)
+        self.assertEqual(cleaner.call_count, 1)
+
+    def test_slow_batch_discarded(self):
+        class SkippedBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field_batch('tests.SkippedBatchModel.some_field')
+        def double(values):
+            self.clock.advance(2)
+            return [value * 2 for value in values]
+
+        set_time_budgets(cleaner=1, action=RAISE)
+        dummy = SkippedBatchModel(some_field=1)
+        with self.assertRaises(CleanFieldsBudgetError):
+            pre_save.send(dummy.__class__, instance=dummy)
+
+    def test_remaining_cleaners_skipped_after_save_budget(self):
+        calls = []
+
+        class SaveBudgetModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        @cleans_field('tests.SaveBudgetModel.some_field')
+        def clean_some_field(some_field):
+            calls.append('some_field')
+            self.clock.advance(2)
+            return some_field + 1
+
+        @cleans_field_with_context('tests.SaveBudgetModel.other_field')
+        def clean_other_field(other_field, data):
+            calls.append('other_field')
+            return other_field + 1
+
+        set_time_budgets(save=1, action=SKIP)
+        dummy = SaveBudgetModel(some_field=1, other_field=1)
+        with self.assertLogs('clean_fields', 'WARNING'):
+            pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual((dummy.some_field, dummy.other_field), (2, 1))
+        self.assertEqual(calls, ['some_field'])
+        self.assertNotIn(SAVE_CLOCK_ATTRIBUTE, dummy.__dict__)
+
+
+class ModelCleanerBudgetTestCase(BudgetTestMixin, TestCase):
+    @patch('django.db.models.Model.save')
+    def test_save_budget_spans_model_cleaners(self, mock_save):
+        test_case = self
+
+        class ModelSaveBudgetModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            def clean_some_field(self):
+                test_case.clock.advance(2)
+                return self.some_field + 1
+
+            def clean_other_field(self):
+                return self.other_field + 1
+
+        set_time_budgets(save=1, action=RAISE)
+        dummy = ModelSaveBudgetModel(some_field=1, other_field=1)
+        with self.assertRaises(CleanFieldsBudgetError):
+            dummy.save()
+        self.assertFalse(mock_save.called)
+        self.assertNotIn(SAVE_CLOCK_ATTRIBUTE, dummy.__dict__)
+
+    def test_slow_pure_result_kept(self):
+        test_case = self
+        calls = []
+
+        class ModelPureBudgetModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            @pure_cleaner()
+            def clean_some_field(self):
+                calls.append(self.some_field)
+                test_case.clock.advance(2)
+                return self.some_field + 1
+
+        set_time_budgets(cleaner=1, action=SKIP, skip_cooldown=10)
+        for value, expected in [(1, 2), (1, 1), (5, 5)]:
+            dummy = ModelPureBudgetModel(some_field=value)
+            with patch('clean_fields.budgets.logger'):
+                dummy.clean_single_fields()
+            self.assertEqual(dummy.some_field, expected)
+        self.assertEqual(calls, [1])
+
+    def test_async_cleaner_over_budget(self):
+        test_case = self
+
+        class AsyncBudgetModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            async def clean_some_field(self):
+                test_case.clock.advance(2)
+                return self.some_field + 1
+
+        set_time_budgets(cleaner=1, action=SKIP, skip_cooldown=10)
+        for expected in [2, 1]:
+            dummy = AsyncBudgetModel(some_field=1)
+            with patch('clean_fields.aio.default_timer', self.clock), \
+                    patch('clean_fields.budgets.logger'):
+                async_to_sync(clean_instance_async)(dummy)
+            self.assertEqual(dummy.some_field, expected)
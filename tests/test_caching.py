@@ -0,0 +1,118 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+
+from django.core.cache import caches
+from mock import Mock, patch
+
+from clean_fields.caching import CacheInfo, LRUCache, SharedCache
+
+
+class LRUCacheTestCase(TestCase):
+    def test_call_caches_result(self):
+        cache = LRUCache(maxsize=2)
+        cleaner = Mock(return_value='cleaned')
+        self.assertEqual(cache.call('value', cleaner, 'value'), 'cleaned')
+        self.assertEqual(cache.call('value', cleaner, 'value'), 'cleaned')
+        cleaner.assert_called_once_with('value')
+        self.assertEqual(cache.info(), CacheInfo(1, 1, 2, 1))
+
+    def test_least_recently_used_value_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        cache.call('a', Mock())
+        cache.put('c', 'C')
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {0: 'A', 2: 'C'})
+
+    def test_values_of_different_types_cached_separately(self):
+        cache = LRUCache()
+        cache.put(1, 'int')
+        self.assertEqual(cache.get_many([1, 1.0, True]), {0: 'int'})
+
+    def test_unhashable_values_not_cached(self):
+        cache = LRUCache()
+        cleaner = Mock(return_value='cleaned')
+        cache.call(['value'], cleaner)
+        cache.call(['value'], cleaner)
+        self.assertEqual(cleaner.call_count, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.call('value', Mock())
+        cache.clear()
+        self.assertEqual(cache.info(), CacheInfo(0, 0, 128, 0))
+
+
+class SharedCacheTestCase(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_call_caches_result(self):
+        cache = SharedCache('default', 'cleaner')
+        cleaner = Mock(return_value='cleaned')
+        self.assertEqual(cache.call('value', cleaner, 'value'), 'cleaned')
+        self.assertEqual(cache.call('value', cleaner, 'value'), 'cleaned')
+        cleaner.assert_called_once_with('value')
+        self.assertEqual(cache.info(), CacheInfo(1, 1, None, None))
+
+    def test_results_shared_by_identity(self):
+        SharedCache('default', 'cleaner').put('value', 'cleaned')
+        self.assertEqual(
+            SharedCache('default', 'cleaner').get_many(['value']),
+            {0: 'cleaned'}
+        )
+        self.assertEqual(
+            SharedCache('default', 'other').get_many(['value']), {}
+        )
+
+    def test_results_separated_by_version(self):
+        SharedCache('default', 'cleaner').put('value', 'cleaned')
+        self.assertEqual(
+            SharedCache('default', 'cleaner', version=2).get_many(['value']),
+            {}
+        )
+
+    def test_values_of_different_types_cached_separately(self):
+        cache = SharedCache('default', 'cleaner')
+        cache.put(1, 'int')
+        self.assertEqual(cache.get_many([1, 1.0, '1']), {0: 'int'})
+
+    def test_none_results_cached(self):
+        cache = SharedCache('default', 'cleaner')
+        cache.put('value', None)
+        self.assertEqual(cache.get_many(['value']), {0: None})
+
+    def test_unpicklable_values_not_cached(self):
+        cache = SharedCache('default', 'cleaner')
+        value = lambda: None  # noqa: E731
+        cleaner = Mock(return_value='cleaned')
+        cache.call(value, cleaner)
+        cache.call(value, cleaner)
+        self.assertEqual(cleaner.call_count, 2)
+
+    def test_many_values_in_single_requests(self):
+        backend = Mock()
+        backend.get_many.return_value = {}
+        cache = SharedCache('default', 'cleaner', version=3, timeout=60)
+        with patch.object(SharedCache, 'cache', backend):
+            self.assertEqual(cache.get_many(['a', 'b']), {})
+            cache.put_many(['a', 'b'], ['A', 'B'])
+        self.assertEqual(backend.get_many.call_count, 1)
+        self.assertEqual(backend.get_many.call_args[1], {'version': 3})
+        data = backend.set_many.call_args[0][0]
+        self.assertEqual(sorted(data.values()), ['A', 'B'])
+        self.assertEqual(
+            backend.set_many.call_args[1], {'timeout': 60, 'version': 3}
+        )
+
+    def test_clear_resets_counters_only(self):
+        cache = SharedCache('default', 'cleaner')
+        cache.call('value', Mock(return_value='cleaned'))
+        cache.clear()
+        self.assertEqual(cache.info(), CacheInfo(0, 0, None, None))
+        self.assertEqual(cache.get_many(['value']), {0: 'cleaned'})
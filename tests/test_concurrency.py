@@ -0,0 +1,138 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from threading import Barrier
+from unittest import TestCase
+
+from django.db import models
+from django.db.models.signals import pre_save
+from mock import Mock
+
+from clean_fields.concurrency import (
+    get_executor, run_concurrently, set_executor
+)
+from clean_fields.decorators import cleans_field, io_bound_cleaner
+from clean_fields.models import CleanFieldsModel
+
+
+class ExecutorTestCase(TestCase):
+    def tearDown(self):
+        set_executor(None)
+
+    def test_default_executor_shared(self):
+        self.assertIs(get_executor(), get_executor())
+
+    def test_set_executor(self):
+        executor = Mock()
+        set_executor(executor)
+        self.assertIs(get_executor(), executor)
+
+
+class RunConcurrentlyTestCase(TestCase):
+    def test_results_in_order(self):
+        tasks = [lambda: 1, lambda: 2, lambda: 3]
+        self.assertEqual(run_concurrently(tasks), [1, 2, 3])
+
+    def test_tasks_run_concurrently(self):
+        barrier = Barrier(2, timeout=5)
+        tasks = [barrier.wait, barrier.wait]
+        self.assertEqual(sorted(run_concurrently(tasks)), [0, 1])
+
+    def test_first_error_raised(self):
+        def fail():
+            raise ValueError('first')
+
+        def fail_again():
+            raise TypeError('second')
+
+        with self.assertRaises(ValueError):
+            run_concurrently([lambda: 1, fail, fail_again])
+
+
+class IOBoundCleanersTestCase(TestCase):
+    def test_registered_cleaners_run_concurrently(self):
+        barrier = Barrier(2, timeout=5)
+
+        class IOBoundRegisteredModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            @cleans_field(
+                'tests.IOBoundRegisteredModel.some_field',
+                io_bound=True
+            )
+            def clean_some_field(self, some_field):
+                barrier.wait()
+                return some_field + 1
+
+            @cleans_field(
+                'tests.IOBoundRegisteredModel.other_field',
+                io_bound=True
+            )
+            def clean_other_field(self, other_field):
+                barrier.wait()
+                return other_field + 1
+
+            @cleans_field('tests.IOBoundRegisteredModel.some_field')
+            def double(self, some_field):
+                return some_field * 2
+
+        dummy = IOBoundRegisteredModel(some_field=5, other_field=6)
+        pre_save.send(IOBoundRegisteredModel, instance=dummy)
+        self.assertEqual(dummy.some_field, 12)
+        self.assertEqual(dummy.other_field, 7)
+
+    def test_model_cleaners_run_concurrently(self):
+        barrier = Barrier(2, timeout=5)
+
+        class IOBoundNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            last_field = models.IntegerField()
+
+            @io_bound_cleaner
+            def clean_some_field(self):
+                barrier.wait()
+                return self.some_field + 1
+
+            @io_bound_cleaner
+            def clean_other_field(self):
+                barrier.wait()
+                return self.other_field + 1
+
+            def clean_last_field(self):
+                return self.some_field + self.other_field
+
+        dummy = IOBoundNaiveModel(some_field=5, other_field=6, last_field=0)
+        dummy.clean_single_fields()
+        self.assertEqual(dummy.some_field, 6)
+        self.assertEqual(dummy.other_field, 7)
+        self.assertEqual(dummy.last_field, 13)
+
+    def test_model_cleaners_with_dependencies_run_after(self):
+        class IOBoundDependentModel(CleanFieldsModel):
+            title = models.CharField(max_length=20)
+            slug = models.CharField(max_length=20)
+            other_field = models.IntegerField()
+            clean_field_dependencies = {'slug': ['title']}
+
+            @io_bound_cleaner
+            def clean_title(self):
+                return self.title.strip('-')
+
+            @io_bound_cleaner
+            def clean_slug(self):
+                return self.title
+
+            @io_bound_cleaner
+            def clean_other_field(self):
+                return self.other_field + 1
+
+        dummy = IOBoundDependentModel(
+            title='--Hello-World-', slug='', other_field=1
+        )
+        dummy.clean_single_fields()
+        self.assertEqual(dummy.slug, 'Hello-World')
+        self.assertEqual(dummy.other_field, 2)
@@ -5,14 +5,21 @@ from __future__ import unicode_literals
 
 from unittest import TestCase
 
+from django.core.cache import caches
 from django.db import models
 from django.db.models.signals import pre_save
 from mock import Mock, patch
 
+from clean_fields.caching import SharedCache
+from clean_fields.cleaners import resolve_calling_convention
 from clean_fields.decorators import (
-    call_cleaner, cleans_field, cleans_field_with_context
+    call_cleaner, cleans_field, cleans_field_batch, cleans_field_with_context
 )
-from clean_fields.exc import CleanFieldsConfigurationError
+from clean_fields.exc import (
+    CleanFieldsBatchError, CleanFieldsConfigurationError
+)
+from clean_fields.models import FieldSnapshotMixin
+from clean_fields.registry import registry
 
 
 class CleansFieldTestCase(TestCase):
@@ -55,6 +62,200 @@ class CleansFieldTestCase(TestCase):
                 '{error}'.format(error=str(error))
             )
 
+    def test_signal_handler_skips_fields_not_updated(self):
+        class UpdateFieldsModel(models.Model):
+            some_field = models.IntegerField()
+            counter = models.IntegerField()
+
+            @cleans_field('tests.UpdateFieldsModel.some_field')
+            def clean_some_field(self, some_field):
+                return some_field + 1
+
+        dummy = UpdateFieldsModel(some_field=5, counter=1)
+        pre_save.send(
+            dummy.__class__,
+            instance=dummy,
+            update_fields=frozenset(['counter'])
+        )
+        self.assertEqual(dummy.some_field, 5)
+        pre_save.send(
+            dummy.__class__,
+            instance=dummy,
+            update_fields=frozenset(['some_field'])
+        )
+        self.assertEqual(dummy.some_field, 6)
+
+    def test_signal_handler_runs_for_updated_dependencies(self):
+        class DependencyModel(models.Model):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+
+            @cleans_field('tests.DependencyModel.slug', depends_on=['title'])
+            def clean_slug(self, slug):
+                return self.title.lower()
+
+        dummy = DependencyModel(title='Title', slug='')
+        pre_save.send(
+            dummy.__class__,
+            instance=dummy,
+            update_fields=frozenset(['title'])
+        )
+        self.assertEqual(dummy.slug, 'title')
+
+    def test_signal_handler_skips_unchanged_fields(self):
+        class ChangedOnlyModel(FieldSnapshotMixin, models.Model):
+            some_field = models.IntegerField()
+
+            @cleans_field(
+                'tests.ChangedOnlyModel.some_field',
+                changed_only=True
+            )
+            def clean_some_field(self, some_field):
+                return some_field + 1
+
+        dummy = ChangedOnlyModel.from_db(
+            'default', ['id', 'some_field'], [1, 5]
+        )
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.some_field, 5)
+        dummy.some_field = 7
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.some_field, 8)
+
+    def test_single_receiver_registered_per_model(self):
+        with patch.object(pre_save, 'connect') as mock_connect:
+            cleans_field('app.SharedReceiverModel.field')(lambda x: x)
+            cleans_field('app.SharedReceiverModel.other')(lambda x: x)
+        self.assertEqual(mock_connect.call_count, 1)
+
+    def test_cleaners_run_in_order(self):
+        class OrderedCleanersModel(models.Model):
+            some_field = models.IntegerField()
+
+            @cleans_field('tests.OrderedCleanersModel.some_field')
+            def double(self, some_field):
+                return some_field * 2
+
+            @cleans_field('tests.OrderedCleanersModel.some_field', order=-1)
+            def add_one(self, some_field):
+                return some_field + 1
+
+        dummy = OrderedCleanersModel(some_field=5)
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.some_field, 12)
+        self.assertEqual(
+            [c.cleaner_name for c in registry.get_cleaners(dummy)],
+            ['add_one', 'double']
+        )
+
+    def test_pure_cleaner_results_cached(self):
+        calls = []
+
+        class PureCleanerModel(models.Model):
+            some_field = models.CharField(max_length=10)
+
+            @cleans_field('tests.PureCleanerModel.some_field', cache_size=1)
+            def clean_some_field(self, some_field):
+                calls.append(some_field)
+                return some_field.lower()
+
+        for value in ['A', 'A', 'B', 'A']:
+            dummy = PureCleanerModel(some_field=value)
+            pre_save.send(dummy.__class__, instance=dummy)
+            self.assertEqual(dummy.some_field, value.lower())
+        self.assertEqual(calls, ['A', 'B', 'A'])
+        info = PureCleanerModel.clean_some_field.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 3))
+
+    def test_shared_cache_results(self):
+        calls = []
+
+        class SharedCacheModel(models.Model):
+            some_field = models.CharField(max_length=10)
+
+            @cleans_field(
+                'tests.SharedCacheModel.some_field',
+                cache_alias='default',
+                cache_version=2
+            )
+            def clean_some_field(self, some_field):
+                calls.append(some_field)
+                return some_field.lower()
+
+        field_cleaner, = registry.get_cleaners(SharedCacheModel)
+        self.assertIsInstance(field_cleaner.cache, SharedCache)
+        self.assertEqual(field_cleaner.cache.version, 2)
+        caches['default'].clear()
+
+        for value in ['A', 'A', 'B']:
+            dummy = SharedCacheModel(some_field=value)
+            pre_save.send(dummy.__class__, instance=dummy)
+            self.assertEqual(dummy.some_field, value.lower())
+        self.assertEqual(calls, ['A', 'B'])
+        info = SharedCacheModel.clean_some_field.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+    def test_shared_cache_batched_in_bulk(self):
+        calls = []
+
+        class SharedBulkModel(models.Model):
+            some_field = models.CharField(max_length=10)
+
+        @cleans_field(
+            'tests.SharedBulkModel.some_field', cache_alias='default'
+        )
+        def lower(some_field):
+            calls.append(some_field)
+            return some_field.lower()
+
+        caches['default'].clear()
+        backend = caches['default']
+        with patch.object(
+            backend, 'get_many', wraps=backend.get_many
+        ) as mock_get_many, patch.object(
+            backend, 'set_many', wraps=backend.set_many
+        ) as mock_set_many:
+            dummies = [
+                SharedBulkModel(some_field=value) for value in 'ABCA' * 10
+            ]
+            registry.clean_instances(SharedBulkModel, dummies)
+            self.assertEqual(
+                [dummy.some_field for dummy in dummies], list('abca' * 10)
+            )
+            self.assertEqual(mock_get_many.call_count, 1)
+            self.assertEqual(mock_set_many.call_count, 1)
+
+            dummies = [SharedBulkModel(some_field=value) for value in 'BCD']
+            registry.clean_instances(SharedBulkModel, dummies)
+        self.assertEqual([dummy.some_field for dummy in dummies], list('bcd'))
+        self.assertEqual(mock_get_many.call_count, 2)
+        self.assertEqual(calls, ['A', 'B', 'C', 'D'])
+
+    def test_guarded_cleaner_skipped(self):
+        calls = []
+
+        class GuardedCleanerModel(models.Model):
+            status = models.CharField(max_length=10)
+            some_field = models.CharField(max_length=10)
+
+            @cleans_field(
+                'tests.GuardedCleanerModel.some_field',
+                when=lambda obj: obj.status == 'published'
+            )
+            def clean_some_field(self, some_field):
+                calls.append(some_field)
+                return some_field.upper()
+
+        draft = GuardedCleanerModel(status='draft', some_field='a')
+        pre_save.send(draft.__class__, instance=draft)
+        self.assertEqual(draft.some_field, 'a')
+        self.assertEqual(calls, [])
+
+        published = GuardedCleanerModel(status='published', some_field='a')
+        pre_save.send(published.__class__, instance=published)
+        self.assertEqual(published.some_field, 'A')
+        self.assertEqual(calls, ['a'])
+
     def test_returns_cleaner_executor(self):
         """Ensures decorated callables can still be invoked independently"""
         cleaner = Mock()
@@ -109,6 +310,29 @@ class CleansFieldWithContextTestCase(TestCase):
         wrapped_cleaner(1, 2, 'foobar')
         cleaner.assert_called_once_with(1, 2, 'foobar')
 
+    def test_guarded_cleaner_skipped(self):
+        class GuardedContextModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            @cleans_field_with_context(
+                'tests.GuardedContextModel.other_field',
+                when=lambda obj: obj.some_field
+            )
+            def clean_other_field(self, other_field, data):
+                calls.append(other_field)
+                return other_field + data['some_field']
+
+        calls = []
+        dummy = GuardedContextModel(some_field=0, other_field=6)
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.other_field, 6)
+        self.assertEqual(calls, [])
+
+        dummy = GuardedContextModel(some_field=2, other_field=6)
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.other_field, 8)
+
 
 def dummy_wrapper(fn):
     """Simple wrapper used for testing"""
@@ -166,6 +390,120 @@ class CallCleanerTestCase(TestCase):
         self.assertEqual(value, 6)
 
 
+class ResolveCallingConventionTestCase(TestCase):
+    def test_instance_method(self):
+        class ConventionMethodModel(models.Model):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self, some_field):
+                return (self, some_field)
+
+        dummy = ConventionMethodModel(some_field=5)
+        invoker = resolve_calling_convention(
+            ConventionMethodModel.clean_some_field,
+            ConventionMethodModel
+        )
+        self.assertEqual(invoker(dummy, [5]), (dummy, 5))
+
+    def test_wrapped_instance_method(self):
+        class ConventionWrappedModel(models.Model):
+            some_field = models.IntegerField()
+
+            @cleans_field('tests.ConventionWrappedModel.some_field')
+            @cleans_field('tests.ConventionWrappedModel.some_field')
+            def clean_some_field(self, some_field):
+                return (self, some_field)
+
+        inner_cleaner = registry.get_cleaners(ConventionWrappedModel)[0]
+        dummy = ConventionWrappedModel(some_field=5)
+        invoker = resolve_calling_convention(
+            inner_cleaner.cleaner_function,
+            ConventionWrappedModel
+        )
+        self.assertEqual(invoker(dummy, [5]), (dummy, 5))
+
+    def test_staticmethod(self):
+        class ConventionStaticModel(models.Model):
+            some_field = models.IntegerField()
+
+            @staticmethod
+            def clean_some_field(some_field):
+                return some_field
+
+        invoker = resolve_calling_convention(
+            ConventionStaticModel.clean_some_field,
+            ConventionStaticModel
+        )
+        self.assertEqual(invoker(ConventionStaticModel(), [5]), 5)
+
+    def test_classmethod(self):
+        class ConventionClassModel(models.Model):
+            some_field = models.IntegerField()
+
+            @classmethod
+            def clean_some_field(cls, some_field):
+                return (cls, some_field)
+
+        invoker = resolve_calling_convention(
+            ConventionClassModel.clean_some_field.__func__,
+            ConventionClassModel
+        )
+        self.assertEqual(
+            invoker(ConventionClassModel(), [5]),
+            (ConventionClassModel, 5)
+        )
+
+    def test_method_shadowing_function(self):
+        class ConventionShadowModel(models.Model):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self, some_field):
+                return 'method'
+
+        def clean_some_field(some_field):
+            return 'function'
+
+        invoker = resolve_calling_convention(
+            clean_some_field,
+            ConventionShadowModel
+        )
+        self.assertEqual(invoker(ConventionShadowModel(), [5]), 'method')
+
+    def test_method_wrapped_without_wraps(self):
+        def log_calls(method):
+            def wrapper(self, *args):
+                return ('logged', method(self, *args))
+            return wrapper
+
+        class ConventionUnwrappedModel(models.Model):
+            some_field = models.IntegerField()
+
+            @log_calls
+            @cleans_field('tests.ConventionUnwrappedModel.some_field')
+            def clean_some_field(self, some_field):
+                return (self, some_field)
+
+        dummy = ConventionUnwrappedModel(some_field=5)
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.some_field, ('logged', (dummy, 5)))
+
+    def test_legitimate_type_error_is_not_retried(self):
+        calls = []
+
+        class ConventionErrorModel(models.Model):
+            some_field = models.IntegerField()
+
+            @cleans_field('tests.ConventionErrorModel.some_field')
+            def clean_some_field(self, some_field):
+                calls.append(some_field)
+                raise TypeError('takes 1 positional argument')
+
+        dummy = ConventionErrorModel(some_field=5)
+        with self.assertRaises(TypeError):
+            pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(calls, [5])
+
+
 class UseCasesTestCase(TestCase):
     """Runs tests on expected use cases"""
 
@@ -313,3 +651,122 @@ class UseCasesTestCase(TestCase):
         with self.assertRaises(TypeError) as ctx:
             pre_save.send(dummy.__class__, instance=dummy)
         self.assertEqual(str(ctx.exception), 'other_field is the wrong type')
+
+
+class CleansFieldBatchTestCase(TestCase):
+    """Tests the functionality of the cleans_field_batch decorator"""
+
+    def test_pre_save_signal_handler_registered(self):
+        with patch.object(pre_save, 'connect') as mock_connect:
+            cleans_field_batch('app.BatchModelName.field')(lambda x: x)
+        self.assertEqual(mock_connect.call_count, 1)
+
+    def test_single_save_cleans_batch_of_one(self):
+        class SingleBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+        batches = []
+
+        @cleans_field_batch('tests.SingleBatchModel.some_field')
+        def add_one(values):
+            batches.append(values)
+            return [value + 1 for value in values]
+
+        dummy = SingleBatchModel(some_field=5)
+        pre_save.send(dummy.__class__, instance=dummy)
+        self.assertEqual(dummy.some_field, 6)
+        self.assertEqual(batches, [[5]])
+
+    def test_bulk_cleaning_passes_all_values(self):
+        batches = []
+
+        class MultiBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+            @staticmethod
+            @cleans_field_batch('tests.MultiBatchModel.some_field')
+            def double(values):
+                batches.append(values)
+                return [value * 2 for value in values]
+
+        dummies = [MultiBatchModel(some_field=i) for i in range(3)]
+        registry.clean_instances(MultiBatchModel, dummies)
+        self.assertEqual(batches, [[0, 1, 2]])
+        self.assertEqual([d.some_field for d in dummies], [0, 2, 4])
+
+    def test_guarded_instances_left_out_of_batch(self):
+        batches = []
+
+        class GuardedBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+            @staticmethod
+            @cleans_field_batch(
+                'tests.GuardedBatchModel.some_field',
+                when=lambda obj: obj.some_field % 2
+            )
+            def double(values):
+                batches.append(values)
+                return [value * 2 for value in values]
+
+        dummies = [GuardedBatchModel(some_field=i) for i in range(4)]
+        registry.clean_instances(GuardedBatchModel, dummies)
+        self.assertEqual(batches, [[1, 3]])
+        self.assertEqual([d.some_field for d in dummies], [0, 2, 2, 6])
+
+    def test_pure_batch_cleaner_only_receives_uncached_values(self):
+        batches = []
+
+        class PureBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field_batch('tests.PureBatchModel.some_field', pure=True)
+        def double(values):
+            batches.append(values)
+            return [value * 2 for value in values]
+
+        dummies = [PureBatchModel(some_field=i) for i in (1, 2)]
+        registry.clean_instances(PureBatchModel, dummies)
+        dummies = [PureBatchModel(some_field=i) for i in (2, 3, 1)]
+        registry.clean_instances(PureBatchModel, dummies)
+        self.assertEqual(batches, [[1, 2], [3]])
+        self.assertEqual([d.some_field for d in dummies], [4, 6, 2])
+
+    def test_shared_cache_batch(self):
+        batches = []
+
+        class SharedBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field_batch(
+            'tests.SharedBatchModel.some_field', cache_alias='default'
+        )
+        def double(values):
+            batches.append(values)
+            return [value * 2 for value in values]
+
+        caches['default'].clear()
+        dummies = [SharedBatchModel(some_field=i) for i in (1, 2)]
+        registry.clean_instances(SharedBatchModel, dummies)
+        dummies = [SharedBatchModel(some_field=i) for i in (2, 3, 1)]
+        registry.clean_instances(SharedBatchModel, dummies)
+        self.assertEqual(batches, [[1, 2], [3]])
+        self.assertEqual([d.some_field for d in dummies], [4, 6, 2])
+
+    def test_wrong_number_of_values_raises_error(self):
+        class ShortBatchModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field_batch('tests.ShortBatchModel.some_field')
+        def drop_values(values):
+            return values[:1]
+
+        dummies = [ShortBatchModel(some_field=i) for i in range(3)]
+        with self.assertRaises(CleanFieldsBatchError):
+            registry.clean_instances(ShortBatchModel, dummies)
+
+    def test_returns_cleaner_executor(self):
+        cleaner = Mock()
+        wrapped_cleaner = cleans_field_batch('app.Model.field')(cleaner)
+        wrapped_cleaner([1, 2])
+        cleaner.assert_called_once_with([1, 2])
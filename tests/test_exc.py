@@ -5,7 +5,11 @@ from __future__ import unicode_literals
 
 from unittest import TestCase
 
-from clean_fields.exc import CleanFieldsError, CleanFieldsConfigurationError
+from clean_fields.exc import (
+    CleanFieldsBatchError, CleanFieldsBudgetError,
+    CleanFieldsConfigurationError, CleanFieldsDependencyError,
+    CleanFieldsError, CleanFieldsRegistryError, CleanFieldsUpdateError
+)
 
 
 class CleanFieldsErrorTestCase(TestCase):
@@ -30,3 +34,76 @@ class CleanFieldsConfigurationErrorTestCase(TestCase):
             'but "app_name.ModelName" has no such field',
             str(error)
         )
+
+
+class CleanFieldsBatchErrorTestCase(TestCase):
+    def test_inheritance(self):
+        error = CleanFieldsBatchError('cleaner', 2, 1)
+        self.assertIsInstance(error, CleanFieldsError)
+
+    def test_message(self):
+        error = CleanFieldsBatchError('clean_field_name', 3, 2)
+        self.assertIn(
+            'Batch cleaner "clean_field_name" received 3 values, but '
+            'returned 2',
+            str(error)
+        )
+
+
+class CleanFieldsRegistryErrorTestCase(TestCase):
+    def test_inheritance(self):
+        error = CleanFieldsRegistryError('app.Model.field', 'cleaner')
+        self.assertIsInstance(error, CleanFieldsError)
+
+    def test_message(self):
+        error = CleanFieldsRegistryError('app.Model.field', 'clean_field')
+        self.assertIn(
+            'No cleaner "clean_field" is registered for "app.Model.field"',
+            str(error)
+        )
+
+
+class CleanFieldsDependencyErrorTestCase(TestCase):
+    def test_inheritance(self):
+        error = CleanFieldsDependencyError('app.Model', ['field'])
+        self.assertIsInstance(error, CleanFieldsError)
+
+    def test_message(self):
+        error = CleanFieldsDependencyError('app.Model', ['one', 'two'])
+        self.assertIn(
+            'Cleaners of "app.Model" have circular dependencies between the '
+            'fields "one", "two"',
+            str(error)
+        )
+
+
+class CleanFieldsUpdateErrorTestCase(TestCase):
+    def test_inheritance(self):
+        error = CleanFieldsUpdateError('app.Model', 'field', 'cleaner')
+        self.assertIsInstance(error, CleanFieldsError)
+
+    def test_message(self):
+        error = CleanFieldsUpdateError('app.Model', 'slug', 'clean_slug')
+        self.assertIn(
+            'Callable "clean_slug" cleaning "slug" of "app.Model" reads other '
+            'fields of each row',
+            str(error)
+        )
+
+
+class CleanFieldsBudgetErrorTestCase(TestCase):
+    def test_inheritance(self):
+        error = CleanFieldsBudgetError(
+            'app.Model', 'field', 'cleaner', 'cleaner', 0.1, 0.2
+        )
+        self.assertIsInstance(error, CleanFieldsError)
+
+    def test_message(self):
+        error = CleanFieldsBudgetError(
+            'app.Model', 'slug', 'clean_slug', 'save', 0.1, 0.25
+        )
+        self.assertEqual(
+            str(error),
+            'Callable "clean_slug" cleaning "slug" of "app.Model" exceeded '
+            'the save time budget of 0.100s (0.250s)'
+        )
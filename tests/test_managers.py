@@ -0,0 +1,293 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+
+from django.db import models
+from mock import patch
+
+from clean_fields.decorators import (
+    cleans_field, cleans_field_with_context, conditional_cleaner
+)
+from clean_fields.exc import CleanFieldsUpdateError
+from clean_fields.managers import (
+    CleanFieldsManager, clean_instances, clean_update_values
+)
+from clean_fields.models import CleanFieldsModel
+
+
+class CleanInstancesTestCase(TestCase):
+    def test_runs_model_and_decorator_cleaners(self):
+        class BothCleanersModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field * 2
+
+            @cleans_field('tests.BothCleanersModel.other_field')
+            def clean_other(self, other_field):
+                return other_field + 1
+
+        dummies = [
+            BothCleanersModel(some_field=i, other_field=i) for i in (1, 2)
+        ]
+        clean_instances(BothCleanersModel, dummies)
+        self.assertEqual([d.some_field for d in dummies], [2, 4])
+        self.assertEqual([d.other_field for d in dummies], [2, 3])
+
+
+class CleanInstancesDeferredTestCase(TestCase):
+    @patch('clean_fields.managers.load_deferred_fields')
+    def test_loads_read_fields_at_once(self, mock_load):
+        class DeferredBulkModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+            body = models.CharField(max_length=10)
+            clean_field_dependencies = {'slug': ['title']}
+
+            def clean_slug(self):
+                return self.slug
+
+        dummies = [DeferredBulkModel(title='', slug='', body='')]
+        clean_instances(DeferredBulkModel, dummies, field_names=['slug'])
+        mock_load.assert_called_once_with(dummies, {'slug', 'title'})
+
+        mock_load.reset_mock()
+        clean_instances(DeferredBulkModel, dummies)
+        self.assertFalse(mock_load.called)
+
+
+class CleanUpdateValuesTestCase(TestCase):
+    def test_cleans_literal_values(self):
+        class UpdateValuesModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            untouched_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field * 2
+
+            def clean_untouched_field(self):
+                raise AssertionError('Field is not updated')
+
+            @cleans_field('tests.UpdateValuesModel.other_field')
+            def clean_other(self, other_field):
+                return other_field + 1
+
+        self.assertEqual(
+            clean_update_values(
+                UpdateValuesModel, {'some_field': 2, 'other_field': 2}
+            ),
+            {'some_field': 4, 'other_field': 3}
+        )
+
+    def test_expressions_left_alone(self):
+        class UpdateExpressionModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field('tests.UpdateExpressionModel.some_field')
+        def add_one(some_field):
+            return some_field + 1
+
+        expression = models.F('some_field') + 1
+        self.assertEqual(
+            clean_update_values(
+                UpdateExpressionModel, {'some_field': expression}
+            ),
+            {'some_field': expression}
+        )
+
+    def test_dependencies_updated_together(self):
+        class UpdateDependenciesModel(models.Model):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+
+            @cleans_field(
+                'tests.UpdateDependenciesModel.slug', depends_on=['title']
+            )
+            def slugify(self, slug):
+                return self.title.lower()
+
+        self.assertEqual(
+            clean_update_values(
+                UpdateDependenciesModel, {'title': 'Title', 'slug': ''}
+            ),
+            {'title': 'Title', 'slug': 'title'}
+        )
+        with self.assertRaises(CleanFieldsUpdateError):
+            clean_update_values(UpdateDependenciesModel, {'title': 'Title'})
+        with self.assertRaises(CleanFieldsUpdateError):
+            clean_update_values(UpdateDependenciesModel, {'slug': ''})
+
+    def test_guarded_cleaners_rejected(self):
+        class UpdateGuardedModel(CleanFieldsModel):
+            status = models.CharField(max_length=10)
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            @conditional_cleaner(when=lambda obj: obj.status == 'published')
+            def clean_some_field(self):
+                return self.some_field * 2
+
+            @cleans_field(
+                'tests.UpdateGuardedModel.other_field',
+                when=lambda obj: obj.status == 'published'
+            )
+            def clean_other(self, other_field):
+                return other_field + 1
+
+        with self.assertRaises(CleanFieldsUpdateError):
+            clean_update_values(UpdateGuardedModel, {'some_field': 1})
+        with self.assertRaises(CleanFieldsUpdateError):
+            clean_update_values(UpdateGuardedModel, {'other_field': 1})
+        self.assertEqual(
+            clean_update_values(UpdateGuardedModel, {'status': 'draft'}),
+            {'status': 'draft'}
+        )
+
+    def test_model_dependencies_updated_together(self):
+        class UpdateModelDependenciesModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+            clean_field_dependencies = {'slug': ['title']}
+
+            def clean_slug(self):
+                return self.title.lower()
+
+        self.assertEqual(
+            clean_update_values(
+                UpdateModelDependenciesModel, {'title': 'Title', 'slug': ''}
+            ),
+            {'title': 'Title', 'slug': 'title'}
+        )
+        with self.assertRaises(CleanFieldsUpdateError):
+            clean_update_values(
+                UpdateModelDependenciesModel, {'title': 'Title'}
+            )
+
+    def test_related_objects_by_primary_key(self):
+        class UpdateAuthor(models.Model):
+            name = models.CharField(max_length=10)
+
+        class UpdateArticle(CleanFieldsModel):
+            author = models.ForeignKey(UpdateAuthor, on_delete=models.CASCADE)
+            title = models.CharField(max_length=10)
+
+            def clean_title(self):
+                return self.title.upper()
+
+        self.assertEqual(
+            clean_update_values(UpdateArticle, {'author': 1}),
+            {'author': 1}
+        )
+        self.assertEqual(
+            clean_update_values(UpdateArticle, {'author': 1, 'title': 'a'}),
+            {'author': 1, 'title': 'A'}
+        )
+        author = UpdateAuthor(id=2)
+        self.assertEqual(
+            clean_update_values(UpdateArticle, {'author': author}),
+            {'author': author}
+        )
+
+    @patch('clean_fields.managers.clean_instances')
+    def test_no_instance_without_cleaners(self, mock_clean_instances):
+        class UpdateUncleanedModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field * 2
+
+        self.assertEqual(
+            clean_update_values(UpdateUncleanedModel, {'other_field': 1}),
+            {'other_field': 1}
+        )
+        self.assertFalse(mock_clean_instances.called)
+
+    def test_context_cleaners_rejected(self):
+        class UpdateContextModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field_with_context('tests.UpdateContextModel.some_field')
+        def clean_with_context(some_field, context):
+            return some_field
+
+        with self.assertRaises(CleanFieldsUpdateError):
+            clean_update_values(UpdateContextModel, {'some_field': 1})
+
+
+class CleanFieldsQuerySetTestCase(TestCase):
+    @patch('django.db.models.QuerySet.update')
+    def test_update_cleans_values(self, mock_update):
+        class QuerySetUpdateModel(models.Model):
+            some_field = models.IntegerField()
+            objects = CleanFieldsManager()
+
+        @cleans_field('tests.QuerySetUpdateModel.some_field')
+        def add_one(some_field):
+            return some_field + 1
+
+        QuerySetUpdateModel.objects.all().update(some_field=1)
+        mock_update.assert_called_once_with(some_field=2)
+
+    @patch('django.db.models.QuerySet.bulk_create')
+    def test_bulk_create_cleans_objects(self, mock_bulk_create):
+        class BulkCreateModel(models.Model):
+            some_field = models.IntegerField()
+            objects = CleanFieldsManager()
+
+        @cleans_field('tests.BulkCreateModel.some_field')
+        def add_one(some_field):
+            return some_field + 1
+
+        dummies = (BulkCreateModel(some_field=i) for i in range(3))
+        BulkCreateModel.objects.bulk_create(dummies, batch_size=10)
+        objs = mock_bulk_create.call_args[0][0]
+        self.assertEqual([d.some_field for d in objs], [1, 2, 3])
+        self.assertEqual(mock_bulk_create.call_args[1], {'batch_size': 10})
+
+    @patch('django.db.models.QuerySet.bulk_update')
+    def test_bulk_update_cleans_objects(self, mock_bulk_update):
+        class BulkUpdateModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            objects = CleanFieldsManager()
+
+            def clean_some_field(self):
+                return -self.some_field
+
+        dummies = [BulkUpdateModel(pk=i, some_field=i) for i in (1, 2)]
+        BulkUpdateModel.objects.bulk_update(dummies, ['some_field'])
+        objs, fields = mock_bulk_update.call_args[0]
+        self.assertEqual([d.some_field for d in objs], [-1, -2])
+        self.assertEqual(fields, ['some_field'])
+
+    @patch('django.db.models.QuerySet.bulk_update')
+    def test_bulk_update_cleans_dependent_fields(self, mock_bulk_update):
+        class BulkDependencyModel(models.Model):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+            counter = models.IntegerField()
+            objects = CleanFieldsManager()
+
+        @cleans_field('tests.BulkDependencyModel.title')
+        def clean_title(title):
+            return title.title()
+
+        @cleans_field('tests.BulkDependencyModel.slug', depends_on=['title'])
+        def clean_slug(slug):
+            return slug.lower()
+
+        dummies = [BulkDependencyModel(pk=1, title='a', slug='A', counter=1)]
+        BulkDependencyModel.objects.bulk_update(dummies, ['counter'])
+        objs, fields = mock_bulk_update.call_args[0]
+        self.assertEqual((objs[0].title, objs[0].slug), ('a', 'A'))
+        self.assertEqual(fields, ['counter'])
+
+        BulkDependencyModel.objects.bulk_update(dummies, ['title'])
+        objs, fields = mock_bulk_update.call_args[0]
+        self.assertEqual((objs[0].title, objs[0].slug), ('A', 'a'))
+        self.assertEqual(fields, ['title', 'slug'])
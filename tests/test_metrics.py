@@ -0,0 +1,200 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+
+from asgiref.sync import async_to_sync
+from django.db import models
+from django.db.models.signals import pre_save
+from mock import Mock, patch
+
+from clean_fields.aio import clean_instance_async
+from clean_fields.decorators import cleans_field
+from clean_fields.metrics import (
+    CleanerCall, MetricsCollector, cleaner_called, collector, disable_metrics,
+    enable_metrics, get_metrics, reset_metrics
+)
+from clean_fields.models import CleanFieldsModel
+
+
+class MetricsCollectorTestCase(TestCase):
+    def test_call_disabled(self):
+        metrics = MetricsCollector()
+        cleaner = Mock(return_value='cleaned')
+        result = metrics.call('tests.Dummy', 'field', 'cleaner', cleaner, 1)
+        self.assertEqual(result, 'cleaned')
+        cleaner.assert_called_once_with(1)
+        self.assertEqual(metrics.get_stats(), [])
+
+    def test_call_enabled(self):
+        metrics = MetricsCollector()
+        metrics.enabled = True
+        result = metrics.call(
+            'tests.Dummy', 'field', 'cleaner', lambda value: value + 1, 1
+        )
+        self.assertEqual(result, 2)
+        stats, = metrics.get_stats()
+        self.assertEqual(
+            stats[:5], ('tests.Dummy', 'field', 'cleaner', 1, 0)
+        )
+        self.assertGreaterEqual(stats.total_time, 0)
+
+    def test_call_records_errors(self):
+        metrics = MetricsCollector()
+        metrics.enabled = True
+        cleaner = Mock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            metrics.call('tests.Dummy', 'field', 'cleaner', cleaner)
+        stats, = metrics.get_stats()
+        self.assertEqual(stats.calls, 1)
+        self.assertEqual(stats.errors, 1)
+
+    def test_percentiles(self):
+        metrics = MetricsCollector()
+        for duration in range(1, 101):
+            metrics.record(
+                CleanerCall('tests.Dummy', 'field', 'cleaner', duration, None)
+            )
+        stats, = metrics.get_stats()
+        self.assertEqual(stats.calls, 100)
+        self.assertEqual(stats.mean_time, 50.5)
+        self.assertEqual(stats.p50_time, 51)
+        self.assertEqual(stats.p95_time, 95)
+        self.assertEqual(stats.p99_time, 99)
+
+    def test_sample_size(self):
+        metrics = MetricsCollector(sample_size=2)
+        for duration in (100, 1, 2):
+            metrics.record(
+                CleanerCall('tests.Dummy', 'field', 'cleaner', duration, None)
+            )
+        stats, = metrics.get_stats()
+        self.assertEqual(stats.calls, 3)
+        self.assertEqual(stats.total_time, 103)
+        self.assertEqual(stats.p99_time, 2)
+
+    def test_get_stats_by_model(self):
+        metrics = MetricsCollector()
+        metrics.record(CleanerCall('tests.One', 'field', 'cleaner', 1, None))
+        metrics.record(CleanerCall('tests.Two', 'field', 'cleaner', 1, None))
+        stats, = metrics.get_stats('tests.two')
+        self.assertEqual(stats.model_label, 'tests.Two')
+
+    def test_sinks(self):
+        metrics = MetricsCollector()
+        sink = Mock()
+        metrics.add_sink(sink)
+        cleaner_call = CleanerCall('tests.Dummy', 'field', 'cleaner', 1, None)
+        metrics.record(cleaner_call)
+        sink.assert_called_once_with(cleaner_call)
+
+        metrics.remove_sink(sink)
+        metrics.record(cleaner_call)
+        self.assertEqual(sink.call_count, 1)
+
+    def test_signal(self):
+        receiver = Mock()
+        cleaner_called.connect(receiver, weak=False)
+        try:
+            MetricsCollector().record(
+                CleanerCall('tests.Dummy', 'field', 'cleaner', 1, None)
+            )
+        finally:
+            cleaner_called.disconnect(receiver)
+        receiver.assert_called_once_with(
+            signal=cleaner_called,
+            sender='tests.Dummy',
+            model_label='tests.Dummy',
+            field_name='field',
+            cleaner_name='cleaner',
+            duration=1,
+            error=None
+        )
+
+    def test_reset(self):
+        metrics = MetricsCollector()
+        metrics.record(CleanerCall('tests.Dummy', 'field', 'cleaner', 1, None))
+        metrics.reset()
+        self.assertEqual(metrics.get_stats(), [])
+
+
+class InstrumentedCleanersTestCase(TestCase):
+    def setUp(self):
+        reset_metrics()
+        enable_metrics()
+
+    def tearDown(self):
+        disable_metrics()
+        reset_metrics()
+
+    def test_registered_cleaner(self):
+        class MeteredRegisteredModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field('tests.MeteredRegisteredModel.some_field')
+        def increment(some_field):
+            return some_field + 1
+
+        dummy = MeteredRegisteredModel(some_field=1)
+        pre_save.send(MeteredRegisteredModel, instance=dummy)
+        self.assertEqual(dummy.some_field, 2)
+        stats, = get_metrics('tests.MeteredRegisteredModel')
+        self.assertEqual(stats.field_name, 'some_field')
+        self.assertEqual(stats.cleaner_name, 'increment')
+        self.assertEqual(stats.calls, 1)
+
+    @patch('django.db.models.Model.save')
+    def test_model_cleaner(self, mock_save):
+        class MeteredModelCleaner(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field + 1
+
+        dummy = MeteredModelCleaner(some_field=1)
+        dummy.save()
+        self.assertEqual(dummy.some_field, 2)
+        stats, = get_metrics('tests.MeteredModelCleaner')
+        self.assertEqual(stats.field_name, 'some_field')
+        self.assertEqual(stats.cleaner_name, 'clean_some_field')
+        self.assertEqual(stats.calls, 1)
+
+    def test_async_cleaners(self):
+        class MeteredAsyncModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            async def clean_some_field(self):
+                return self.some_field + 1
+
+            @cleans_field('tests.MeteredAsyncModel.some_field')
+            async def double(self, some_field):
+                return some_field * 2
+
+        dummy = MeteredAsyncModel(some_field=1)
+        async_to_sync(clean_instance_async)(dummy)
+        self.assertEqual(dummy.some_field, 4)
+        self.assertEqual(
+            [
+                (stats.cleaner_name, stats.calls)
+                for stats in get_metrics('tests.MeteredAsyncModel')
+            ],
+            [('clean_some_field', 1), ('double', 1)]
+        )
+
+    def test_disabled(self):
+        disable_metrics()
+
+        class UnmeteredModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field('tests.UnmeteredModel.some_field')
+        def increment(some_field):
+            return some_field + 1
+
+        dummy = UnmeteredModel(some_field=1)
+        pre_save.send(UnmeteredModel, instance=dummy)
+        self.assertEqual(dummy.some_field, 2)
+        self.assertFalse(collector.enabled)
+        self.assertEqual(get_metrics('tests.UnmeteredModel'), [])
@@ -5,11 +5,14 @@ from __future__ import unicode_literals
 
 from unittest import TestCase
 
-from django.db import models
+from django.db import connection, models
 from mock import patch
 
+from clean_fields.decorators import conditional_cleaner, pure_cleaner
+from clean_fields.exc import CleanFieldsDependencyError
 from clean_fields.models import (
-    BaseCleanFieldsModel, CleanFieldsModel, ValidationMixin
+    BaseCleanFieldsModel, CleanFieldsModel, FieldSnapshotMixin,
+    ValidationMixin
 )
 
 
@@ -29,6 +32,38 @@ class BaseCleanFieldsModelTestCase(TestCase):
         mock_clean_fields.assert_called_once_with()
         mock_save.assert_called_once_with()
 
+    @patch('django.db.models.Model.save')
+    def test_save_with_update_fields_restricts_cleaning(self, mock_save):
+        class UpdateFieldsBaseModel(BaseCleanFieldsModel):
+            some_field = models.IntegerField()
+
+        dummy = UpdateFieldsBaseModel(some_field=5)
+        with patch.object(dummy, 'clean_single_fields') as mock_clean_fields:
+            dummy.save(update_fields=['some_field'])
+        mock_clean_fields.assert_called_once_with(field_names=['some_field'])
+        mock_save.assert_called_once_with(update_fields=['some_field'])
+
+    @patch('django.db.models.Model.save')
+    def test_save_with_update_fields_adds_dependents(self, mock_save):
+        class DependentBaseModel(BaseCleanFieldsModel):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+            counter = models.IntegerField()
+            clean_field_dependencies = {'slug': ['title']}
+
+        dummy = DependentBaseModel(title='a', slug='a', counter=1)
+        with patch.object(dummy, 'clean_single_fields'):
+            dummy.save(update_fields=['counter'])
+        mock_save.assert_called_once_with(update_fields=['counter'])
+
+        mock_save.reset_mock()
+        with patch.object(dummy, 'clean_single_fields') as mock_clean_fields:
+            dummy.save(update_fields=['title'])
+        mock_clean_fields.assert_called_once_with(
+            field_names=['title', 'slug']
+        )
+        mock_save.assert_called_once_with(update_fields=['title', 'slug'])
+
     def test_clean_single_fields_without_cleaner(self):
         class CleanerlessBaseModel(BaseCleanFieldsModel):
             some_field = models.IntegerField()
@@ -52,6 +87,182 @@ class BaseCleanFieldsModelTestCase(TestCase):
         self.assertEqual(dummy.some_field, 42)
 
 
+class DeferredFieldsTestCase(TestCase):
+    def _make_loaded(self, model, deferred_names, **values):
+        instance = model(id=1, **values)
+        instance._state.adding = False
+        for name in deferred_names:
+            del instance.__dict__[name]
+        return instance
+
+    @patch('clean_fields.models.load_deferred_fields')
+    @patch('django.db.models.Model.save')
+    def test_deferred_fields_not_cleaned(self, mock_save, mock_load):
+        class DeferredCleanModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+            body = models.CharField(max_length=10)
+            clean_field_dependencies = {'slug': ['title']}
+
+            def clean_title(self):
+                raise AssertionError('Deferred field cleaned')
+
+            def clean_slug(self):
+                return self.__dict__.get('title', 'loaded')
+
+            def clean_body(self):
+                raise AssertionError('Deferred field cleaned')
+
+        dummy = self._make_loaded(
+            DeferredCleanModel, ['title', 'body'], title='T', slug='', body='B'
+        )
+        dummy.save()
+        mock_load.assert_called_once_with([dummy], {'title'})
+        self.assertEqual(dummy.slug, 'loaded')
+
+    @patch('clean_fields.models.load_deferred_fields')
+    @patch('django.db.models.Model.save')
+    def test_saved_deferred_fields_cleaned(self, mock_save, mock_load):
+        class SavedDeferredModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+            body = models.CharField(max_length=10)
+
+            def clean_title(self):
+                return 'cleaned'
+
+            def clean_body(self):
+                raise AssertionError('Unsaved field cleaned')
+
+        dummy = self._make_loaded(
+            SavedDeferredModel, ['title'], title='T', body='B'
+        )
+        mock_load.side_effect = lambda instances, names: setattr(
+            dummy, 'title', 'loaded'
+        )
+        dummy.save(update_fields=['title'])
+        mock_load.assert_called_once_with([dummy], {'title'})
+        self.assertEqual(dummy.title, 'cleaned')
+
+
+class FieldSnapshotMixinTestCase(TestCase):
+    def test_from_db_takes_snapshot(self):
+        class LoadedSnapshotModel(FieldSnapshotMixin, models.Model):
+            some_field = models.IntegerField()
+
+        dummy = LoadedSnapshotModel.from_db(
+            'default', ['id', 'some_field'], [1, 5]
+        )
+        self.assertEqual(dummy.get_changed_field_names(), [])
+        dummy.some_field = 6
+        self.assertEqual(dummy.get_changed_field_names(), ['some_field'])
+
+    @patch('django.db.models.Model.save')
+    def test_save_refreshes_snapshot(self, mock_save):
+        class SavedSnapshotModel(FieldSnapshotMixin, models.Model):
+            some_field = models.IntegerField()
+
+        dummy = SavedSnapshotModel(some_field=5)
+        self.assertIsNone(dummy.get_changed_field_names())
+        dummy.save()
+        self.assertEqual(dummy.get_changed_field_names(), [])
+
+
+class ChangedFieldsOnlyTestCase(TestCase):
+    def create_table(self, model):
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(model)
+
+        def delete_table():
+            with connection.schema_editor() as schema_editor:
+                schema_editor.delete_model(model)
+        self.addCleanup(delete_table)
+
+    def test_snapshot_not_taken_by_default(self):
+        class NoSnapshotNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+        dummy = NoSnapshotNaiveModel.from_db(
+            'default', ['id', 'some_field'], [1, 5]
+        )
+        self.assertIsNone(dummy.get_changed_field_names())
+
+    @patch('django.db.models.Model.save')
+    def test_clean_changed_fields_only(self, mock_save):
+        class ChangedOnlyNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            clean_changed_fields_only = True
+
+            def clean_some_field(self):
+                return self.some_field * 2
+
+            def clean_other_field(self):
+                return self.other_field * 2
+
+        dummy = ChangedOnlyNaiveModel.from_db(
+            'default', ['id', 'some_field', 'other_field'], [1, 5, 6]
+        )
+        dummy.other_field = 7
+        dummy.save()
+        self.assertEqual(dummy.some_field, 5)
+        self.assertEqual(dummy.other_field, 14)
+        mock_save.assert_called_once_with()
+
+    @patch('django.db.models.Model.save')
+    def test_save_changed_fields_only(self, mock_save):
+        class NarrowSaveNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            save_changed_fields_only = True
+
+            def clean_some_field(self):
+                return abs(self.some_field)
+
+        dummy = NarrowSaveNaiveModel.from_db(
+            'default', ['id', 'some_field', 'other_field'], [1, 5, 6]
+        )
+        dummy.save()
+        mock_save.assert_called_once_with(update_fields=[])
+
+        mock_save.reset_mock()
+        dummy.some_field = -6
+        dummy.save()
+        self.assertEqual(dummy.some_field, 6)
+        mock_save.assert_called_once_with(update_fields=['some_field'])
+
+    def test_changes_kept_after_saving_update_fields(self):
+        class PartlySavedNaiveModel(CleanFieldsModel):
+            title = models.CharField(max_length=50)
+            views = models.IntegerField()
+            clean_changed_fields_only = True
+            save_changed_fields_only = True
+
+            def clean_title(self):
+                return self.title.strip()
+
+        self.create_table(PartlySavedNaiveModel)
+        pk = PartlySavedNaiveModel.objects.create(title='a', views=0).pk
+
+        dummy = PartlySavedNaiveModel.objects.get(pk=pk)
+        dummy.title = '  b  '
+        dummy.views = 1
+        dummy.save(update_fields=['views'])
+        self.assertEqual(dummy.get_changed_field_names(), ['title'])
+        dummy.save()
+
+        saved = PartlySavedNaiveModel.objects.get(pk=pk)
+        self.assertEqual((saved.title, saved.views), ('b', 1))
+
+    @patch('django.db.models.Model.save')
+    def test_save_changed_fields_only_for_new_instance(self, mock_save):
+        class NewNarrowSaveNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            save_changed_fields_only = True
+
+        NewNarrowSaveNaiveModel(some_field=5).save()
+        mock_save.assert_called_once_with()
+
+
 class ValidationMixinTestCase(TestCase):
     @patch('django.db.models.Model.clean')
     def test_no_clean_on_validate(self, mock_clean):
@@ -75,6 +286,62 @@ class ValidationMixinTestCase(TestCase):
         mock_clean_fields.assert_called_once_with()
         mock_clean.assert_called_once_with()
 
+    @patch('django.db.models.Model.save')
+    def test_save_after_validation_skips_cleaned_fields(self, mock_save):
+        calls = []
+
+        class ValidatedSaveModel(CleanFieldsModel):
+            title = models.CharField(max_length=20)
+            slug = models.CharField(max_length=20)
+            body = models.CharField(max_length=20)
+            clean_on_validate = True
+            clean_field_dependencies = {'slug': ['title']}
+
+            def clean_title(self):
+                calls.append('title')
+                return self.title.strip()
+
+            def clean_slug(self):
+                calls.append('slug')
+                return self.title.lower()
+
+            def clean_body(self):
+                calls.append('body')
+                return self.body.strip()
+
+        dummy = ValidatedSaveModel(title=' Title ', slug='', body=' body ')
+        dummy.clean()
+        self.assertEqual(calls, ['title', 'slug', 'body'])
+
+        del calls[:]
+        dummy.save()
+        self.assertEqual(calls, [])
+
+        dummy.clean()
+        dummy.title = ' Other '
+        del calls[:]
+        dummy.save()
+        self.assertEqual(calls, ['title', 'slug'])
+        self.assertEqual(dummy.slug, 'other')
+
+    @patch('django.db.models.Model.save')
+    def test_validation_only_spares_next_save(self, mock_save):
+        calls = []
+
+        class ValidatedOnceModel(CleanFieldsModel):
+            title = models.CharField(max_length=20)
+            clean_on_validate = True
+
+            def clean_title(self):
+                calls.append('title')
+                return self.title
+
+        dummy = ValidatedOnceModel(title='title')
+        dummy.clean()
+        dummy.save()
+        dummy.save()
+        self.assertEqual(calls, ['title', 'title'])
+
 
 class CleanFieldsModelTestCase(TestCase):
     def test_get_find_cleaner_with_missing_cleaner(self):
@@ -104,3 +371,160 @@ class CleanFieldsModelTestCase(TestCase):
             dummy._get_field_cleaner('some_field'),
             dummy.clean_some_field
         )
+
+    def test_cleaned_field_names_in_dependency_order(self):
+        class DependentNaiveModel(CleanFieldsModel):
+            slug = models.CharField(max_length=10)
+            title = models.CharField(max_length=10)
+            clean_field_dependencies = {'slug': ['title']}
+
+            def clean_slug(self):
+                return self.title.lower()
+
+            def clean_title(self):
+                return self.title.strip()
+
+        self.assertEqual(
+            DependentNaiveModel._get_cleaned_field_names(),
+            ('title', 'slug')
+        )
+        dummy = DependentNaiveModel(slug='', title=' Title ')
+        dummy.clean_single_fields()
+        self.assertEqual(dummy.slug, 'title')
+
+    def test_cleaned_field_names_with_circular_dependencies(self):
+        class CircularNaiveModel(CleanFieldsModel):
+            one = models.IntegerField()
+            two = models.IntegerField()
+            clean_field_dependencies = {'one': ['two'], 'two': ['one']}
+
+            def clean_one(self):
+                return self.two
+
+            def clean_two(self):
+                return self.one
+
+        with self.assertRaises(CleanFieldsDependencyError):
+            CircularNaiveModel._get_cleaned_field_names()
+
+    def test_cleaned_field_names_only_include_cleaned_fields(self):
+        class PlannedNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            uncallable_field = models.IntegerField()
+            clean_uncallable_field = 'not callable'
+
+            def clean_other_field(self):
+                return self.other_field + 1
+
+        self.assertEqual(
+            PlannedNaiveModel._get_cleaned_field_names(),
+            ('other_field',)
+        )
+
+    def test_cleaned_field_names_computed_once(self):
+        class CachedPlanNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field + 1
+
+        with patch(
+            'clean_fields.models.get_model_field_names',
+            return_value=['id', 'some_field']
+        ) as mock_get_names:
+            CachedPlanNaiveModel._get_cleaned_field_names()
+            CachedPlanNaiveModel(some_field=1).clean_single_fields()
+        mock_get_names.assert_called_once_with(CachedPlanNaiveModel)
+
+    def test_cleaned_field_names_not_shared_with_subclasses(self):
+        class ParentPlanNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field + 1
+
+        self.assertEqual(
+            ParentPlanNaiveModel._get_cleaned_field_names(),
+            ('some_field',)
+        )
+
+        class ChildPlanNaiveModel(ParentPlanNaiveModel):
+            other_field = models.IntegerField()
+
+            def clean_other_field(self):
+                return self.other_field + 1
+
+        self.assertEqual(
+            ChildPlanNaiveModel._get_cleaned_field_names(),
+            ('some_field', 'other_field')
+        )
+
+    def test_clean_single_fields_restricted_to_field_names(self):
+        class RestrictedCleaningNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field * 2
+
+            def clean_other_field(self):
+                return self.other_field * 2
+
+        dummy = RestrictedCleaningNaiveModel(some_field=5, other_field=6)
+        dummy.clean_single_fields(field_names=['other_field'])
+        self.assertEqual(dummy.some_field, 5)
+        self.assertEqual(dummy.other_field, 12)
+
+    def test_clean_single_fields_caches_pure_cleaners(self):
+        calls = []
+
+        class PureNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            @pure_cleaner(cache_size=10)
+            def clean_some_field(self):
+                calls.append(self.some_field)
+                return self.some_field * 2
+
+        for value in [1, 2, 1]:
+            dummy = PureNaiveModel(some_field=value)
+            dummy.clean_single_fields()
+            self.assertEqual(dummy.some_field, value * 2)
+        self.assertEqual(calls, [1, 2])
+        info = PureNaiveModel.clean_some_field.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+    def test_clean_single_fields_skips_guarded_cleaners(self):
+        class GuardedNaiveModel(CleanFieldsModel):
+            status = models.CharField(max_length=10)
+            some_field = models.IntegerField()
+
+            def clean_status(self):
+                return self.status.strip()
+
+            @conditional_cleaner(when=lambda obj: obj.status == 'published')
+            def clean_some_field(self):
+                return self.some_field * 2
+
+        dummy = GuardedNaiveModel(status='draft', some_field=5)
+        dummy.clean_single_fields()
+        self.assertEqual(dummy.some_field, 5)
+
+        # The predicate reads the values cleaned before it.
+        dummy = GuardedNaiveModel(status=' published ', some_field=5)
+        dummy.clean_single_fields()
+        self.assertEqual(dummy.some_field, 10)
+
+    def test_clean_single_fields_runs_cleaners(self):
+        class PlannedCleaningNaiveModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field * 2
+
+        dummy = PlannedCleaningNaiveModel(some_field=5, other_field=6)
+        dummy.clean_single_fields()
+        self.assertEqual(dummy.some_field, 10)
+        self.assertEqual(dummy.other_field, 6)
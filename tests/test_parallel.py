@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import multiprocessing
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, skipUnless
+
+from django.db import models
+from mock import patch
+
+from clean_fields.decorators import cleans_field, cleans_field_batch
+from clean_fields.models import CleanFieldsModel
+from clean_fields.parallel import clean_instances_in_processes
+from clean_fields.registry import registry
+
+
+class ParallelCleanedModel(CleanFieldsModel):
+    title = models.CharField(max_length=10)
+    counter = models.IntegerField()
+
+    def clean_title(self):
+        return self.title.upper()
+
+    @staticmethod
+    @cleans_field_batch('tests.ParallelCleanedModel.counter')
+    def double_counters(counters):
+        return [counter * 2 for counter in counters]
+
+
+class CleanInstancesInProcessesTestCase(TestCase):
+    def test_cleaned_values_assigned(self):
+        dummies = [
+            ParallelCleanedModel(title='title {}'.format(i), counter=i)
+            for i in range(5)
+        ]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            clean_instances_in_processes(
+                ParallelCleanedModel,
+                dummies,
+                chunk_size=2,
+                executor=executor
+            )
+        self.assertEqual(
+            [(d.title, d.counter) for d in dummies],
+            [('TITLE {}'.format(i), i * 2) for i in range(5)]
+        )
+
+    def test_chunks_sent_by_reference(self):
+        dummies = [ParallelCleanedModel(title='a', counter=i) for i in (1, 2)]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with patch.object(
+                executor,
+                'map',
+                wraps=executor.map
+            ) as mock_map:
+                clean_instances_in_processes(
+                    ParallelCleanedModel,
+                    dummies,
+                    chunk_size=1,
+                    executor=executor
+                )
+        labels, chunks, _ = mock_map.call_args[0][1:]
+        self.assertEqual(labels, ['tests.ParallelCleanedModel'] * 2)
+        self.assertEqual(chunks, [
+            [{'id': None, 'title': 'a', 'counter': 1}],
+            [{'id': None, 'title': 'a', 'counter': 2}],
+        ])
+
+    @patch('clean_fields.parallel.load_deferred_fields')
+    def test_deferred_fields_left_deferred(self, mock_load):
+        class DeferredParallelModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+            body = models.CharField(max_length=10, default='DEFAULT')
+
+            def clean_title(self):
+                return self.title.upper()
+
+        dummy = DeferredParallelModel.from_db(
+            'default', ['id', 'title'], [1, 'a']
+        )
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            clean_instances_in_processes(
+                DeferredParallelModel, [dummy], executor=executor
+            )
+        mock_load.assert_called_once_with([dummy], {'title'})
+        self.assertEqual(dummy.title, 'A')
+        self.assertNotIn('body', dummy.__dict__)
+
+    def test_no_instances(self):
+        clean_instances_in_processes(ParallelCleanedModel, [])
+
+    @skipUnless(
+        'fork' in multiprocessing.get_all_start_methods(),
+        'requires the fork start method'
+    )
+    def test_cleaned_in_processes(self):
+        dummies = [ParallelCleanedModel(title='a', counter=i) for i in (1, 2)]
+        clean_instances_in_processes(
+            ParallelCleanedModel,
+            dummies,
+            chunk_size=1,
+            max_workers=2,
+            mp_context=multiprocessing.get_context('fork')
+        )
+        self.assertEqual(
+            [(d.title, d.counter) for d in dummies],
+            [('A', 2), ('A', 4)]
+        )
+
+
+class CleanerPicklingTestCase(TestCase):
+    def test_registered_cleaner_pickled_by_reference(self):
+        class PickledCleanerModel(models.Model):
+            title = models.CharField(max_length=10)
+
+        @cleans_field('tests.PickledCleanerModel.title')
+        def strip_title(title):
+            return title.strip()
+
+        field_cleaner = registry.get_field_cleaner(
+            'tests.PickledCleanerModel.title',
+            'strip_title'
+        )
+        self.assertIs(
+            pickle.loads(pickle.dumps(field_cleaner)),
+            field_cleaner
+        )
@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+from itertools import product
+from unittest import TestCase
+
+from django.db import models
+from django.db.models.signals import pre_save
+from mock import patch
+
+from clean_fields.decorators import cleans_field
+from clean_fields.models import CleanFieldsModel
+from clean_fields.pipelines import (
+    Pipeline, collapse_whitespace, lower, normalize_unicode, pipeline,
+    replace, strip, upper
+)
+
+
+class StepsTestCase(TestCase):
+    def test_strip(self):
+        self.assertEqual(pipeline(strip())(' \tvalue\n'), 'value')
+        self.assertEqual(pipeline(strip('-'))('--value-'), 'value')
+
+    def test_case(self):
+        self.assertEqual(pipeline(lower())('VaLuE'), 'value')
+        self.assertEqual(pipeline(upper())('VaLuE'), 'VALUE')
+
+    def test_collapse_whitespace(self):
+        self.assertEqual(
+            pipeline(collapse_whitespace())(' some \t\n value '),
+            ' some value '
+        )
+
+    def test_normalize_unicode(self):
+        self.assertEqual(pipeline(normalize_unicode())('é'), '\xe9')
+        self.assertEqual(pipeline(normalize_unicode('NFKC'))('ﬁ'), 'fi')
+        self.assertEqual(pipeline(normalize_unicode())('ascii'), 'ascii')
+
+    def test_unknown_normalization_form(self):
+        with self.assertRaises(ValueError):
+            normalize_unicode('NFX')
+
+    def test_replace(self):
+        self.assertEqual(
+            pipeline(replace(r'\d+', '#'))('call 555 1234'), 'call # #'
+        )
+        self.assertEqual(
+            pipeline(replace('a', 'b', flags=re.IGNORECASE))('aA'), 'bb'
+        )
+
+    def test_none_unchanged(self):
+        self.assertIsNone(pipeline(strip(), lower())(None))
+
+
+class PipelineTestCase(TestCase):
+    def test_steps_applied_in_order(self):
+        clean = pipeline(
+            replace(r'-', ' '), strip(), collapse_whitespace(), upper()
+        )
+        self.assertEqual(clean(' some--value  '), 'SOME VALUE')
+
+    def test_whitespace_steps_fused(self):
+        for steps in [
+            (strip(), collapse_whitespace()),
+            (collapse_whitespace(), strip()),
+            (strip(), collapse_whitespace(), strip(), collapse_whitespace()),
+        ]:
+            clean = pipeline(*steps)
+            self.assertEqual(clean.source.count('value = '), 1)
+            self.assertIn("' '.join(value.split())", clean.source)
+            self.assertEqual(clean('  some \t value\n'), 'some value')
+
+    def test_case_steps_not_fused(self):
+        clean = pipeline(upper(), lower())
+        self.assertEqual(clean.source.count('value = '), 2)
+        self.assertEqual(clean('stra\xdfe \ufb01le'), 'strasse file')
+
+    def test_fusion_preserves_results(self):
+        steps = [
+            strip(), strip('-'), lower(), upper(), collapse_whitespace(),
+            normalize_unicode(), normalize_unicode('NFKC'),
+        ]
+        values = [
+            ' stra\xdfe \ufb01le ',
+            '\xa0 \xdcn\xef\u2003c\xf6d\xe9 \u3000',
+            '\x1c-\u0130 \x85 ',
+        ]
+        for first, second, third in product(steps, repeat=3):
+            clean = pipeline(first, second, third)
+            for value in values:
+                expected = value
+                for step in (first, second, third):
+                    expected = pipeline(step)(expected)
+                self.assertEqual(clean(value), expected, repr(clean))
+
+    def test_stripped_characters_not_fused(self):
+        clean = pipeline(collapse_whitespace(), strip('-'))
+        self.assertEqual(clean('- some  value -'), ' some value ')
+
+    def test_equality(self):
+        self.assertEqual(
+            pipeline(strip(), lower()), Pipeline(strip(), lower())
+        )
+        self.assertNotEqual(pipeline(strip(), lower()), pipeline(lower()))
+        self.assertEqual(
+            hash(pipeline(strip(), lower())), hash(pipeline(strip(), lower()))
+        )
+
+    def test_repr(self):
+        self.assertEqual(
+            repr(pipeline(strip(), replace('a', 'b'))),
+            "pipeline(strip(None), replace('a', 'b', 0))"
+        )
+
+    @patch('django.db.models.Model.save')
+    def test_model_cleaner(self, mock_save):
+        class PipelineModel(CleanFieldsModel):
+            title = models.CharField(max_length=20)
+
+            clean_title = pipeline(strip(), lower())
+
+        dummy = PipelineModel(title=' Title ')
+        dummy.save()
+        self.assertEqual(dummy.title, 'title')
+        self.assertIsInstance(PipelineModel.clean_title, Pipeline)
+
+    def test_registered_cleaner(self):
+        class PipelineRegisteredModel(models.Model):
+            title = models.CharField(max_length=20)
+
+        cleans_field('tests.PipelineRegisteredModel.title', pure=True)(
+            pipeline(collapse_whitespace(), strip(), upper())
+        )
+
+        dummy = PipelineRegisteredModel(title=' some  title ')
+        pre_save.send(PipelineRegisteredModel, instance=dummy)
+        self.assertEqual(dummy.title, 'SOME TITLE')
@@ -0,0 +1,226 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+
+from django.db import models
+from django.db.models.signals import pre_save
+from mock import Mock, patch
+
+from clean_fields.cleaners import ContextFieldCleaner, FieldCleaner
+from clean_fields.exc import CleanFieldsDependencyError
+from clean_fields.registry import CleanerRegistry
+
+
+class CleanerRegistryTestCase(TestCase):
+    def test_get_cleaners_by_label(self):
+        registry = CleanerRegistry()
+        field_cleaner = FieldCleaner('app.Model', 'field', Mock())
+        registry.register(field_cleaner)
+        self.assertEqual(registry.get_cleaners('app.Model'), [field_cleaner])
+
+    def test_get_cleaners_is_case_insensitive(self):
+        registry = CleanerRegistry()
+        field_cleaner = FieldCleaner('app.Model', 'field', Mock())
+        registry.register(field_cleaner)
+        self.assertEqual(registry.get_cleaners('app.model'), [field_cleaner])
+
+    def test_get_cleaners_by_model(self):
+        class RegisteredModel(models.Model):
+            some_field = models.IntegerField()
+
+        registry = CleanerRegistry()
+        field_cleaner = FieldCleaner(
+            'tests.RegisteredModel',
+            'some_field',
+            Mock()
+        )
+        registry.register(field_cleaner)
+        self.assertEqual(
+            registry.get_cleaners(RegisteredModel),
+            [field_cleaner]
+        )
+        self.assertEqual(
+            registry.get_cleaners(RegisteredModel(some_field=1)),
+            [field_cleaner]
+        )
+
+    def test_get_cleaners_in_order(self):
+        registry = CleanerRegistry()
+        first = FieldCleaner('app.Model', 'field', Mock(), order=-1)
+        second = FieldCleaner('app.Model', 'field', Mock())
+        third = FieldCleaner('app.Model', 'other', Mock())
+        registry.register(second)
+        registry.register(third)
+        registry.register(first)
+        self.assertEqual(
+            registry.get_cleaners('app.Model'),
+            [first, second, third]
+        )
+
+    def test_get_cleaners_in_dependency_order(self):
+        registry = CleanerRegistry()
+        slug = FieldCleaner('app.Model', 'slug', Mock(), depends_on=['title'])
+        title = FieldCleaner('app.Model', 'title', Mock(), order=1)
+        other = FieldCleaner('app.Model', 'other', Mock())
+        registry.register(slug)
+        registry.register(title)
+        registry.register(other)
+        self.assertEqual(
+            registry.get_cleaners('app.Model'),
+            [other, title, slug]
+        )
+
+    def test_register_circular_dependencies(self):
+        registry = CleanerRegistry()
+        first = FieldCleaner('app.Model', 'one', Mock(), depends_on=['two'])
+        second = FieldCleaner('app.Model', 'two', Mock(), depends_on=['one'])
+        registry.register(first)
+        with self.assertRaises(CleanFieldsDependencyError):
+            registry.register(second)
+        self.assertEqual(registry.get_cleaners('app.Model'), [first])
+
+    def test_context_cleaners_read_cleaned_dependencies(self):
+        class DependentContextModel(models.Model):
+            title = models.CharField(max_length=20)
+            slug = models.CharField(max_length=20)
+
+        registry = CleanerRegistry()
+        registry.register(ContextFieldCleaner(
+            'tests.DependentContextModel',
+            'slug',
+            lambda slug, context: context['title'].lower(),
+            depends_on=['title']
+        ))
+        registry.register(FieldCleaner(
+            'tests.DependentContextModel',
+            'title',
+            lambda title: title.strip()
+        ))
+        dummy = DependentContextModel(title=' Title ', slug='')
+        registry.clean_instance(dummy)
+        self.assertEqual(dummy.title, 'Title')
+        self.assertEqual(dummy.slug, 'title')
+
+    @patch('clean_fields.registry.load_deferred_fields')
+    def test_deferred_fields(self, mock_load):
+        class DeferredRegistryModel(models.Model):
+            title = models.CharField(max_length=20)
+            slug = models.CharField(max_length=20)
+            body = models.CharField(max_length=20)
+
+        registry = CleanerRegistry()
+        slug_cleaner = Mock(return_value='slug')
+        body_cleaner = Mock(return_value='body')
+        registry.register(FieldCleaner(
+            'tests.DeferredRegistryModel',
+            'slug',
+            slug_cleaner,
+            depends_on=['title']
+        ))
+        registry.register(FieldCleaner(
+            'tests.DeferredRegistryModel', 'body', body_cleaner
+        ))
+        dummy = DeferredRegistryModel(id=1, title='T', slug='', body='')
+        dummy._state.adding = False
+        del dummy.__dict__['title']
+        del dummy.__dict__['body']
+
+        registry.clean_instance(dummy, update_fields=['slug'])
+        mock_load.assert_called_once_with([dummy], {'title'})
+        slug_cleaner.assert_called_once_with('')
+        self.assertFalse(body_cleaner.called)
+
+    def test_get_read_field_names(self):
+        registry = CleanerRegistry()
+        registry.register(FieldCleaner(
+            'app.Model', 'slug', Mock(), depends_on=['title']
+        ))
+        registry.register(FieldCleaner('app.Model', 'body', Mock()))
+        self.assertEqual(
+            registry.get_read_field_names('app.Model', ['title']),
+            {'slug', 'title'}
+        )
+        self.assertEqual(
+            registry.get_read_field_names('app.Model'),
+            {'slug', 'title', 'body'}
+        )
+
+    def test_get_model_labels(self):
+        registry = CleanerRegistry()
+        registry.register(FieldCleaner('app.Model', 'field', Mock()))
+        registry.register(FieldCleaner('app.Other', 'field', Mock()))
+        registry.register(FieldCleaner('app.Model', 'other', Mock()))
+        self.assertEqual(
+            registry.get_model_labels(),
+            ['app.model', 'app.other']
+        )
+
+    def test_single_receiver_connected_per_model(self):
+        registry = CleanerRegistry()
+        with patch.object(pre_save, 'connect') as mock_connect:
+            registry.register(FieldCleaner('app.Model', 'field', Mock()))
+            registry.register(FieldCleaner('app.Model', 'other', Mock()))
+            registry.register(FieldCleaner('app.Other', 'field', Mock()))
+        self.assertEqual(mock_connect.call_count, 2)
+
+    def test_pre_save_runs_cleaners(self):
+        class ReceiverRegisteredModel(models.Model):
+            some_field = models.IntegerField()
+
+        registry = CleanerRegistry()
+        registry.register(FieldCleaner(
+            'tests.ReceiverRegisteredModel',
+            'some_field',
+            lambda some_field: some_field * 2
+        ))
+        registry.register(FieldCleaner(
+            'tests.ReceiverRegisteredModel',
+            'some_field',
+            lambda some_field: some_field + 1,
+            order=-1
+        ))
+        dummy = ReceiverRegisteredModel(some_field=5)
+        pre_save.send(ReceiverRegisteredModel, instance=dummy)
+        self.assertEqual(dummy.some_field, 12)
+
+    def test_context_shared_among_cleaners(self):
+        class SharedContextModel(models.Model):
+            some_field = models.IntegerField()
+
+        contexts = []
+
+        def clean_some_field(some_field, data):
+            contexts.append(data)
+            return some_field
+
+        registry = CleanerRegistry()
+        for _ in range(2):
+            registry.register(ContextFieldCleaner(
+                'tests.SharedContextModel',
+                'some_field',
+                clean_some_field
+            ))
+        registry.clean_instance(SharedContextModel(some_field=5))
+        self.assertEqual(len(contexts), 2)
+        self.assertIs(contexts[0], contexts[1])
+
+    def test_get_cleaners_for_unregistered_model(self):
+        self.assertEqual(CleanerRegistry().get_cleaners('app.Model'), [])
+
+    def test_clean_instances(self):
+        class BulkRegisteredModel(models.Model):
+            some_field = models.IntegerField()
+
+        def add_one(some_field):
+            return some_field + 1
+
+        registry = CleanerRegistry()
+        registry.register(
+            FieldCleaner('tests.BulkRegisteredModel', 'some_field', add_one)
+        )
+        dummies = [BulkRegisteredModel(some_field=i) for i in range(3)]
+        registry.clean_instances(BulkRegisteredModel, dummies)
+        self.assertEqual([d.some_field for d in dummies], [1, 2, 3])
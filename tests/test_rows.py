@@ -0,0 +1,235 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+
+from django.apps import apps
+from django.db import models
+from django.db.models.signals import pre_init
+from mock import patch
+
+from clean_fields import clean_rows
+from clean_fields.decorators import (
+    cleans_field, cleans_field_batch, cleans_field_with_context
+)
+from clean_fields.models import CleanFieldsModel
+from clean_fields.rows import RowStandIn, get_stand_in_class
+
+
+class CleanRowsTestCase(TestCase):
+    def test_runs_model_and_registered_cleaners(self):
+        class RowCleanersModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+            slug = models.CharField(max_length=10)
+            count = models.IntegerField()
+
+            def clean_title(self):
+                return self.title.strip()
+
+            @cleans_field('tests.RowCleanersModel.title')
+            def upper(self, title):
+                return title.upper()
+
+            @cleans_field_with_context('tests.RowCleanersModel.slug')
+            def slugify(self, slug, data):
+                return data['title'].lower()
+
+        @cleans_field_batch('tests.RowCleanersModel.count')
+        def double(values):
+            return [value * 2 for value in values]
+
+        rows = clean_rows(RowCleanersModel, [
+            {'title': ' a ', 'slug': '', 'count': 1},
+            {'title': ' b ', 'slug': '', 'count': 2},
+        ])
+        self.assertEqual(list(rows), [
+            {'title': 'A', 'slug': 'a', 'count': 2},
+            {'title': 'B', 'slug': 'b', 'count': 4},
+        ])
+
+    def test_rows_cleaned_lazily(self):
+        consumed = []
+
+        class LazyRowsModel(models.Model):
+            some_field = models.IntegerField()
+
+        @cleans_field('tests.LazyRowsModel.some_field')
+        def add_one(some_field):
+            return some_field + 1
+
+        def generate_rows():
+            for value in range(3):
+                consumed.append(value)
+                yield {'some_field': value}
+
+        rows = clean_rows(LazyRowsModel, generate_rows())
+        self.assertEqual(consumed, [])
+        self.assertEqual(next(rows), {'some_field': 1})
+        self.assertEqual(consumed, [0])
+
+    def test_model_never_instantiated(self):
+        instantiated = []
+        cleaned_by = []
+
+        def record(sender, **kwargs):
+            instantiated.append(sender)
+
+        class StandInRowsModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self):
+                cleaned_by.append(type(self))
+                return self.some_field + 1
+
+        pre_init.connect(record, sender=StandInRowsModel)
+        self.addCleanup(pre_init.disconnect, record, sender=StandInRowsModel)
+        row, = clean_rows(StandInRowsModel, [{'some_field': 1}])
+        self.assertEqual(instantiated, [])
+        self.assertEqual(row, {'some_field': 2})
+        self.assertTrue(issubclass(cleaned_by[0], RowStandIn))
+
+    def test_model_methods_available(self):
+        class MethodRowsModel(models.Model):
+            first = models.CharField(max_length=10)
+            last = models.CharField(max_length=10)
+            full = models.CharField(max_length=20)
+
+            @property
+            def joined(self):
+                return self.join(self.first, self.last)
+
+            @staticmethod
+            def join(*names):
+                return ' '.join(names)
+
+            @classmethod
+            @cleans_field('tests.MethodRowsModel.first')
+            def capitalize(cls, first):
+                return first.capitalize()
+
+            @cleans_field(
+                'tests.MethodRowsModel.full', depends_on=['first', 'last']
+            )
+            def clean_full(self, full):
+                return self.joined
+
+        row, = clean_rows(
+            MethodRowsModel, [{'first': 'ada', 'last': 'L', 'full': ''}]
+        )
+        self.assertEqual(row['full'], 'Ada L')
+
+    def test_missing_fields_take_defaults(self):
+        class DefaultRowsModel(CleanFieldsModel):
+            some_field = models.IntegerField(default=5)
+            other_field = models.IntegerField(default=7)
+
+            def clean_some_field(self):
+                return self.some_field + 1
+
+        row, = clean_rows(DefaultRowsModel, [{}])
+        self.assertEqual(row, {'some_field': 6})
+
+    def test_only_field_values_yielded(self):
+        class MemoRowsModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+
+            def clean_some_field(self):
+                self._memo = self.some_field
+                return self.some_field + 1
+
+        row, = clean_rows(MemoRowsModel, [{'some_field': 1}])
+        self.assertEqual(row, {'some_field': 2})
+
+    def test_stand_ins_do_not_share_state(self):
+        class StateRowsModel(models.Model):
+            some_field = models.IntegerField()
+
+        stand_in_class = get_stand_in_class(StateRowsModel)
+        stand_in = stand_in_class.from_row({'some_field': 1})
+        stand_in._state.adding = False
+        other = stand_in_class.from_row({'some_field': 2})
+        self.assertTrue(other._state.adding)
+
+    def test_field_names_restrict_cleaners(self):
+        class RestrictedRowsModel(CleanFieldsModel):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+            def clean_some_field(self):
+                return self.some_field + 1
+
+            def clean_other_field(self):
+                return self.other_field + 1
+
+        rows = clean_rows(
+            RestrictedRowsModel,
+            [{'some_field': 1, 'other_field': 1}],
+            field_names=['other_field']
+        )
+        self.assertEqual(list(rows), [{'some_field': 1, 'other_field': 2}])
+
+    def test_foreign_keys_by_id(self):
+        class RowAuthor(models.Model):
+            name = models.CharField(max_length=10)
+
+        class RowBook(models.Model):
+            author = models.ForeignKey(RowAuthor, on_delete=models.CASCADE)
+            title = models.CharField(max_length=10)
+
+            @cleans_field_with_context('tests.RowBook.title')
+            def clean_title(self, title, data):
+                return '{} by {}'.format(title, data['author_id'])
+
+        row, = clean_rows(RowBook, [{'author_id': 3, 'title': 'T'}])
+        self.assertEqual(row['title'], 'T by 3')
+
+        stand_in = get_stand_in_class(RowBook).from_row({'author_id': 3})
+        with self.assertRaises(AttributeError):
+            stand_in.author
+        author = RowAuthor(id=4)
+        stand_in = get_stand_in_class(RowBook).from_row({'author': author})
+        self.assertEqual(stand_in.author_id, 4)
+
+
+class GetStandInClassTestCase(TestCase):
+    def test_subclass_of_model(self):
+        class ParentRowsModel(CleanFieldsModel):
+            title = models.CharField(max_length=10)
+
+            def clean_title(self):
+                return self.title.strip()
+
+        class ChildRowsModel(ParentRowsModel):
+            def clean_title(self):
+                return super(ChildRowsModel, self).clean_title().upper()
+
+        stand_in_class = get_stand_in_class(ChildRowsModel)
+        self.assertTrue(issubclass(stand_in_class, ChildRowsModel))
+        self.assertNotIn(stand_in_class, apps.get_models())
+        row, = clean_rows(ChildRowsModel, [{'title': ' a '}])
+        self.assertEqual(row['title'], 'A')
+
+    def test_built_once_per_model(self):
+        class CachedStandInModel(models.Model):
+            some_field = models.IntegerField()
+
+        stand_in_class = get_stand_in_class(CachedStandInModel)
+        self.assertIs(get_stand_in_class(CachedStandInModel), stand_in_class)
+        self.assertIs(stand_in_class._meta, CachedStandInModel._meta)
+        self.assertEqual(stand_in_class.__name__, 'CachedStandInModelRow')
+
+    def test_field_descriptors_replaced(self):
+        class DescriptorStandInModel(models.Model):
+            some_field = models.IntegerField(default=1)
+
+        stand_in_class = get_stand_in_class(DescriptorStandInModel)
+        stand_in = stand_in_class.from_row({'id': 2})
+        with patch.object(
+            DescriptorStandInModel, 'refresh_from_db'
+        ) as mock_refresh:
+            self.assertEqual((stand_in.pk, stand_in.some_field), (2, 1))
+        self.assertFalse(mock_refresh.called)
+        with self.assertRaises(AttributeError):
+            stand_in.missing_attribute
@@ -6,10 +6,13 @@ from __future__ import unicode_literals
 from unittest import TestCase
 
 from django.db import models
-from mock import patch
+from mock import PropertyMock, patch
 
+from clean_fields.exc import CleanFieldsDependencyError
 from clean_fields.utils import (
-    get_model_field_value, get_model_field_names, parse_field_ref,
+    FieldContext, get_changed_field_names, get_deferred_field_names,
+    get_model_field_value, get_model_field_names, load_deferred_fields,
+    order_by_dependencies, parse_field_ref, take_field_snapshot,
 )
 
 
@@ -76,6 +79,197 @@ class GetModelFieldNamesTestCase(TestCase):
         self.assertEqual(field_names, ['id', 'some_field'])
 
 
+class FieldContextTestCase(TestCase):
+    def test_mapping_of_field_values(self):
+        class MappedContextModel(models.Model):
+            some_field = models.IntegerField()
+
+        context = FieldContext(MappedContextModel(id=1, some_field=5))
+        self.assertEqual(dict(context), {'id': 1, 'some_field': 5})
+        self.assertEqual(len(context), 2)
+        self.assertIn('some_field', context)
+
+    def test_only_accessed_fields_are_read(self):
+        class LazyContextModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        context = FieldContext(LazyContextModel(some_field=5, other_field=6))
+        with patch(
+            'clean_fields.utils.get_model_field_value',
+            return_value=5
+        ) as mock_get_value:
+            self.assertEqual(context['some_field'], 5)
+        mock_get_value.assert_called_once_with(
+            context._instance,
+            'some_field'
+        )
+
+    def test_reflects_current_values(self):
+        class LiveContextModel(models.Model):
+            some_field = models.IntegerField()
+
+        instance = LiveContextModel(some_field=5)
+        context = FieldContext(instance)
+        instance.some_field = 6
+        self.assertEqual(context['some_field'], 6)
+
+    def test_missing_field_raises_key_error(self):
+        class MissingContextModel(models.Model):
+            some_field = models.IntegerField()
+
+        context = FieldContext(MissingContextModel(some_field=5))
+        with self.assertRaises(KeyError):
+            context['save']
+        self.assertIsNone(context.get('not_a_field'))
+
+
+class ContextAuthor(models.Model):
+    name = models.CharField(max_length=10)
+
+
+class ContextTag(models.Model):
+    name = models.CharField(max_length=10)
+
+
+class ContextArticle(models.Model):
+    author = models.ForeignKey(ContextAuthor, on_delete=models.CASCADE)
+    tags = models.ManyToManyField(ContextTag)
+    title = models.CharField(max_length=10)
+
+
+class RelationSafeFieldContextTestCase(TestCase):
+    def test_foreign_keys_exposed_by_id(self):
+        context = FieldContext(ContextArticle(id=1, author_id=2, title=''))
+        self.assertEqual(
+            dict(context), {'id': 1, 'author_id': 2, 'title': ''}
+        )
+        self.assertEqual(len(context), 3)
+
+    def test_iteration_fetches_no_relation(self):
+        article = ContextArticle(id=1, author_id=2, title='')
+        with patch.object(
+            type(article), 'author', new_callable=PropertyMock
+        ) as mock_author:
+            dict(FieldContext(article))
+        self.assertFalse(mock_author.called)
+
+    def test_forward_relations_fetched_on_explicit_access(self):
+        author = ContextAuthor(id=2, name='name')
+        article = ContextArticle(id=1, author=author, title='')
+        context = FieldContext(article)
+        self.assertIn('author', context)
+        self.assertIn('tags', context)
+        self.assertIs(context['author'], author)
+
+    def test_reverse_relations_excluded(self):
+        context = FieldContext(ContextAuthor(id=2, name='name'))
+        self.assertEqual(list(context), ['id', 'name'])
+        self.assertNotIn('contextarticle', context)
+        with self.assertRaises(KeyError):
+            context['contextarticle_set']
+
+
+class FieldSnapshotTestCase(TestCase):
+    def test_no_snapshot(self):
+        class UnsnappedModel(models.Model):
+            some_field = models.IntegerField()
+
+        self.assertIsNone(get_changed_field_names(UnsnappedModel()))
+
+    def test_unchanged_fields(self):
+        class UnchangedSnapshotModel(models.Model):
+            some_field = models.IntegerField()
+
+        instance = UnchangedSnapshotModel(id=1, some_field=5)
+        take_field_snapshot(instance)
+        self.assertEqual(get_changed_field_names(instance), [])
+
+    def test_changed_fields(self):
+        class ChangedSnapshotModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        instance = ChangedSnapshotModel(id=1, some_field=5, other_field=6)
+        take_field_snapshot(instance)
+        instance.other_field = 7
+        self.assertEqual(get_changed_field_names(instance), ['other_field'])
+
+    def test_deferred_fields_are_ignored(self):
+        class DeferredSnapshotModel(models.Model):
+            some_field = models.IntegerField()
+
+        instance = DeferredSnapshotModel(id=1, some_field=5)
+        del instance.__dict__['some_field']
+        take_field_snapshot(instance)
+        self.assertNotIn('some_field', instance._clean_fields_snapshot)
+        self.assertEqual(get_changed_field_names(instance), [])
+        instance.some_field = 6
+        self.assertEqual(get_changed_field_names(instance), ['some_field'])
+
+    def test_named_snapshots(self):
+        class NamedSnapshotModel(models.Model):
+            some_field = models.IntegerField()
+
+        instance = NamedSnapshotModel(id=1, some_field=5)
+        take_field_snapshot(instance, '_other_snapshot')
+        self.assertIsNone(get_changed_field_names(instance))
+        take_field_snapshot(instance)
+        instance.some_field = 6
+        self.assertEqual(
+            get_changed_field_names(instance, '_other_snapshot'),
+            ['some_field']
+        )
+
+
+class DeferredFieldsTestCase(TestCase):
+    def test_get_deferred_field_names(self):
+        class DeferredNamesModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+
+        instance = DeferredNamesModel(id=1, some_field=5, other_field=6)
+        self.assertEqual(get_deferred_field_names(instance), [])
+        del instance.__dict__['other_field']
+        self.assertEqual(get_deferred_field_names(instance), ['other_field'])
+
+    @patch('clean_fields.utils.QuerySet')
+    def test_load_deferred_fields(self, mock_queryset):
+        class LoadDeferredModel(models.Model):
+            some_field = models.IntegerField()
+            other_field = models.IntegerField()
+            third_field = models.IntegerField()
+
+        instances = [
+            LoadDeferredModel(id=i, some_field=i, other_field=i, third_field=i)
+            for i in (1, 2)
+        ]
+        for instance in instances:
+            del instance.__dict__['other_field']
+            del instance.__dict__['third_field']
+        values_list = mock_queryset.return_value.filter.return_value \
+            .values_list
+        values_list.return_value = [(1, 10), (2, 20)]
+
+        load_deferred_fields(instances, ['some_field', 'other_field'])
+        mock_queryset.assert_called_once_with(LoadDeferredModel, using=None)
+        mock_queryset.return_value.filter.assert_called_once_with(
+            pk__in=[1, 2]
+        )
+        values_list.assert_called_once_with('pk', 'other_field')
+        self.assertEqual([obj.other_field for obj in instances], [10, 20])
+        self.assertNotIn('third_field', instances[0].__dict__)
+
+    @patch('clean_fields.utils.QuerySet')
+    def test_load_loaded_fields(self, mock_queryset):
+        class LoadLoadedModel(models.Model):
+            some_field = models.IntegerField()
+
+        load_deferred_fields([LoadLoadedModel(id=1, some_field=1)], ['id'])
+        load_deferred_fields([LoadLoadedModel(some_field=1)], ['some_field'])
+        self.assertFalse(mock_queryset.called)
+
+
 class ParseFieldRefTestCase(TestCase):
     def test_parsed_model_label(self):
         model_label, _ = parse_field_ref('app_name.ModelName.field_name')
@@ -84,3 +278,38 @@ class ParseFieldRefTestCase(TestCase):
     def test_parsed_field_name(self):
         _, field_name = parse_field_ref('app_name.ModelName.field_name')
         self.assertEqual(field_name, 'field_name')
+
+
+class OrderByDependenciesTestCase(TestCase):
+    def test_order_preserved_without_dependencies(self):
+        ordered = order_by_dependencies('app.Model', [
+            ('one', (), 1), ('two', (), 2), ('three', (), 3)
+        ])
+        self.assertEqual(ordered, [1, 2, 3])
+
+    def test_dependencies_first(self):
+        ordered = order_by_dependencies('app.Model', [
+            ('slug', ['title'], 'slugify'),
+            ('title', (), 'strip'),
+            ('title', (), 'capitalize'),
+            ('other', (), 'other'),
+        ])
+        self.assertEqual(ordered, ['strip', 'capitalize', 'slugify', 'other'])
+
+    def test_transitive_dependencies(self):
+        ordered = order_by_dependencies('app.Model', [
+            ('three', ['two'], 3), ('two', ['one'], 2), ('one', (), 1)
+        ])
+        self.assertEqual(ordered, [1, 2, 3])
+
+    def test_own_field_and_unknown_fields_ignored(self):
+        ordered = order_by_dependencies('app.Model', [
+            ('one', ['one', 'missing'], 1), ('two', (), 2)
+        ])
+        self.assertEqual(ordered, [1, 2])
+
+    def test_circular_dependencies(self):
+        with self.assertRaises(CleanFieldsDependencyError):
+            order_by_dependencies('app.Model', [
+                ('one', ['two'], 1), ('two', ['one'], 2)
+            ])